@@ -0,0 +1,78 @@
+"""
+Synthetic benchmark datasets: the sample files in data/ replicated to any row
+count with fresh keys (and ~5% duplicate keys, like the real generators), so
+the pipeline does the same work per row as on production-like data.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+from config.schemas import get_schema
+
+# Sample paths are relative to the repository root
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE_FILES = {
+    "claims": "data/claims.csv",
+    "policies": "data/policies.csv",
+    "customers": "data/customers.csv",
+    "agents": "data/agents.csv",
+    "payments": "data/payments.csv",
+}
+
+DUPLICATE_RATE = 0.05
+
+SIZE_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+
+def parse_size(size: str) -> int:
+    """
+    Parse a row count such as "10k", "1m" or "2500".
+    """
+    size = size.strip().lower()
+    if size[-1:] in SIZE_SUFFIXES:
+        return int(float(size[:-1]) * SIZE_SUFFIXES[size[-1]])
+    return int(size)
+
+
+def dataset_path(entity: str, rows: int, data_dir: str) -> str:
+    """
+    Generate (once) and return the path of a benchmark CSV for an entity.
+
+    Args:
+        entity (str): Entity name in the schema registry.
+        rows (int): Number of data rows.
+        data_dir (str): Cache directory for generated files.
+
+    Returns:
+        str: Path of the CSV file.
+    """
+    path = os.path.join(data_dir, f"{entity}_{rows}.csv")
+    if os.path.exists(path):
+        return path
+
+    schema = get_schema(entity)
+    sample = pd.read_csv(os.path.join(_REPO_ROOT, SAMPLE_FILES[entity]), dtype=str, keep_default_na=False)
+    key_header = next(
+        col for col in sample.columns
+        if schema.aliases.get(col.strip().upper(), col.strip().upper()) == schema.key
+    )
+
+    rng = np.random.default_rng(seed=rows)
+    df = sample.iloc[rng.integers(0, len(sample), size=rows)].reset_index(drop=True)
+
+    # Unique keys, except that some rows repeat the key of an earlier row
+    key_numbers = np.arange(rows)
+    duplicates = rng.random(rows) < DUPLICATE_RATE
+    duplicates[0] = False
+    key_numbers[duplicates] = rng.integers(0, np.arange(rows)[duplicates])
+    df[key_header] = pd.Series(key_numbers).map("K{:09d}".format)
+
+    os.makedirs(data_dir, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), tmp_path)
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,43 @@
+"""
+The per-row customer/agent cleaning code that the vectorized kernels in
+transform/cleaning.py replaced, paired with those kernels by name, and the
+columns of the sample data each one applies to. Used as the reference by
+tests/test_cleaning.py and benchmarks/bench_cleaning.py.
+"""
+from transform.cleaning import clean_email, clean_gender, clean_title, clean_upper, clean_zip, format_phone
+
+# Original transform_customer / transform_agent expressions
+LEGACY = {
+    "title": lambda s: s.str.strip().str.title(),
+    "upper": lambda s: s.str.strip().str.upper(),
+    "email": lambda s: s.str.strip().str.lower(),
+    "gender": lambda s: s.str.upper().str.strip().map({
+        "MALE": "M", "M": "M",
+        "FEMALE": "F", "F": "F"
+    }).fillna("O"),
+    "zip": lambda s: s.astype(str).str.zfill(5).str[:5],
+    "phone": lambda s: s.astype(str).str.replace(r'\D', '', regex=True).apply(
+        lambda x: f"{x[:3]}-{x[3:6]}-{x[6:10]}" if len(x) == 10 else "000-000-0000"
+    ),
+    "agency": lambda s: s.fillna("Unknown").str.strip().str.title(),
+}
+
+VECTORIZED = {
+    "title": clean_title,
+    "upper": clean_upper,
+    "email": clean_email,
+    "gender": clean_gender,
+    "zip": clean_zip,
+    "phone": format_phone,
+    "agency": lambda s: clean_title(s, fill_value="Unknown"),
+}
+
+SAMPLE_COLUMNS = {
+    "title": [("customers", "FIRST_NAME"), ("customers", "LAST_NAME"), ("customers", "ADDRESS"), ("customers", "CITY")],
+    "upper": [("customers", "STATE")],
+    "email": [("customers", "EMAIL"), ("agents", "EMAIL")],
+    "gender": [("customers", "GENDER")],
+    "zip": [("customers", "ZIP_CODE")],
+    "phone": [("customers", "PHONE"), ("agents", "PHONE")],
+    "agency": [("agents", "AGENCY_NAME")],
+}
@@ -0,0 +1,281 @@
+"""
+Benchmark suite for the extract, transform and load stages.
+
+For every entity and dataset size the suite times extract_from_csv, the
+entity's transform function and the load path (staging files + bulk upsert
+against an offline backend), recording throughput and peak memory. The
+default "fake" backend only records the SQL, so the load figures cover
+staging; --backend duckdb also executes the COPY and MERGE locally.
+--engine picks the transform engine (pandas by default, or arrow / polars,
+which read and stage pyarrow Tables).
+Each entity/size case runs in a fresh process so peak RSS is not inherited
+from earlier cases. Results are compared to a stored baseline; the run exits
+with status 1 when throughput drops or peak memory grows by more than the
+threshold, or when a case's process dies (e.g. killed for running out of
+memory). --update-baseline records such cases under "skipped" with the
+reason, so a baseline shows which sizes the recording host could not run,
+and exits with status 1: a baseline meant to gate changes must be recorded
+on a host that finishes every size, 10M rows included.
+Only the stage itself is measured: the input a repeat needs (the copy of
+the extracted DataFrame the transform mutates) is prepared untimed, and
+the previous repeat's output is released before the next one starts.
+
+Run from the repository root:
+    python -m benchmarks.run_benchmarks                      # 10k rows, compare to baseline
+    python -m benchmarks.run_benchmarks --sizes 10k,1m,10m
+    python -m benchmarks.run_benchmarks --update-baseline    # record this machine's numbers
+    python -m benchmarks.run_benchmarks --backend duckdb     # really run COPY INTO and MERGE
+    python -m benchmarks.run_benchmarks --engine polars      # benchmark the Polars engine
+
+Baselines are machine-specific: record them on the host that runs the
+comparison (e.g. the nightly box).
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+
+from benchmarks.datasets import SAMPLE_FILES, dataset_path, parse_size
+
+DEFAULT_BASELINE = "benchmarks/baseline.json"
+DEFAULT_DATA_DIR = "benchmarks/.data"
+STEPS = ("extract", "transform", "load")
+
+
+def _best_of(entity: str, step: str, repeat: int, func, prepare=None):
+    """
+    Run `func` `repeat` times and keep the measurements of the fastest run.
+    With `prepare`, every run calls func(prepare()), and only func is measured.
+    """
+    from utils.metrics import StageMetrics
+
+    best, result = None, None
+    for _ in range(repeat):
+        # Drop the previous run's result first, so it does not count towards this run's peak RSS
+        result = None
+        args = (prepare(),) if prepare else ()
+        metrics = StageMetrics(entity, step)
+        with metrics.track():
+            result = func(*args)
+        if best is None or metrics.wall_seconds < best.wall_seconds:
+            best = metrics
+    return result, best
+
+
+def _run_case(
+    entity: str, rows: int, data_dir: str, repeat: int, backend: str = "fake", engine: str = "pandas"
+) -> list[dict]:
+    """
+    Time the three stages for one entity and dataset size (runs in a child process).
+    """
+    from config.config import config
+    from load.load_entities import load_staged, stage_entity
+    from load.load_utils import close_pool
+    from main import ENTITIES
+    from transform.transform_utils import TransformReport
+
+    # Time the stages, not the console: only warnings are logged
+    logging.getLogger().setLevel(logging.WARNING)
+
+    # Never talk to a real account from a benchmark
+    config["snowflake"]["backend"] = backend
+    config["snowflake"]["duckdb_path"] = ":memory:"
+    spec = ENTITIES[entity]
+    transform_func = spec["transform"] if engine == "pandas" else spec[f"transform_{engine}"]
+    path = dataset_path(entity, rows, data_dir)
+    staging_root = tempfile.mkdtemp(prefix="etl_bench_")
+
+    def load(df):
+        if backend == "duckdb":
+            # Every repeat loads into an empty database (all rows inserted)
+            from load import duckdb_connector
+
+            close_pool()
+            duckdb_connector.reset()
+        staging_dir = tempfile.mkdtemp(dir=staging_root)
+        staged = stage_entity(entity, df, staging_dir)
+        load_staged([staged], staging_dir)
+        return staged
+
+    # The stages print progress for every call; keep the benchmark output readable
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            df_raw, extract = _best_of(entity, "extract", repeat, lambda: spec["extract"](
+                path, arrow=engine != "pandas"
+            ))
+            # pyarrow Tables are immutable; DataFrames are copied (untimed) so every repeat transforms the same input
+            df, transform = _best_of(
+                entity, "transform", repeat, lambda data: transform_func(data, TransformReport(entity)),
+                prepare=lambda: df_raw.copy() if engine == "pandas" else df_raw,
+            )
+            staged, load = _best_of(entity, "load", repeat, lambda: load(df))
+    finally:
+        close_pool()
+        shutil.rmtree(staging_root, ignore_errors=True)
+
+    extract.rows_in, extract.rows_out, extract.bytes = rows, len(df_raw), os.path.getsize(path)
+    transform.rows_in, transform.rows_out = len(df_raw), len(df)
+    load.rows_in = load.rows_out = staged.rows
+    load.bytes = staged.bytes_staged
+    return [{"size": rows, "backend": backend, "engine": engine, **m.to_dict()} for m in (extract, transform, load)]
+
+
+def _machine() -> str:
+    return f"{platform.platform()} / Python {platform.python_version()} / {os.cpu_count()} CPUs"
+
+
+def _total_memory() -> int:
+    """Physical memory of this host in bytes."""
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+
+
+def _case_key(result: dict) -> str:
+    key = f"{result['entity']}/{result['size']}/{result['stage']}"
+    # Baselines recorded before --backend and --engine existed are keyed without them
+    backend = result.get("backend", "fake")
+    key = key if backend == "fake" else f"{key}/{backend}"
+    engine = result.get("engine", "pandas")
+    return key if engine == "pandas" else f"{key}/{engine}"
+
+
+def compare(results: list[dict], baseline: dict, threshold: float) -> list[str]:
+    """
+    Regressions of `results` against the baseline: throughput lower than
+    (1 - threshold) x baseline or peak RSS higher than (1 + threshold) x baseline.
+    Cases missing from the baseline are not compared.
+    """
+    regressions = []
+    for result in results:
+        expected = baseline.get("results", {}).get(_case_key(result))
+        if not expected:
+            continue
+        if result["rows_per_second"] < expected["rows_per_second"] * (1 - threshold):
+            regressions.append(
+                f"{_case_key(result)}: {result['rows_per_second']:.0f} rows/s "
+                f"vs baseline {expected['rows_per_second']:.0f} rows/s"
+            )
+        if result["peak_rss_bytes"] > expected["peak_rss_bytes"] * (1 + threshold):
+            regressions.append(
+                f"{_case_key(result)}: peak RSS {result['peak_rss_bytes'] / 2**20:.0f} MiB "
+                f"vs baseline {expected['peak_rss_bytes'] / 2**20:.0f} MiB"
+            )
+    return regressions
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the extract, transform and load stages.")
+    parser.add_argument("--sizes", default="10k", help="Comma-separated rows per entity, e.g. 10k,1m,10m (default: %(default)s)")
+    parser.add_argument("--entities", default=",".join(SAMPLE_FILES), help="Comma-separated entities (default: all)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file (default: %(default)s)")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative regression (default: %(default)s)")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Cache for generated datasets (default: %(default)s)")
+    parser.add_argument("--output", help="Also write the raw results to this JSON file")
+    parser.add_argument(
+        "--backend", choices=("fake", "duckdb"), default="fake",
+        help="Offline load backend: fake records SQL only, duckdb executes it (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--engine", choices=("pandas", "arrow", "polars"), default="pandas",
+        help="Transform engine, see main.ENGINES (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--repeat", type=int,
+        help="Runs per step, fastest kept (default: up to 10 for small sizes, 1 from 100k rows)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    entities = [entity.strip() for entity in args.entities.split(",")]
+
+    results = []
+    # Cases whose process died (typically killed for running out of memory)
+    failed = {}
+    # A fresh process per case, so every peak RSS measurement starts clean
+    ctx = multiprocessing.get_context("spawn")
+    for rows in sizes:
+        for entity in entities:
+            repeat = args.repeat or max(1, min(10, 100_000 // rows))
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                try:
+                    case = pool.submit(_run_case, entity, rows, args.data_dir, repeat, args.backend, args.engine).result()
+                except BrokenProcessPool:
+                    failed[f"{entity}/{rows}"] = (
+                        f"the benchmark process died on {_machine()} with {_total_memory() / 2**30:.1f} GiB RAM, "
+                        "most likely killed for running out of memory"
+                    )
+                    print(f"⚠️ {entity:<10} {rows:>10} skipped: the benchmark process died (out of memory?)")
+                    continue
+            results.extend(case)
+            for r in case:
+                print(
+                    f"{entity:<10} {rows:>10} {r['stage']:<9} {r['wall_seconds']:>8.3f}s "
+                    f"{r['rows_per_second']:>12.0f} rows/s {r['peak_rss_bytes'] / 2**20:>8.0f} MiB peak"
+                )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline["recorded_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        baseline["machine"] = _machine()
+        baseline.setdefault("results", {}).update({
+            _case_key(r): {"rows_per_second": r["rows_per_second"], "peak_rss_bytes": r["peak_rss_bytes"]}
+            for r in results
+        })
+        # Cases that could not be recorded, and why; a later successful run clears them
+        skipped = baseline.setdefault("skipped", {})
+        for r in results:
+            skipped.pop(f"{r['entity']}/{r['size']}", None)
+        skipped.update(failed)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"📌 Baseline updated: {args.baseline}")
+        if failed:
+            print(
+                f"⚠️ {len(failed)} case(s) could not run on this host and have no baseline: {', '.join(failed)}. "
+                "Record the baseline on a host that finishes every size."
+            )
+            return 1
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠️ No baseline at {args.baseline}; run with --update-baseline to create one.")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("machine") != _machine():
+        print(f"⚠️ The baseline was recorded on another machine ({baseline.get('machine')}); timings may not compare.")
+    unrecorded = sorted({f"{r['entity']}/{r['size']}" for r in results} & set(baseline.get("skipped", {})))
+    if unrecorded:
+        print(f"⚠️ Not compared, the baseline host could not run them: {', '.join(unrecorded)}")
+    regressions = compare(results, baseline, args.threshold)
+    regressions += [f"{case}: {reason}" for case, reason in failed.items()]
+    for regression in regressions:
+        print(f"❌ Regression: {regression}")
+    if not regressions:
+        print(f"✅ No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Local stand-in for a Slack incoming webhook, to exercise utils.notify without
+a workspace. It prints every message it receives and can simulate a slow or
+failing webhook.
+
+Run from the repository root, then point SLACK_WEBHOOK_URL at it:
+    python -m benchmarks.slack_stub --port 8765 --delay 3 --fail-first 2
+    SLACK_WEBHOOK_URL=http://127.0.0.1:8765/ python main.py
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class SlackStub(ThreadingHTTPServer):
+    """
+    HTTP server recording the JSON payloads POSTed to it.
+
+    Args:
+        port (int): Port to listen on (0 picks a free one, see `url`).
+        delay (float): Seconds to wait before answering each request.
+        fail_first (int): Answer this many requests with `fail_status` first.
+        fail_status (int): Status of the simulated failures (e.g. 500 or 429).
+    """
+
+    def __init__(self, port: int = 0, delay: float = 0.0, fail_first: int = 0, fail_status: int = 500):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.delay = delay
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.requests = 0
+        self.messages: list[str] = []
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/"
+
+    def start(self) -> "SlackStub":
+        """Serve from a background thread (for use inside scripts)."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: SlackStub
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.server.delay)
+        with self.server._lock:
+            self.server.requests += 1
+            failing = self.server.requests <= self.server.fail_first
+            if not failing:
+                self.server.messages.append(json.loads(body)["text"])
+
+        status = self.server.fail_status if failing else 200
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(b"error" if failing else b"ok")
+        print(f"{'❌' if failing else '📨'} {status} {body.decode(errors='replace')}")
+
+    def log_message(self, *args):
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local Slack webhook stand-in.")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: %(default)s)")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds before each answer (default: %(default)s)")
+    parser.add_argument("--fail-first", type=int, default=0, help="Fail this many requests first (default: %(default)s)")
+    parser.add_argument("--fail-status", type=int, default=500, help="Status of failed requests (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    server = SlackStub(args.port, args.delay, args.fail_first, args.fail_status)
+    print(f"Listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
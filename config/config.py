@@ -4,7 +4,7 @@ import os
 # Load environment variables from .env file
 load_dotenv()
 
-# Configuration dictionary for Snowflake and Slack
+# Configuration dictionary for Snowflake, Slack and pipeline execution
 config = {
     "snowflake": {
         "user": os.getenv("SNOWFLAKE_USER"),
@@ -14,6 +14,100 @@ config = {
         "database": os.getenv("SNOWFLAKE_DATABASE"),
         "schema": os.getenv("SNOWFLAKE_SCHEMA"),
         "role": os.getenv("SNOWFLAKE_ROLE"),
+        # "snowflake" for a real account; offline stand-ins: "fake" (records
+        # statements only) or "duckdb" (executes them against a local DuckDB file)
+        "backend": os.getenv("SNOWFLAKE_BACKEND", "snowflake"),
+        # Database file of the duckdb backend (":memory:" for a throwaway database)
+        "duckdb_path": os.getenv("DUCKDB_PATH", ".etl_state/warehouse.duckdb"),
+        # Connection pool shared by all loaders
+        "pool_size": int(os.getenv("SNOWFLAKE_POOL_SIZE", "4")),
+        "pool_validate_after": float(os.getenv("SNOWFLAKE_POOL_VALIDATE_AFTER", "60")),
+        "keep_alive": os.getenv("SNOWFLAKE_KEEP_ALIVE", "true").lower() == "true",
+    },
+    "slack_webhook": os.getenv("SLACK_WEBHOOK_URL"),
+    "slack": {
+        # Seconds to wait for the webhook to connect / answer, and retries after a failure
+        "timeout": float(os.getenv("SLACK_TIMEOUT", "5")),
+        "max_retries": int(os.getenv("SLACK_MAX_RETRIES", "3")),
+        # Undelivered messages kept in memory (the oldest is dropped beyond that)
+        "queue_size": int(os.getenv("SLACK_QUEUE_SIZE", "100")),
+        # Messages arriving within this many seconds are sent as one digest
+        "coalesce_seconds": float(os.getenv("SLACK_COALESCE_SECONDS", "2")),
+        # Maximum seconds the end of a run waits for queued messages to be delivered
+        "shutdown_timeout": float(os.getenv("SLACK_SHUTDOWN_TIMEOUT", "10")),
+    },
+    "load": {
+        # Temporary staging file format: "csv", "csv_zstd" or "parquet"
+        "staging_format": os.getenv("STAGING_FORMAT", "csv"),
+        # Keep a local index of the keys loaded into each RAW table, so rows with
+        # new keys are COPied straight into the table instead of being MERGEd
+        "key_index": os.getenv("KEY_INDEX", "false").lower() == "true",
+        "key_index_dir": os.getenv("KEY_INDEX_DIR", ".etl_state/key_index"),
+    },
+    "extract": {
+        # Source of each entity: a CSV file, a directory of daily drop files,
+        # a glob pattern, or several of those separated by commas
+        "sources": {
+            "claims": os.getenv("CLAIMS_SOURCE", "data/claims.csv"),
+            "policies": os.getenv("POLICIES_SOURCE", "data/policies.csv"),
+            "customers": os.getenv("CUSTOMERS_SOURCE", "data/customers.csv"),
+            "agents": os.getenv("AGENTS_SOURCE", "data/agents.csv"),
+            "payments": os.getenv("PAYMENTS_SOURCE", "data/payments.csv"),
+        },
+        # Processes reading the files of a multi-file source concurrently
+        "max_workers": int(os.getenv("EXTRACT_MAX_WORKERS", "4")),
+    },
+    "incremental": {
+        # Only extract rows appended since the last successful load
+        "enabled": os.getenv("INCREMENTAL_EXTRACT", "true").lower() == "true",
+        # Per-source-file fingerprints and processed offsets
+        "state_path": os.getenv("EXTRACT_STATE_PATH", ".etl_state/extract_state.json"),
+    },
+    "checkpoint": {
+        # Keep each entity's extract and transform output per run, so a failed
+        # run can be resumed (main.py --resume) without reading its sources
+        # again. Off by default: every run then writes a compressed copy of its data
+        "enabled": os.getenv("CHECKPOINTS", "false").lower() == "true",
+        "dir": os.getenv("CHECKPOINT_DIR", ".etl_state/checkpoints"),
+    },
+    "integrity": {
+        # Orphan foreign keys found before load: "off", "warn" (report, load
+        # anyway) or "quarantine" (report, write to quarantine_dir, skip loading).
+        # Off by default: a check makes the referencing entities wait for the
+        # entities they reference, so the entities no longer prepare in parallel
+        "mode": os.getenv("REFERENCE_CHECK", "off"),
+        "quarantine_dir": os.getenv("QUARANTINE_DIR", "quarantine"),
+    },
+    "logging": {
+        # Records below this level are dropped before any formatting
+        "level": os.getenv("LOG_LEVEL", "INFO"),
+        # "text" (human-readable) or "json" (one object per line)
+        "format": os.getenv("LOG_FORMAT", "text"),
+    },
+    "metrics": {
+        # JSON run reports (one file per run)
+        "report_dir": os.getenv("METRICS_REPORT_DIR", "reports"),
+        # Prometheus node_exporter textfile-collector file (empty to disable)
+        "textfile_path": os.getenv("METRICS_TEXTFILE_PATH", "reports/insurance_etl.prom"),
+    },
+    "pipeline": {
+        # Number of entity pipelines allowed to run at the same time
+        "max_workers": int(os.getenv("PIPELINE_MAX_WORKERS", "5")),
+        # "thread" or "process"
+        "executor": os.getenv("PIPELINE_EXECUTOR", "thread"),
+        # Transform engine: "pandas", or "arrow" / "polars" to keep the data in
+        # pyarrow Tables from extract to staged file (transformed with
+        # pyarrow.compute or with multi-threaded lazy Polars plans)
+        "engine": os.getenv("PIPELINE_ENGINE", "pandas"),
+        # Rows per chunk when streaming sources; 0 reads each file in one go
+        "chunksize": int(os.getenv("PIPELINE_CHUNKSIZE", "0")),
+        # Cross-chunk key dedup when streaming: "exact" keeps every key hash and
+        # value in memory (~16 bytes/key plus the key's length) and compares
+        # values on hash matches; "bloom" keeps a Bloom filter in memory and
+        # spills the key hashes to disk (~1.5 bytes/expected key in memory),
+        # exact up to 64-bit hash collisions
+        "dedup": os.getenv("PIPELINE_DEDUP", "exact"),
+        # Distinct keys per entity the Bloom filter is sized for
+        "dedup_expected_keys": int(os.getenv("PIPELINE_DEDUP_EXPECTED_KEYS", "10000000")),
     },
-    "slack_webhook": os.getenv("SLACK_WEBHOOK_URL")
 }
\ No newline at end of file
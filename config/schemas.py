@@ -0,0 +1,236 @@
+import re
+from dataclasses import dataclass, field
+
+# In-memory dtypes used by the registry:
+#   "str"       free text / identifiers
+#   "category"  low-cardinality text (stored once per distinct value)
+#   "float64"   amounts (kept at full precision; NUMBER(12,2) does not fit in float32)
+#   "datetime"  dates parsed with the column's date_format (or a format inferred
+#               from a sample when the data does not match it)
+
+# Content hash of the registered columns, added by the transform stage and
+# compared by the loaders' MERGE so unchanged rows are not rewritten
+ROW_HASH_COLUMN = "ROW_HASH"
+
+
+@dataclass(frozen=True)
+class ColumnSpec:
+    """
+    Declarative description of a single entity column.
+
+    Args:
+        name (str): Normalized (upper-case) column name.
+        snowflake_type (str): Column type in the Snowflake RAW table.
+        dtype (str): In-memory dtype after extraction/transformation.
+        date_format (str | None): strptime format for "datetime" columns.
+    """
+    name: str
+    snowflake_type: str
+    dtype: str = "str"
+    date_format: str | None = None
+
+    @property
+    def copy_cast(self) -> str:
+        """Type used to cast staged values in COPY INTO (VARCHAR lengths are dropped)."""
+        return re.sub(r"^VARCHAR\(\d+\)$", "VARCHAR", self.snowflake_type)
+
+
+@dataclass(frozen=True)
+class EntitySchema:
+    """
+    Declarative schema of an entity shared by the extract, transform and load stages.
+
+    Args:
+        name (str): Entity name, e.g. "claims".
+        target_table (str): Snowflake RAW table the entity is loaded into.
+        key (str): Business key used for deduplication and MERGE.
+        columns (tuple[ColumnSpec, ...]): Columns in load order.
+        aliases (dict[str, str]): Upper-cased source header -> normalized column name.
+        references (dict[str, str]): Foreign-key column -> entity whose key it holds,
+            checked before load (see transform/integrity.py).
+    """
+    name: str
+    target_table: str
+    key: str
+    columns: tuple[ColumnSpec, ...]
+    aliases: dict[str, str] = field(default_factory=dict)
+    references: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def column_names(self) -> list[str]:
+        return [c.name for c in self.columns]
+
+    @property
+    def categorical_columns(self) -> list[str]:
+        return [c.name for c in self.columns if c.dtype == "category"]
+
+    @property
+    def date_columns(self) -> list[str]:
+        return [c.name for c in self.columns if c.dtype == "datetime"]
+
+    def column(self, name: str) -> ColumnSpec:
+        return next(c for c in self.columns if c.name == name)
+
+    def read_dtypes(self) -> dict[str, str]:
+        """
+        Dtypes to request from the CSV reader so text columns skip type inference.
+        Dates are read as text and parsed by the transform stage; numeric columns
+        are left to the reader and coerced by the transform stage, so a stray
+        non-numeric value does not fail the whole file.
+        """
+        return {
+            c.name: ("str" if c.dtype == "datetime" else c.dtype)
+            for c in self.columns if c.dtype != "float64"
+        }
+
+
+SCHEMAS = {
+    "claims": EntitySchema(
+        name="claims",
+        target_table="RAW_CLAIM",
+        key="CLAIM_ID",
+        columns=(
+            ColumnSpec("CLAIM_ID", "VARCHAR(10)"),
+            ColumnSpec("POLICY_ID", "VARCHAR(10)"),
+            ColumnSpec("CUSTOMER_ID", "VARCHAR(10)"),
+            ColumnSpec("CLAIM_AMOUNT", "NUMBER(12,2)", "float64"),
+            ColumnSpec("CLAIM_DATE", "DATE", "datetime", "%Y-%m-%d"),
+            ColumnSpec("INCIDENT_DATE", "DATE", "datetime", "%Y-%m-%d"),
+            ColumnSpec("CLAIM_TYPE", "VARCHAR(25)", "category"),
+            ColumnSpec("STATUS", "VARCHAR(25)", "category"),
+            ColumnSpec("ADJUSTER_NOTES", "VARCHAR(1000)"),
+        ),
+        aliases={
+            "CLAIMID": "CLAIM_ID",
+            "CLAIM_NUMBER": "CLAIM_ID",
+            "CLMID": "CLAIM_ID",
+            "ID": "CLAIM_ID",
+            "POLICYID": "POLICY_ID",
+            "CUSTOMERID": "CUSTOMER_ID",
+            "CLAIMAMOUNT": "CLAIM_AMOUNT",
+            "CLAIMDATE": "CLAIM_DATE",
+            "INCIDENTDATE": "INCIDENT_DATE",
+            "CLAIMTYPE": "CLAIM_TYPE",
+            "ADJUSTERNOTES": "ADJUSTER_NOTES",
+        },
+        references={"POLICY_ID": "policies", "CUSTOMER_ID": "customers"},
+    ),
+    "policies": EntitySchema(
+        name="policies",
+        target_table="RAW_POLICY",
+        key="POLICY_ID",
+        columns=(
+            ColumnSpec("POLICY_ID", "VARCHAR(10)"),
+            ColumnSpec("CUSTOMER_ID", "VARCHAR(10)"),
+            ColumnSpec("POLICY_TYPE", "VARCHAR(25)", "category"),
+            ColumnSpec("EFFECTIVE_DATE", "DATE", "datetime", "%Y-%m-%d"),
+            ColumnSpec("EXPIRATION_DATE", "DATE", "datetime", "%Y-%m-%d"),
+            ColumnSpec("PREMIUM_AMOUNT", "NUMBER(12,2)", "float64"),
+            ColumnSpec("STATUS", "VARCHAR(25)", "category"),
+            ColumnSpec("AGENT_ID", "VARCHAR(10)"),
+        ),
+        aliases={
+            "POLICYID": "POLICY_ID",
+            "POLID": "POLICY_ID",
+            "ID": "POLICY_ID",
+            "CUSTOMERID": "CUSTOMER_ID",
+            "POLICYTYPE": "POLICY_TYPE",
+            "EFFECTIVEDATE": "EFFECTIVE_DATE",
+            "EXPIRATIONDATE": "EXPIRATION_DATE",
+            "PREMIUMAMOUNT": "PREMIUM_AMOUNT",
+            "AGENTID": "AGENT_ID",
+        },
+        references={"CUSTOMER_ID": "customers", "AGENT_ID": "agents"},
+    ),
+    "customers": EntitySchema(
+        name="customers",
+        target_table="RAW_CUSTOMER",
+        key="CUSTOMER_ID",
+        columns=(
+            ColumnSpec("CUSTOMER_ID", "VARCHAR(12)"),
+            ColumnSpec("FIRST_NAME", "VARCHAR(50)"),
+            ColumnSpec("LAST_NAME", "VARCHAR(50)"),
+            ColumnSpec("DATE_OF_BIRTH", "DATE", "datetime", "%Y-%m-%d"),
+            ColumnSpec("GENDER", "VARCHAR(1)", "category"),
+            ColumnSpec("EMAIL", "VARCHAR(255)"),
+            ColumnSpec("PHONE", "VARCHAR(20)"),
+            ColumnSpec("ADDRESS", "VARCHAR(100)"),
+            ColumnSpec("CITY", "VARCHAR(50)", "category"),
+            ColumnSpec("STATE", "VARCHAR(2)", "category"),
+            ColumnSpec("ZIP_CODE", "VARCHAR(5)"),
+        ),
+        aliases={
+            "CUSTOMERID": "CUSTOMER_ID",
+            "CUST_ID": "CUSTOMER_ID",
+            "ID": "CUSTOMER_ID",
+            "FIRSTNAME": "FIRST_NAME",
+            "LASTNAME": "LAST_NAME",
+            "DATEOFBIRTH": "DATE_OF_BIRTH",
+            "EMAILADDRESS": "EMAIL",
+            "PHONENUMBER": "PHONE",
+            "ZIP": "ZIP_CODE",
+        },
+    ),
+    "agents": EntitySchema(
+        name="agents",
+        target_table="RAW_AGENT",
+        key="AGENT_ID",
+        columns=(
+            ColumnSpec("AGENT_ID", "VARCHAR(12)"),
+            ColumnSpec("FIRST_NAME", "VARCHAR(50)"),
+            ColumnSpec("LAST_NAME", "VARCHAR(50)"),
+            ColumnSpec("EMAIL", "VARCHAR(255)"),
+            ColumnSpec("PHONE", "VARCHAR(20)"),
+            ColumnSpec("AGENCY_NAME", "VARCHAR(100)", "category"),
+        ),
+        aliases={
+            "AGENTID": "AGENT_ID",
+            "AGNTID": "AGENT_ID",
+            "ID": "AGENT_ID",
+            "FIRSTNAME": "FIRST_NAME",
+            "LASTNAME": "LAST_NAME",
+            "AGENTEMAIL": "EMAIL",
+            "AGENTPHONE": "PHONE",
+            "AGENCYNAME": "AGENCY_NAME",
+        },
+    ),
+    "payments": EntitySchema(
+        name="payments",
+        target_table="RAW_PAYMENT",
+        key="PAYMENT_ID",
+        columns=(
+            ColumnSpec("PAYMENT_ID", "VARCHAR(12)"),
+            ColumnSpec("POLICY_ID", "VARCHAR(12)"),
+            ColumnSpec("PAYMENT_DATE", "DATE", "datetime", "%Y-%m-%d"),
+            ColumnSpec("PAYMENT_AMOUNT", "NUMBER(12,2)", "float64"),
+            ColumnSpec("PAYMENT_METHOD", "VARCHAR(25)", "category"),
+            ColumnSpec("STATUS", "VARCHAR(25)", "category"),
+        ),
+        aliases={
+            "PAYMENTID": "PAYMENT_ID",
+            "PAY_ID": "PAYMENT_ID",
+            "ID": "PAYMENT_ID",
+            "POLICYID": "POLICY_ID",
+            "PAYMENTDATE": "PAYMENT_DATE",
+            "PAYMENTAMOUNT": "PAYMENT_AMOUNT",
+            "PAYMENTMETHOD": "PAYMENT_METHOD",
+        },
+        references={"POLICY_ID": "policies"},
+    ),
+}
+
+
+def get_schema(entity: str) -> EntitySchema:
+    """
+    Look up the registered schema of an entity.
+
+    Args:
+        entity (str): Entity name, e.g. "claims".
+
+    Returns:
+        EntitySchema: The entity's schema.
+    """
+    try:
+        return SCHEMAS[entity]
+    except KeyError:
+        raise ValueError(f"❌ Unknown entity '{entity}'. Known entities: {sorted(SCHEMAS)}") from None
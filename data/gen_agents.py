@@ -1,6 +1,45 @@
+import numpy as np
 import pandas as pd
-import random
-import hashlib
+
+from gen_utils import keyed_choice, keyed_int, write_csv
+
+# Pools for synthetic data
+FIRST_NAMES = ["John", "Jane", "Michael", "Sarah", "David", "Emily", "Robert", "Laura"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Miller", "Davis", "Garcia"]
+AGENCY_NAMES = ["Prime Insurance", "SecureLife", "TrustGuard", "Shield Insurance", "SafeFuture"]
+
+
+def build_agents(agent_ids, seed: int = 0) -> pd.DataFrame:
+    """
+    Build deterministic agent attributes: each AGENT_ID always maps to the
+    same row (attributes are keyed on the ID, see gen_utils.keyed_uniform).
+
+    Args:
+        agent_ids: Agent IDs, one row each.
+        seed (int): Dataset seed.
+
+    Returns:
+        pd.DataFrame: Agents with the columns of agents.csv.
+    """
+    ids = np.asarray(agent_ids, dtype="object")
+
+    def number(low, high, salt):
+        return pd.Series(keyed_int(ids, low, high, seed, salt), dtype="int64").astype(str)
+
+    fn = pd.Series(keyed_choice(ids, FIRST_NAMES, seed, "first_name"), dtype="object")
+    ln = pd.Series(keyed_choice(ids, LAST_NAMES, seed, "last_name"), dtype="object")
+    email = fn.str.lower() + "." + ln.str.lower() + "@agency.com"
+    phone = number(200, 999, "phone_area") + "-" + number(200, 999, "phone_prefix") + "-" + number(1000, 9999, "phone_line")
+
+    return pd.DataFrame({
+        "AGENT_ID": ids,
+        "FIRST_NAME": fn.to_numpy(),
+        "LAST_NAME": ln.to_numpy(),
+        "EMAIL": email.to_numpy(dtype="object"),
+        "PHONE": phone.to_numpy(dtype="object"),
+        "AGENCY_NAME": keyed_choice(ids, AGENCY_NAMES, seed, "agency_name"),
+    })
+
 
 def generate_agents(policies_csv, output_csv="agents.csv"):
     """
@@ -11,8 +50,8 @@ def generate_agents(policies_csv, output_csv="agents.csv"):
         policies_csv (str): Path to the policies.csv file containing AGENT_ID.
         output_csv (str): Path where agents.csv will be written.
     """
-    # Load policies
-    df_policies = pd.read_csv(policies_csv)
+    # Load policies (only the agent column is needed)
+    df_policies = pd.read_csv(policies_csv, dtype=str, usecols=lambda c: c == "AGENT_ID")
 
     # Ensure AGENT_ID exists
     if "AGENT_ID" not in df_policies.columns:
@@ -21,37 +60,10 @@ def generate_agents(policies_csv, output_csv="agents.csv"):
     # Unique agent IDs
     agent_ids = df_policies["AGENT_ID"].dropna().unique()
 
-    # Pools for synthetic data
-    first_names = ["John", "Jane", "Michael", "Sarah", "David", "Emily", "Robert", "Laura"]
-    last_names = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Miller", "Davis", "Garcia"]
-    agency_names = ["Prime Insurance", "SecureLife", "TrustGuard", "Shield Insurance", "SafeFuture"]
-
-    # Build agent table
-    agents = []
-    for agent_id in agent_ids:
-        # Deterministic seed based on agent_id
-        seed = int(hashlib.sha256(str(agent_id).encode()).hexdigest(), 16) % (10**8)
-        random.seed(seed)
-
-        fn = random.choice(first_names)
-        ln = random.choice(last_names)
-        email = f"{fn.lower()}.{ln.lower()}@agency.com"
-        phone = f"{random.randint(200,999)}-{random.randint(200,999)}-{random.randint(1000,9999)}"
-        agency = random.choice(agency_names)
-
-        agents.append({
-            "AGENT_ID": agent_id,
-            "FIRST_NAME": fn,
-            "LAST_NAME": ln,
-            "EMAIL": email,
-            "PHONE": phone,
-            "AGENCY_NAME": agency
-        })
-
-    df_agents = pd.DataFrame(agents)
+    df_agents = build_agents(agent_ids)
 
     # Save output to CSV
-    df_agents.to_csv(output_csv, index=False)
+    write_csv(df_agents, output_csv)
     print(df_agents.head(10))
     print(f"✅ Agent synthetic data saved to {output_csv}")
 
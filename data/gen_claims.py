@@ -1,9 +1,98 @@
+import numpy as np
 import pandas as pd
-import random
-from datetime import datetime, timedelta
-import csv
 
-def generate_synthetic_claims(csv_path: str, num_new_claims: int = 220, duplicate_rate: float = 0.05, validate: bool = True):
+from gen_utils import duplicate_rows, format_dates, format_ids, skewed_indices, write_csv
+
+CLAIM_COLUMNS = [
+    "claim_id", "policy_id", "customer_id", "claim_amount", "claim_date",
+    "incident_date", "claim_type", "status", "adjuster_notes",
+]
+CLAIM_TYPES = ["Auto", "Home", "Health"]
+STATUSES = ["Approved", "Pending", "Denied"]
+NOTES_SAMPLES = [
+    "Minor damages, covered in full.",
+    "Investigation ongoing.",
+    "Routine procedure approved.",
+    "Claim exceeds policy limits.",
+    "Urgent care visit reimbursed.",
+    "Repair estimate pending.",
+    "Police report submitted.",
+    "Flood damage documented.",
+    "Out-of-network provider denied.",
+    "Customer reported accident."
+]
+
+
+def build_claims(
+    first_claim_num: int,
+    num_claims: int,
+    rng: np.random.Generator,
+    policy_ids: np.ndarray,
+    customer_ids: np.ndarray,
+    duplicate_rate: float = 0.05,
+    policy_skew: float = 0.0,
+    customer_skew: float = 0.0,
+    policy_customers: np.ndarray | None = None,
+) -> pd.DataFrame:
+    """
+    Build a block of synthetic claims with NumPy (no per-row Python).
+
+    Args:
+        first_claim_num (int): Number of the first claim ID (CLM<number>).
+        num_claims (int): Rows to generate (duplicates included).
+        rng (np.random.Generator): Seeded generator for this block.
+        policy_ids (np.ndarray): Pool of existing policy IDs.
+        customer_ids (np.ndarray): Pool of existing customer IDs.
+        duplicate_rate (float): Fraction of rows that repeat an earlier claim.
+        policy_skew (float): Zipf-like skew of policy picks (0 = uniform, see skewed_indices).
+        customer_skew (float): Same for customer picks (ignored with policy_customers).
+        policy_customers (np.ndarray | None): Customer of each policy in policy_ids;
+            when given, a claim's customer is the customer of its policy.
+
+    Returns:
+        pd.DataFrame: Claims with the columns of claims.csv.
+    """
+    n = num_claims
+    policy_idx = skewed_indices(rng, n, len(policy_ids), policy_skew)
+    if policy_customers is not None:
+        customers = np.asarray(policy_customers, dtype="object")[policy_idx]
+    else:
+        customers = np.asarray(customer_ids, dtype="object")[skewed_indices(rng, n, len(customer_ids), customer_skew)]
+
+    status = np.asarray(STATUSES, dtype="object")[rng.integers(0, len(STATUSES), n)]
+    amount = np.round(rng.uniform(100.0, 50000.0, n), 2)
+    amount[status == "Denied"] = 0.0
+
+    # Incident in 2023 (day 1-28 of a random month); claim 0-5 days later
+    incident = (
+        np.datetime64("2023-01", "M") + rng.integers(0, 12, n)
+    ).astype("datetime64[D]") + rng.integers(0, 28, n)
+    claim = incident + rng.integers(0, 6, n)
+
+    df = pd.DataFrame({
+        "claim_id": format_ids("CLM", np.arange(first_claim_num, first_claim_num + n), width=3),
+        "policy_id": np.asarray(policy_ids, dtype="object")[policy_idx],
+        "customer_id": customers,
+        "claim_amount": amount,
+        "claim_date": format_dates(claim),
+        "incident_date": format_dates(incident),
+        "claim_type": np.asarray(CLAIM_TYPES, dtype="object")[rng.integers(0, len(CLAIM_TYPES), n)],
+        "status": status,
+        "adjuster_notes": np.asarray(NOTES_SAMPLES, dtype="object")[rng.integers(0, len(NOTES_SAMPLES), n)],
+    })
+    # Introduce some duplicates
+    return df.iloc[duplicate_rows(rng, n, duplicate_rate)].reset_index(drop=True)
+
+
+def generate_synthetic_claims(
+    csv_path: str,
+    num_new_claims: int = 220,
+    duplicate_rate: float = 0.05,
+    validate: bool = True,
+    seed: int | None = None,
+    policy_skew: float = 0.0,
+    customer_skew: float = 0.0,
+):
     """
     Generates synthetic claims and appends them to an existing CSV.
 
@@ -12,70 +101,27 @@ def generate_synthetic_claims(csv_path: str, num_new_claims: int = 220, duplicat
         num_new_claims (int): Number of new synthetic claims to generate.
         duplicate_rate (float): Fraction of claims to intentionally duplicate (~0.05 = 5%).
         validate (bool): If True, validates the CSV after appending for correct number of columns.
+        seed (int | None): Seed for reproducible output (random when omitted).
+        policy_skew (float): Zipf-like skew towards hot policies (0 = uniform).
+        customer_skew (float): Zipf-like skew towards hot customers (0 = uniform).
     """
-    # Read existing claims
-    df_existing = pd.read_csv(csv_path)
-
-    claim_types = ["Auto", "Home", "Health"]
-    statuses = ["Approved", "Pending", "Denied"]
-    notes_samples = [
-        "Minor damages, covered in full.",
-        "Investigation ongoing.",
-        "Routine procedure approved.",
-        "Claim exceeds policy limits.",
-        "Urgent care visit reimbursed.",
-        "Repair estimate pending.",
-        "Police report submitted.",
-        "Flood damage documented.",
-        "Out-of-network provider denied.",
-        "Customer reported accident."
-    ]
-
-    # Determine last claim number
-    last_claim_num = max(int(cid[3:]) for cid in df_existing['claim_id'].str.upper())
-
-    new_claims = []
-
-    for i in range(1, num_new_claims + 1):
-        claim_id = f"CLM{last_claim_num + i:03d}"
-
-        # Introduce some duplicates
-        if random.random() < duplicate_rate and len(new_claims) > 0:
-            duplicate_row = random.choice(new_claims)
-            new_claims.append(duplicate_row)
-            continue
-
-        policy_id = f"POL{random.randint(143, 400)}"
-        customer_id = f"CUST{random.randint(1021, 1500)}"
-        claim_type = random.choice(claim_types)
-        status = random.choice(statuses)
-        claim_amount = round(random.uniform(100.0, 50000.0), 2) if status != "Denied" else 0.00
-
-        # Random incident date in 2023
-        incident_date = datetime(2023, random.randint(1, 12), random.randint(1, 28))
-        # Claim date 0–5 days after incident
-        claim_date = incident_date + timedelta(days=random.randint(0, 5))
-
-        adjuster_notes = random.choice(notes_samples)
-
-        new_claims.append([
-            claim_id, policy_id, customer_id, claim_amount,
-            claim_date.strftime("%Y-%m-%d"),
-            incident_date.strftime("%Y-%m-%d"),
-            claim_type, status, adjuster_notes
-        ])
-
-    # Create DataFrame
-    df_new = pd.DataFrame(new_claims, columns=df_existing.columns)
+    # Only the IDs of the existing claims are needed to continue the numbering
+    existing_ids = pd.read_csv(csv_path, usecols=lambda c: c.strip().lower() == "claim_id", dtype=str).iloc[:, 0]
+    last_claim_num = int(existing_ids.str.upper().str[3:].astype(int).max())
+
+    df_new = build_claims(
+        last_claim_num + 1,
+        num_new_claims,
+        np.random.default_rng(seed),
+        policy_ids=format_ids("POL", np.arange(143, 401)),
+        customer_ids=format_ids("CUST", np.arange(1021, 1501)),
+        duplicate_rate=duplicate_rate,
+        policy_skew=policy_skew,
+        customer_skew=customer_skew,
+    )
 
     # Append to CSV with quoting to handle commas in text fields
-    df_new.to_csv(
-        csv_path,
-        mode='a',
-        header=False,
-        index=False,
-        quoting=csv.QUOTE_ALL
-    )
+    write_csv(df_new, csv_path, append=True, quote_all=True)
 
     print(df_new.head(10))
     print(f"✅ Added {len(df_new)} synthetic claims to {csv_path}")
@@ -84,9 +130,11 @@ def generate_synthetic_claims(csv_path: str, num_new_claims: int = 220, duplicat
     if validate:
         with open(csv_path, 'r', encoding='utf-8') as f:
             for i, line in enumerate(f, 1):
-                if len(line.strip().split(',')) != len(df_existing.columns):
+                if len(line.strip().split(',')) != len(CLAIM_COLUMNS):
                     print(f"⚠️ Row {i} has wrong number of columns: {line.strip()}")
 
+    return df_new
+
 # Generate synthetic claims data (if needed)
 if __name__ == "__main__":
     df = generate_synthetic_claims("data/claims.csv", num_new_claims=200, duplicate_rate=0.05)
@@ -1,70 +1,85 @@
-import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import random
+import pandas as pd
+
+from gen_utils import format_dates, keyed_choice, keyed_int, write_csv
+
+# Name pools
+FIRST_NAMES = ["James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda", "William", "Elizabeth"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Martinez", "Hernandez"]
+
+# State abbreviations
+STATES = ["CA", "TX", "NY", "FL", "IL", "PA", "OH", "MI", "GA", "NC"]
+STREETS = ["Main St", "Oak St", "Pine Ave", "Maple Rd", "Cedar Blvd"]
+CITIES = ["Sacramento", "Austin", "New York", "Miami", "Chicago", "Philadelphia", "Columbus", "Detroit", "Atlanta", "Charlotte"]
+
+
+def _digits(values: np.ndarray) -> pd.Series:
+    return pd.Series(values, dtype="int64").astype(str)
+
+
+def build_customers(customer_ids, seed: int = 42) -> pd.DataFrame:
+    """
+    Build synthetic customer attributes for the given customer IDs.
+
+    Attributes are keyed on CUSTOMER_ID (see gen_utils.keyed_uniform), so a
+    customer gets the same row whichever shard or process generates it.
+
+    Args:
+        customer_ids: Customer IDs, one row each.
+        seed (int): Dataset seed.
+
+    Returns:
+        pd.DataFrame: Customers with the columns of customers.csv.
+    """
+    ids = np.asarray(customer_ids, dtype="object")
+
+    def number(low, high, salt):
+        return _digits(keyed_int(ids, low, high, seed, salt))
+
+    first = pd.Series(keyed_choice(ids, FIRST_NAMES, seed, "first_name"), dtype="object")
+    last = pd.Series(keyed_choice(ids, LAST_NAMES, seed, "last_name"), dtype="object")
+
+    # Random DOB between 1940 and 2002
+    start, end = np.datetime64("1940-01-01", "D"), np.datetime64("2002-12-31", "D")
+    dob = start + keyed_int(ids, 0, int((end - start).astype(int)), seed, "date_of_birth")
+
+    email = first.str.lower() + "." + last.str.lower() + number(100, 999, "email") + "@example.com"
+    phone = "(" + number(200, 999, "phone_area") + ")-" + number(200, 999, "phone_prefix") + "-" + number(1000, 9999, "phone_line")
+    address = number(100, 9999, "street_number") + " " + pd.Series(keyed_choice(ids, STREETS, seed, "street"), dtype="object")
+
+    return pd.DataFrame({
+        "CUSTOMER_ID": ids,
+        "FIRST_NAME": first.to_numpy(),
+        "LAST_NAME": last.to_numpy(),
+        "DATE_OF_BIRTH": format_dates(dob),
+        "GENDER": keyed_choice(ids, ["M", "F"], seed, "gender"),
+        "EMAIL": email.to_numpy(dtype="object"),
+        "PHONE": phone.to_numpy(dtype="object"),
+        "ADDRESS": address.to_numpy(dtype="object"),
+        "CITY": keyed_choice(ids, CITIES, seed, "city"),
+        "STATE": keyed_choice(ids, STATES, seed, "state"),
+        "ZIP_CODE": number(10000, 99999, "zip_code").to_numpy(dtype="object"),
+    })
+
 
 def generate_customer_data(claims_csv: str, output_csv: str = "customers.csv", seed: int = 42):
     """
     Generate synthetic customer data based on claims file without external libraries.
     """
-    np.random.seed(seed)
-    random.seed(seed)
-
-    # Load claims
-    claims_df = pd.read_csv(claims_csv)
+    # Only the customer IDs of the claims are needed
+    claims_df = pd.read_csv(claims_csv, dtype=str, usecols=lambda c: c.strip().upper() == "CUSTOMER_ID")
     claims_df.columns = claims_df.columns.str.strip().str.upper()
 
     if "CUSTOMER_ID" not in claims_df.columns:
         raise ValueError("Claims CSV must contain CUSTOMER_ID column")
 
     # Extract unique customer IDs
-    unique_customers = claims_df[["CUSTOMER_ID"]].drop_duplicates()
-
-    # Name pools
-    first_names = ["James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda", "William", "Elizabeth"]
-    last_names = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Martinez", "Hernandez"]
-
-    # State abbreviations
-    states = ["CA", "TX", "NY", "FL", "IL", "PA", "OH", "MI", "GA", "NC"]
-
-    customers = []
-    for _, row in unique_customers.iterrows():
-        customer_id = row["CUSTOMER_ID"]
-
-        first = np.random.choice(first_names)
-        last = np.random.choice(last_names)
-
-        # Random DOB between 1940 and 2002
-        start_date = datetime(1940, 1, 1)
-        end_date = datetime(2002, 12, 31)
-        dob = start_date + timedelta(days=np.random.randint(0, (end_date - start_date).days))
-
-        gender = np.random.choice(["M", "F"])
-        email = f"{first.lower()}.{last.lower()}{np.random.randint(100,999)}@example.com"
-        phone = f"({np.random.randint(200,999)})-{np.random.randint(200,999)}-{np.random.randint(1000,9999)}"
-        address = f"{np.random.randint(100,9999)} {np.random.choice(['Main St','Oak St','Pine Ave','Maple Rd','Cedar Blvd'])}"
-        city = np.random.choice(["Sacramento","Austin","New York","Miami","Chicago","Philadelphia","Columbus","Detroit","Atlanta","Charlotte"])
-        state = np.random.choice(states)
-        zip_code = f"{np.random.randint(10000,99999)}"
-
-        customers.append({
-            "CUSTOMER_ID": customer_id,
-            "FIRST_NAME": first,
-            "LAST_NAME": last,
-            "DATE_OF_BIRTH": dob.date(),
-            "GENDER": gender,
-            "EMAIL": email,
-            "PHONE": phone,
-            "ADDRESS": address,
-            "CITY": city,
-            "STATE": state,
-            "ZIP_CODE": zip_code
-        })
-
-    customers_df = pd.DataFrame(customers)
+    unique_customers = claims_df["CUSTOMER_ID"].drop_duplicates()
+
+    customers_df = build_customers(unique_customers, seed)
 
     # Save to CSV
-    customers_df.to_csv(output_csv, index=False)
+    write_csv(customers_df, output_csv)
     print(customers_df.head(10))
     print(f"✅ Generated {len(customers_df)} customers -> {output_csv}")
 
@@ -0,0 +1,187 @@
+"""
+Sharded synthetic dataset generator for large (multi-GB) test fixtures.
+
+Writes claims, policies, customers, agents and payments that reference each
+other consistently (every claim's policy and customer, every policy's agent
+and every payment's policy exist) as <out>/<entity>/part-NNNNN.csv, with the
+work split across processes.
+
+Output only depends on --seed and the row counts, never on --shards or
+--processes: per-ID attributes are keyed on the ID (gen_utils.keyed_uniform)
+and claims are generated in fixed-size blocks, each with its own seeded RNG.
+
+Example:
+    python data/gen_dataset.py --out /tmp/fixtures --claims 50m --shards 16 --processes 8 \
+        --policy-skew 1.0 --customer-skew 1.1
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from gen_agents import build_agents
+from gen_claims import build_claims
+from gen_customer import build_customers
+from gen_payments import build_payments
+from gen_policy import build_policies
+from gen_utils import format_ids, shard_bounds, skewed_indices, write_csv
+
+ENTITIES = ("customers", "agents", "policies", "payments", "claims")
+
+# Rows generated (and held in memory) at a time; also the unit claims RNGs are seeded on
+BLOCK_ROWS = 250_000
+
+SIZE_SUFFIXES = {"k": 1_000, "m": 1_000_000, "b": 1_000_000_000}
+
+
+def parse_count(value: str) -> int:
+    """
+    Parse a row count such as "10k", "50m" or "2500".
+    """
+    value = value.strip().lower()
+    if value[-1:] in SIZE_SUFFIXES:
+        return int(float(value[:-1]) * SIZE_SUFFIXES[value[-1]])
+    return int(value)
+
+
+def customer_pool(args) -> np.ndarray:
+    return format_ids("CUST", np.arange(1, args.customers + 1))
+
+
+def policy_pool(args) -> np.ndarray:
+    return format_ids("POL", np.arange(1, args.policies + 1))
+
+
+def agent_pool(args) -> np.ndarray:
+    return format_ids("AGENT_", np.arange(1, args.agents + 1))
+
+
+def policy_customers(args) -> np.ndarray:
+    """
+    Customer of every policy in the policy pool. Hot customers (customer skew)
+    hold many policies, and through them receive many claims.
+    """
+    rng = np.random.default_rng([args.seed, 0])
+    return customer_pool(args)[skewed_indices(rng, args.policies, args.customers, args.customer_skew)]
+
+
+def _blocks(start: int, end: int):
+    for block_start in range(start, end, BLOCK_ROWS):
+        yield block_start, min(block_start + BLOCK_ROWS, end)
+
+
+def generate_shard(entity: str, shard: int, args) -> int:
+    """
+    Generate one shard of one entity and write it to <out>/<entity>/part-<shard>.csv.
+
+    Args:
+        entity (str): One of ENTITIES.
+        shard (int): Shard number in [0, args.shards).
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        int: Rows written.
+    """
+    path = os.path.join(args.out, entity, f"part-{shard:05d}.csv")
+    rows = 0
+
+    def write(df):
+        nonlocal rows
+        write_csv(df, path, append=rows > 0, quote_all=entity == "claims")
+        rows += len(df)
+
+    if entity == "claims":
+        # Whole blocks per shard, so the blocks (and their RNG seeds) do not depend on --shards
+        total_blocks = -(-args.claims // BLOCK_ROWS)
+        first, last = shard_bounds(total_blocks, args.shards, shard)
+        policies, customers = policy_pool(args), policy_customers(args)
+        for block in range(first, last):
+            start, end = block * BLOCK_ROWS, min((block + 1) * BLOCK_ROWS, args.claims)
+            write(build_claims(
+                start + 1, end - start, np.random.default_rng([args.seed, 1, block]),
+                policy_ids=policies, customer_ids=customers,
+                duplicate_rate=args.duplicate_rate, policy_skew=args.policy_skew,
+                policy_customers=customers,
+            ))
+    else:
+        total = {
+            "customers": args.customers, "agents": args.agents,
+            "policies": args.policies, "payments": args.policies,
+        }[entity]
+        start, end = shard_bounds(total, args.shards, shard)
+        if entity in ("policies", "payments"):
+            policies, customers, agents = policy_pool(args), policy_customers(args), agent_pool(args)
+        for block_start, block_end in _blocks(start, end):
+            if entity == "customers":
+                df = build_customers(customer_pool(args)[block_start:block_end], args.seed)
+            elif entity == "agents":
+                df = build_agents(agent_pool(args)[block_start:block_end], args.seed)
+            else:
+                df = build_policies(
+                    policies[block_start:block_end], customers[block_start:block_end], args.seed, agents
+                )
+                if entity == "payments":
+                    df = build_payments(df, args.seed)
+            write(df)
+
+    if rows == 0:
+        # Empty shard (more shards than blocks): still write the header
+        write_csv(_empty_frame(entity, args), path)
+    return rows
+
+
+def _empty_frame(entity: str, args):
+    one = argparse.Namespace(**{**vars(args), "claims": 1, "customers": 1, "agents": 1, "policies": 1})
+    if entity == "claims":
+        return build_claims(1, 1, np.random.default_rng(0), policy_pool(one), customer_pool(one)).iloc[:0]
+    if entity == "customers":
+        return build_customers(customer_pool(one)).iloc[:0]
+    if entity == "agents":
+        return build_agents(agent_pool(one)).iloc[:0]
+    df = build_policies(policy_pool(one), customer_pool(one), args.seed, agent_pool(one))
+    return (build_payments(df) if entity == "payments" else df).iloc[:0]
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate a sharded synthetic insurance dataset.")
+    parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument("--claims", type=parse_count, default=parse_count("1m"), help="Claim rows, e.g. 50m (default: 1m)")
+    parser.add_argument("--policies", type=parse_count, help="Policies (default: claims / 4)")
+    parser.add_argument("--customers", type=parse_count, help="Customers (default: policies / 2)")
+    parser.add_argument("--agents", type=parse_count, default=900, help="Agents (default: %(default)s)")
+    parser.add_argument("--shards", type=int, default=1, help="Output files per entity (default: %(default)s)")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(), help="Worker processes (default: CPU count)")
+    parser.add_argument("--policy-skew", type=float, default=0.0, help="Zipf-like skew of claims towards hot policies (0 = uniform)")
+    parser.add_argument("--customer-skew", type=float, default=0.0, help="Zipf-like skew of policies towards hot customers (0 = uniform)")
+    parser.add_argument("--duplicate-rate", type=float, default=0.05, help="Fraction of duplicated claims (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=42, help="Dataset seed (default: %(default)s)")
+    parser.add_argument("--entities", default=",".join(ENTITIES), help="Comma-separated entities to generate (default: all)")
+    args = parser.parse_args(argv)
+    args.policies = args.policies or max(1, args.claims // 4)
+    args.customers = args.customers or max(1, args.policies // 2)
+    return args
+
+
+def main(argv: list[str] | None = None):
+    args = parse_args(argv)
+    entities = [entity.strip() for entity in args.entities.split(",")]
+    for entity in entities:
+        os.makedirs(os.path.join(args.out, entity), exist_ok=True)
+
+    written = dict.fromkeys(entities, 0)
+    with ProcessPoolExecutor(max_workers=args.processes) as pool:
+        futures = {
+            pool.submit(generate_shard, entity, shard, args): entity
+            for entity in entities
+            for shard in range(args.shards)
+        }
+        for future in as_completed(futures):
+            written[futures[future]] += future.result()
+
+    for entity in entities:
+        print(f"✅ {entity}: {written[entity]} rows in {args.shards} file(s) -> {os.path.join(args.out, entity)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,64 @@
+import numpy as np
 import pandas as pd
-import random
-import hashlib
-from datetime import datetime, timedelta
+
+from gen_utils import format_dates, keyed_choice, write_csv
+
+# Define frequency by policy type
+FREQUENCY_MAP = {
+    "Auto": 12,        # Monthly
+    "Home": 4,         # Quarterly
+    "Health": 12,      # Monthly
+    "Life": 1,         # Annual
+    "Business": 4      # Quarterly
+}
+PAYMENT_METHODS = ["Credit Card", "Bank Transfer", "Check"]
+STATUSES = ["Completed", "Pending", "Failed"]
+
+
+def build_payments(df_policies: pd.DataFrame, seed: int = 0) -> pd.DataFrame:
+    """
+    Build the installments of every policy: `freq` payments evenly spaced
+    across 2024, with the frequency tied to POLICY_TYPE.
+
+    Payment details are keyed on POLICY_ID / PAYMENT_ID (see
+    gen_utils.keyed_uniform), so they are identical across shards and runs.
+
+    Args:
+        df_policies (pd.DataFrame): Policies with POLICY_ID, POLICY_TYPE and PREMIUM_AMOUNT.
+        seed (int): Dataset seed.
+
+    Returns:
+        pd.DataFrame: Payments with the columns of payments.csv.
+    """
+    policy_ids = df_policies["POLICY_ID"].to_numpy(dtype="object")
+    premium = pd.to_numeric(df_policies["PREMIUM_AMOUNT"]).to_numpy(dtype="float64")
+
+    # Default frequency if not in map
+    freq = df_policies["POLICY_TYPE"].map(FREQUENCY_MAP).to_numpy(dtype="float64", copy=True)
+    unmapped = np.isnan(freq)
+    freq[unmapped] = keyed_choice(policy_ids[unmapped], [1, 4, 12], seed, "frequency").astype("float64")
+    freq = freq.astype("int64")
+
+    # One row per installment: policy row repeated freq times, i = 0..freq-1
+    rows = np.repeat(np.arange(len(policy_ids)), freq)
+    starts = np.cumsum(freq) - freq
+    installment = np.arange(len(rows)) - np.repeat(starts, freq)
+
+    pids = pd.Series(policy_ids[rows], dtype="object")
+    payment_ids = ("PMT-" + pids + "-" + pd.Series(installment + 1).astype(str)).to_numpy(dtype="object")
+
+    # Generate payments evenly spaced across a year
+    payment_date = np.datetime64("2024-01-01", "D") + (365 // freq[rows]) * installment
+
+    return pd.DataFrame({
+        "PAYMENT_ID": payment_ids,
+        "POLICY_ID": pids.to_numpy(),
+        "PAYMENT_DATE": format_dates(payment_date),
+        "PAYMENT_AMOUNT": np.round(premium / freq, 2)[rows],
+        "PAYMENT_METHOD": keyed_choice(payment_ids, PAYMENT_METHODS, seed, "payment_method"),
+        "STATUS": keyed_choice(payment_ids, STATUSES, seed, "status"),
+    })
+
 
 def generate_payments(policies_csv, output_csv="payments.csv"):
     """
@@ -16,54 +73,15 @@ def generate_payments(policies_csv, output_csv="payments.csv"):
         pd.DataFrame: Payments dataframe.
     """
     # Load policies
-    df_policies = pd.read_csv(policies_csv)
+    df_policies = pd.read_csv(policies_csv, dtype={"POLICY_ID": str, "POLICY_TYPE": str})
 
     # Validation
     for col in ["POLICY_ID", "PREMIUM_AMOUNT", "POLICY_TYPE"]:
         if col not in df_policies.columns:
             raise ValueError(f"{col} column missing in policies file")
 
-    payments = []
-
-    # Define frequency by policy type
-    frequency_map = {
-        "Auto": 12,        # Monthly
-        "Home": 4,         # Quarterly
-        "Health": 12,      # Monthly
-        "Life": 1,         # Annual
-        "Business": 4      # Quarterly
-    }
-
-    for _, row in df_policies.iterrows():
-        policy_id = row["POLICY_ID"]
-        premium = row["PREMIUM_AMOUNT"]
-        policy_type = row["POLICY_TYPE"]
-
-        # Default frequency if not in map
-        freq = frequency_map.get(policy_type, random.choice([1, 4, 12]))
-        payment_amount = round(premium / freq, 2)
-
-        # Seed randomness on POLICY_ID for deterministic payment details
-        seed = int(hashlib.sha256(str(policy_id).encode()).hexdigest(), 16) % (10**8)
-        random.seed(seed)
-
-        # Generate payments evenly spaced across a year
-        start_date = datetime(2024, 1, 1)
-        for i in range(freq):
-            payment_id = f"PMT-{policy_id}-{i+1}"
-            payment_date = start_date + timedelta(days=(365 // freq) * i)
-
-            payments.append({
-                "PAYMENT_ID": payment_id,
-                "POLICY_ID": policy_id,
-                "PAYMENT_DATE": payment_date.date().isoformat(),
-                "PAYMENT_AMOUNT": payment_amount,
-                "PAYMENT_METHOD": random.choice(["Credit Card", "Bank Transfer", "Check"]),
-                "STATUS": random.choice(["Completed", "Pending", "Failed"])
-            })
-
-    df_payments = pd.DataFrame(payments)
-    df_payments.to_csv(output_csv, index=False)
+    df_payments = build_payments(df_policies)
+    write_csv(df_payments, output_csv)
 
     print(df_payments.head(10))
     print(f"✅ Payments table saved to {output_csv} with {len(df_payments)} rows")
@@ -72,4 +90,3 @@ def generate_payments(policies_csv, output_csv="payments.csv"):
 
 if __name__ == "__main__":
     df = generate_payments("policies.csv")
-    
\ No newline at end of file
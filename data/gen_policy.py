@@ -1,5 +1,44 @@
-import pandas as pd
 import numpy as np
+import pandas as pd
+
+from gen_utils import format_dates, format_ids, keyed_choice, keyed_int, keyed_uniform, write_csv
+
+POLICY_TYPES = ["Auto", "Home", "Life", "Health", "Commercial"]
+STATUSES = ["Active", "Expired", "Cancelled"]
+
+
+def build_policies(policy_ids, customer_ids, seed: int = 42, agent_ids=None) -> pd.DataFrame:
+    """
+    Build synthetic policy attributes for the given policy IDs.
+
+    Attributes are keyed on POLICY_ID (see gen_utils.keyed_uniform), so a
+    policy gets the same row whichever shard or process generates it.
+
+    Args:
+        policy_ids: Policy IDs, one row each.
+        customer_ids: Customer of each policy (same length as policy_ids).
+        seed (int): Dataset seed.
+        agent_ids: Optional pool of agent IDs to assign from (default: AGENT_100-AGENT_998).
+
+    Returns:
+        pd.DataFrame: Policies with the columns of policies.csv.
+    """
+    policy_ids = np.asarray(policy_ids, dtype="object")
+    if agent_ids is None:
+        agent_ids = format_ids("AGENT_", np.arange(100, 999))
+
+    effective = np.datetime64("2015-01-01", "D") + keyed_int(policy_ids, 0, 365 * 5, seed, "effective_date")
+    return pd.DataFrame({
+        "POLICY_ID": policy_ids,
+        "CUSTOMER_ID": np.asarray(customer_ids, dtype="object"),
+        "POLICY_TYPE": keyed_choice(policy_ids, POLICY_TYPES, seed, "policy_type"),
+        "EFFECTIVE_DATE": format_dates(effective),
+        "EXPIRATION_DATE": format_dates(effective + 365),
+        "PREMIUM_AMOUNT": np.round(500 + keyed_uniform(policy_ids, seed, "premium") * 4500, 2),
+        "STATUS": keyed_choice(policy_ids, STATUSES, seed, "status"),
+        "AGENT_ID": keyed_choice(policy_ids, agent_ids, seed, "agent_id"),
+    })
+
 
 def generate_policy_data(claims_csv: str, output_csv: str = "policies.csv", seed: int = 42):
     """
@@ -13,10 +52,11 @@ def generate_policy_data(claims_csv: str, output_csv: str = "policies.csv", seed
     Returns:
         pd.DataFrame: Generated policies DataFrame.
     """
-    np.random.seed(seed)
-
-    # Load claims
-    claims_df = pd.read_csv(claims_csv)
+    # Only the two key columns of the claims are needed
+    claims_df = pd.read_csv(
+        claims_csv, dtype=str,
+        usecols=lambda c: c.strip().upper() in ("POLICY_ID", "CUSTOMER_ID"),
+    )
 
     # Normalize column names
     claims_df.columns = claims_df.columns.str.strip().str.upper()
@@ -27,34 +67,10 @@ def generate_policy_data(claims_csv: str, output_csv: str = "policies.csv", seed
     # Extract unique policies
     unique_policies = claims_df[["POLICY_ID", "CUSTOMER_ID"]].drop_duplicates()
 
-    # Synthetic policy attributes
-    policy_types = ["Auto", "Home", "Life", "Health", "Commercial"]
-    statuses = ["Active", "Expired", "Cancelled"]
-
-    policies = []
-    for _, row in unique_policies.iterrows():
-        policy_id = row["POLICY_ID"]
-        customer_id = row["CUSTOMER_ID"]
-
-        effective_date = pd.Timestamp("2015-01-01") + pd.to_timedelta(np.random.randint(0, 365 * 5), unit="D")
-        expiration_date = effective_date + pd.to_timedelta(365, unit="D")
-
-        policy = {
-            "POLICY_ID": policy_id,
-            "CUSTOMER_ID": customer_id,
-            "POLICY_TYPE": np.random.choice(policy_types),
-            "EFFECTIVE_DATE": effective_date.date(),
-            "EXPIRATION_DATE": expiration_date.date(),
-            "PREMIUM_AMOUNT": round(np.random.uniform(500, 5000), 2),
-            "STATUS": np.random.choice(statuses),
-            "AGENT_ID": f"AGENT_{np.random.randint(100, 999)}"
-        }
-        policies.append(policy)
-
-    policies_df = pd.DataFrame(policies)
+    policies_df = build_policies(unique_policies["POLICY_ID"], unique_policies["CUSTOMER_ID"], seed)
 
     # Save to CSV
-    policies_df.to_csv(output_csv, index=False)
+    write_csv(policies_df, output_csv)
     print(policies_df.head(10))
     print(f"✅ Generated {len(policies_df)} policies -> {output_csv}")
 
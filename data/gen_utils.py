@@ -0,0 +1,118 @@
+import os
+import zlib
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+
+def keyed_uniform(keys, seed: int, salt: str) -> np.ndarray:
+    """
+    Deterministic pseudo-random floats in [0, 1), one per key.
+
+    The value only depends on (key, seed, salt), so an ID always gets the same
+    attributes no matter which file, shard or process generates it.
+
+    Args:
+        keys: Array-like of IDs.
+        seed (int): Dataset seed.
+        salt (str): Name of the attribute, so different attributes are independent.
+
+    Returns:
+        np.ndarray: float64 values in [0, 1).
+    """
+    hash_key = f"{seed & 0xFFFFFFFF:08x}{zlib.crc32(salt.encode()):08x}"
+    hashes = pd.util.hash_array(np.asarray(keys, dtype="object"), hash_key=hash_key, categorize=False)
+    return (hashes >> np.uint64(11)).astype("float64") * 2.0 ** -53
+
+
+def keyed_int(keys, low: int, high: int, seed: int, salt: str) -> np.ndarray:
+    """
+    Deterministic integers in [low, high), one per key.
+    """
+    return low + (keyed_uniform(keys, seed, salt) * (high - low)).astype("int64")
+
+
+def keyed_choice(keys, options, seed: int, salt: str) -> np.ndarray:
+    """
+    Deterministic pick from `options`, one per key.
+    """
+    options = np.asarray(options, dtype="object")
+    return options[keyed_int(keys, 0, len(options), seed, salt)]
+
+
+def skewed_indices(rng: np.random.Generator, n: int, pool_size: int, skew: float = 0.0) -> np.ndarray:
+    """
+    Draw `n` indices into a pool of `pool_size` keys.
+
+    With skew 0 every key is equally likely; with skew > 0 key i is drawn with
+    probability proportional to 1 / (i + 1) ** skew (Zipf-like), so the first
+    keys of the pool become hot keys (~1.0 is a realistic long tail).
+    """
+    if skew <= 0:
+        return rng.integers(0, pool_size, size=n)
+    weights = 1.0 / np.arange(1, pool_size + 1, dtype="float64") ** skew
+    return rng.choice(pool_size, size=n, p=weights / weights.sum())
+
+
+def duplicate_rows(rng: np.random.Generator, n: int, duplicate_rate: float) -> np.ndarray:
+    """
+    Row positions that turn ~duplicate_rate of `n` rows into copies of random
+    earlier rows, e.g. df.iloc[duplicate_rows(...)].
+
+    A duplicated row replaces the row at its position, so its original ID is
+    skipped (like the previous per-row generators did).
+    """
+    take = np.arange(n)
+    if n < 2 or duplicate_rate <= 0:
+        return take
+    is_duplicate = rng.random(n) < duplicate_rate
+    is_duplicate[0] = False
+    positions = np.flatnonzero(is_duplicate)
+    take[positions] = (rng.random(len(positions)) * positions).astype("int64")
+    # A copy of a copy must point at the original row that is actually kept
+    while True:
+        resolved = take[take]
+        if np.array_equal(resolved, take):
+            return take
+        take = resolved
+
+
+def format_ids(prefix: str, numbers: np.ndarray, width: int = 0) -> np.ndarray:
+    """
+    Vectorized IDs such as CLM001 from integers (zero-padded to `width` digits).
+    """
+    digits = pd.Series(numbers, dtype="int64").astype(str)
+    if width:
+        digits = digits.str.zfill(width)
+    return (prefix + digits).to_numpy(dtype="object")
+
+
+def format_dates(dates: np.ndarray) -> np.ndarray:
+    """
+    ISO date strings (YYYY-MM-DD) for an array of datetime64 values.
+    """
+    return np.asarray(dates).astype("datetime64[D]").astype(str).astype("object")
+
+
+def write_csv(df: pd.DataFrame, path: str, append: bool = False, quote_all: bool = False):
+    """
+    Write a DataFrame as CSV with pyarrow (much faster than DataFrame.to_csv
+    at multi-million-row volumes). With `append`, rows are added without a header.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    options = pa_csv.WriteOptions(
+        include_header=not append,
+        quoting_style="all_valid" if quote_all else "needed",
+    )
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with open(path, "ab" if append else "wb") as f:
+        pa_csv.write_csv(table, f, write_options=options)
+
+
+def shard_bounds(total: int, shards: int, shard: int) -> tuple[int, int]:
+    """
+    [start, end) of the rows that belong to one of `shards` equal shards.
+    """
+    return total * shard // shards, total * (shard + 1) // shards
@@ -1,15 +1,12 @@
-from .extract_utils import extract_from_csv
+from config.schemas import get_schema
+from .extract_utils import ByteRange, extract_csv_chunks, extract_from_csv, extract_table, extract_table_chunks
 
-def extract_agent(path: str):
-    required_cols = [
-        "AGENT_ID", "FIRST_NAME", "LAST_NAME", "EMAIL", "PHONE", "AGENCY_NAME"
-    ]
-    alias_map = {
-        "AGENTID": "AGENT_ID",
-        "FIRSTNAME": "FIRST_NAME",
-        "LASTNAME": "LAST_NAME",
-        "AGENTEMAIL": "EMAIL",
-        "AGENTPHONE": "PHONE",
-        "AGENCYNAME": "AGENCY_NAME",
-    }
-    return extract_from_csv(path, required_cols, alias_map)
\ No newline at end of file
+def extract_agent(
+    path: str | list[str], chunksize: int | None = None, byte_range: ByteRange | None = None, arrow: bool = False
+):
+    schema = get_schema("agents")
+    if chunksize:
+        stream = extract_table_chunks if arrow else extract_csv_chunks
+        return stream(path, schema.column_names, schema.aliases, chunksize, schema.read_dtypes(), byte_range)
+    read = extract_table if arrow else extract_from_csv
+    return read(path, schema.column_names, schema.aliases, schema.read_dtypes(), byte_range)
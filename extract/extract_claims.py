@@ -1,20 +1,12 @@
-from .extract_utils import extract_from_csv
+from config.schemas import get_schema
+from .extract_utils import ByteRange, extract_csv_chunks, extract_from_csv, extract_table, extract_table_chunks
 
-def extract_claims(path: str):
-    required_cols = [
-        "CLAIM_ID", "POLICY_ID", "CUSTOMER_ID", "CLAIM_AMOUNT",
-        "CLAIM_DATE", "INCIDENT_DATE", "CLAIM_TYPE", "STATUS", "ADJUSTER_NOTES"
-    ]
-    alias_map = {
-        "CLAIMID": "CLAIM_ID",
-        "CLAIM_NUMBER": "CLAIM_ID",
-        "ID": "CLAIM_ID",
-        "POLICYID": "POLICY_ID",
-        "CUSTOMERID": "CUSTOMER_ID",
-        "CLAIMAMOUNT": "CLAIM_AMOUNT",
-        "CLAIMDATE": "CLAIM_DATE",
-        "INCIDENTDATE": "INCIDENT_DATE",
-        "CLAIMTYPE": "CLAIM_TYPE",
-        "ADJUSTERNOTES": "ADJUSTER_NOTES",
-    }
-    return extract_from_csv(path, required_cols, alias_map)
+def extract_claims(
+    path: str | list[str], chunksize: int | None = None, byte_range: ByteRange | None = None, arrow: bool = False
+):
+    schema = get_schema("claims")
+    if chunksize:
+        stream = extract_table_chunks if arrow else extract_csv_chunks
+        return stream(path, schema.column_names, schema.aliases, chunksize, schema.read_dtypes(), byte_range)
+    read = extract_table if arrow else extract_from_csv
+    return read(path, schema.column_names, schema.aliases, schema.read_dtypes(), byte_range)
@@ -1,21 +1,12 @@
-from .extract_utils import extract_from_csv
+from config.schemas import get_schema
+from .extract_utils import ByteRange, extract_csv_chunks, extract_from_csv, extract_table, extract_table_chunks
 
-def extract_customer(path: str):
-    required_cols = [
-        "CUSTOMER_ID", "FIRST_NAME", "LAST_NAME", "DATE_OF_BIRTH", "GENDER",
-        "EMAIL", "PHONE", "ADDRESS", "CITY", "STATE", "ZIP_CODE"
-    ]
-    alias_map = {
-        "CUSTOMERID": "CUSTOMER_ID",
-        "FIRSTNAME": "FIRST_NAME",
-        "LASTNAME": "LAST_NAME",                
-        "DATEOFBIRTH": "DATE_OF_BIRTH",
-        "GENDER": "GENDER",
-        "EMAILADDRESS": "EMAIL",
-        "PHONENUMBER": "PHONE",
-        "ADDRESS": "ADDRESS",
-        "CITY": "CITY",
-        "STATE": "STATE",             
-        "ZIP": "ZIP_CODE",
-    }
-    return extract_from_csv(path, required_cols, alias_map)
+def extract_customer(
+    path: str | list[str], chunksize: int | None = None, byte_range: ByteRange | None = None, arrow: bool = False
+):
+    schema = get_schema("customers")
+    if chunksize:
+        stream = extract_table_chunks if arrow else extract_csv_chunks
+        return stream(path, schema.column_names, schema.aliases, chunksize, schema.read_dtypes(), byte_range)
+    read = extract_table if arrow else extract_from_csv
+    return read(path, schema.column_names, schema.aliases, schema.read_dtypes(), byte_range)
@@ -1,16 +1,12 @@
-from .extract_utils import extract_from_csv 
+from config.schemas import get_schema
+from .extract_utils import ByteRange, extract_csv_chunks, extract_from_csv, extract_table, extract_table_chunks
 
-def extract_payment(path: str):
-    required_cols = [
-        "PAYMENT_ID", "POLICY_ID", "PAYMENT_DATE", "PAYMENT_AMOUNT", "PAYMENT_METHOD", "STATUS"
-    ]
-    alias_map = {
-        "PAYMENTID": "PAYMENT_ID",
-        "POLICYID": "POLICY_ID",
-        "PAYMENTDATE": "PAYMENT_DATE",
-        "PAYMENTAMOUNT": "PAYMENT_AMOUNT",
-        "PAYMENTMETHOD": "PAYMENT_METHOD",
-        "STATUS": "STATUS",
-    }
-    return extract_from_csv(path, required_cols, alias_map)
-    
\ No newline at end of file
+def extract_payment(
+    path: str | list[str], chunksize: int | None = None, byte_range: ByteRange | None = None, arrow: bool = False
+):
+    schema = get_schema("payments")
+    if chunksize:
+        stream = extract_table_chunks if arrow else extract_csv_chunks
+        return stream(path, schema.column_names, schema.aliases, chunksize, schema.read_dtypes(), byte_range)
+    read = extract_table if arrow else extract_from_csv
+    return read(path, schema.column_names, schema.aliases, schema.read_dtypes(), byte_range)
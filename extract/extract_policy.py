@@ -1,19 +1,12 @@
-from .extract_utils import extract_from_csv
-
-def extract_policy(path: str):
-    required_cols = [
-        "POLICY_ID", "CUSTOMER_ID", "POLICY_TYPE", "EFFECTIVE_DATE",
-        "EXPIRATION_DATE", "PREMIUM_AMOUNT", "STATUS", "AGENT_ID"
-    ]
-    alias_map = {
-        "POLICYID": "POLICY_ID",
-        "CUSTOMERID": "CUSTOMER_ID",
-        "POLICYTYPE": "POLICY_TYPE",
-        "EFFECTIVEDATE": "EFFECTIVE_DATE",
-        "EXPIRATIONDATE": "EXPIRATION_DATE",
-        "PREMIUMAMOUNT": "PREMIUM_AMOUNT",
-        "STATUS": "STATUS",
-        "AGENTID": "AGENT_ID",
-    }
-    return extract_from_csv(path, required_cols, alias_map)
+from config.schemas import get_schema
+from .extract_utils import ByteRange, extract_csv_chunks, extract_from_csv, extract_table, extract_table_chunks
 
+def extract_policy(
+    path: str | list[str], chunksize: int | None = None, byte_range: ByteRange | None = None, arrow: bool = False
+):
+    schema = get_schema("policies")
+    if chunksize:
+        stream = extract_table_chunks if arrow else extract_csv_chunks
+        return stream(path, schema.column_names, schema.aliases, chunksize, schema.read_dtypes(), byte_range)
+    read = extract_table if arrow else extract_from_csv
+    return read(path, schema.column_names, schema.aliases, schema.read_dtypes(), byte_range)
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+
+from config.config import config
+
+# Bytes hashed at the start of a file and right before the last processed offset
+FINGERPRINT_BLOCK = 64 * 1024
+
+
+@dataclass
+class FileState:
+    """
+    What was last processed from one source file.
+
+    Args:
+        path (str): Absolute path of the source file.
+        size (int): File size when it was read.
+        offset (int): Byte offset up to which rows have been loaded.
+        rows (int): Total number of data rows loaded from the file so far.
+        head_hash (str): SHA-256 of the first FINGERPRINT_BLOCK bytes (up to offset).
+        anchor_hash (str): SHA-256 of the FINGERPRINT_BLOCK bytes ending at offset.
+    """
+    path: str
+    size: int
+    offset: int
+    rows: int
+    head_hash: str
+    anchor_hash: str
+
+
+@dataclass
+class ReadPlan:
+    """
+    Which part of a source file an extraction run has to read.
+
+    Args:
+        path (str): Source file.
+        mode (str): "full" (read everything), "append" (read from start_offset)
+            or "unchanged" (nothing new to read).
+        start_offset (int): First byte of new data (0 for a full read).
+        end_offset (int): Byte offset the read stops at: the file size at
+            planning time, or for CSV files just after its last newline.
+        previous_rows (int): Rows already loaded before start_offset.
+    """
+    path: str
+    mode: str
+    start_offset: int
+    end_offset: int
+    previous_rows: int = 0
+
+    def processed(self, rows_read: int) -> FileState:
+        """
+        FileState to record once the rows of this plan have been loaded.
+        """
+        return FileState(
+            path=self.path,
+            size=self.end_offset,
+            offset=self.end_offset,
+            rows=self.previous_rows + rows_read,
+            head_hash=_hash_range(self.path, 0, min(FINGERPRINT_BLOCK, self.end_offset)),
+            anchor_hash=_hash_range(self.path, max(0, self.end_offset - FINGERPRINT_BLOCK), self.end_offset),
+        )
+
+
+def _hash_range(path: str, start: int, end: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        f.seek(start)
+        digest.update(f.read(max(0, end - start)))
+    return digest.hexdigest()
+
+
+def _complete_end(path: str, size: int) -> int:
+    """
+    Offset just after the last newline in the first `size` bytes of a file
+    (0 if there is none): the end of its last complete line.
+    """
+    with open(path, "rb") as f:
+        end = size
+        while end > 0:
+            start = max(0, end - FINGERPRINT_BLOCK)
+            f.seek(start)
+            block = f.read(end - start)
+            newline = block.rfind(b"\n")
+            if newline >= 0:
+                return start + newline + 1
+            end = start
+    return 0
+
+
+class ExtractState:
+    """
+    Local JSON store of per-file FileState used for incremental extraction.
+
+    Source files are append-only in the normal case (see data/gen_claims.py).
+    A file is treated as appended to when it has grown and both its head block
+    and the block ending at the last processed offset are unchanged; only bytes
+    after that offset are then read. Any other change triggers a full re-read.
+    Edits in the middle of a file that also grows are not detected; use a full
+    refresh after rewriting a file in place. Files that cannot be read from a
+    byte offset (compressed or columnar) are re-read whole whenever they change.
+
+    CSV files are only read up to the end of their last complete line: a line
+    without its newline yet (a producer still writing, or a file that does not
+    end with a newline) is left for the run after it is terminated.
+
+    Args:
+        path (str): Location of the JSON state file.
+        full_refresh (bool): Ignore recorded state and plan full reads.
+    """
+
+    def __init__(self, path: str | None = None, full_refresh: bool = False):
+        self.path = path or config["incremental"]["state_path"]
+        self.full_refresh = full_refresh
+        self._lock = threading.Lock()
+        self._files: dict[str, FileState] = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                self._files = {k: FileState(**v) for k, v in json.load(f).get("files", {}).items()}
+
+    def plan(self, source_path: str, appendable: bool = True) -> ReadPlan:
+        """
+        Decide which bytes of a source file still need to be extracted.
+
+        Args:
+            source_path (str): Source file.
+            appendable (bool): Whether rows appended to the file can be read
+                on their own (see extract_utils.is_appendable).
+        """
+        path = os.path.abspath(source_path)
+        size = os.path.getsize(path)
+        end = _complete_end(path, size) if appendable else size
+        with self._lock:
+            previous = self._files.get(path)
+
+        if self.full_refresh or previous is None or end < previous.offset:
+            return ReadPlan(path, "full", 0, end) if end else ReadPlan(path, "unchanged", 0, 0)
+
+        head_end = min(FINGERPRINT_BLOCK, previous.offset)
+        anchor_start = max(0, previous.offset - FINGERPRINT_BLOCK)
+        if (
+            _hash_range(path, 0, head_end) != previous.head_hash
+            or _hash_range(path, anchor_start, previous.offset) != previous.anchor_hash
+        ):
+            return ReadPlan(path, "full", 0, end)
+
+        if end == previous.offset:
+            return ReadPlan(path, "unchanged", end, end, previous.rows)
+        if not appendable:
+            return ReadPlan(path, "full", 0, end)
+        return ReadPlan(path, "append", previous.offset, end, previous.rows)
+
+    def mark_processed(self, states: list[FileState]):
+        """
+        Record files whose rows have been loaded successfully.
+        """
+        with self._lock:
+            for state in states:
+                self._files[state.path] = state
+
+    def save(self):
+        """
+        Atomically write the state file.
+        """
+        with self._lock:
+            payload = {"version": 1, "files": {k: asdict(v) for k, v in self._files.items()}}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,252 @@
+"""
+Offline stand-in for snowflake.connector backed by DuckDB, used when
+SNOWFLAKE_BACKEND=duckdb.
+
+Unlike the recording stub in fake_connector, the statements issued by the
+loaders are really executed: tables are created, staged files are copied
+into a local stage directory and loaded, and MERGE reports the actual
+number of inserted and updated rows. This makes the load path measurable
+end to end without a Snowflake account.
+
+Only the Snowflake dialect the loaders emit is translated:
+    CREATE TABLE IF NOT EXISTS / ALTER TABLE ... ADD COLUMN IF NOT EXISTS
+    CREATE OR REPLACE TEMP TABLE ... LIKE ...
+    CREATE OR REPLACE TEMPORARY STAGE, PUT, REMOVE
+    COPY INTO with positional $N::TYPE casts, or MATCH_BY_COLUMN_NAME (CSV/Parquet)
+    MERGE (returns (inserted, updated) like Snowflake); COPY returns one
+    (stage, status, rows_parsed, rows_loaded) row for all files
+    SELECT, BEGIN, COMMIT, ROLLBACK
+Differences from Snowflake: values that fail a COPY cast load as NULL instead
+of skipping the row (ON_ERROR='CONTINUE'), and PUT copies files uncompressed.
+"""
+import glob
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections import deque
+
+from load.fake_connector import MAX_RECORDED
+
+# One DuckDB database per path, shared by every connection of the process
+_databases: dict = {}
+_lock = threading.Lock()
+
+_TYPE_REWRITES = [
+    # Whole numbers as integers: casting text to a wide DECIMAL is very slow in DuckDB
+    (
+        re.compile(r"\bNUMBER\s*\(\s*(\d+)\s*,\s*0\s*\)", re.IGNORECASE),
+        lambda m: "BIGINT" if int(m.group(1)) <= 18 else "HUGEINT",
+    ),
+    (re.compile(r"\bNUMBER\s*\(", re.IGNORECASE), "DECIMAL("),
+    (re.compile(r"\bTIMESTAMP_NTZ(\s*\(\s*\d+\s*\))?", re.IGNORECASE), "TIMESTAMP"),
+    (re.compile(r"\bCURRENT_TIMESTAMP\s*\(\s*\)", re.IGNORECASE), "CURRENT_TIMESTAMP"),
+]
+_CREATE_LIKE = re.compile(r"CREATE\s+OR\s+REPLACE\s+TEMP(?:ORARY)?\s+TABLE\s+(\w+)\s+LIKE\s+(\w+)", re.IGNORECASE)
+_CREATE_STAGE = re.compile(r"CREATE\s+OR\s+REPLACE\s+TEMP(?:ORARY)?\s+STAGE\s+(\w+)", re.IGNORECASE)
+_PUT = re.compile(r"PUT\s+file://(\S+)\s+@(\w+)", re.IGNORECASE)
+_REMOVE = re.compile(r"REMOVE\s+@(\w+)", re.IGNORECASE)
+_COPY_SELECT = re.compile(
+    r"COPY\s+INTO\s+(\w+)\s*\(([^)]*)\)\s*FROM\s*\(\s*SELECT\s+(.*?)\s+FROM\s+@(\w+)/?(\S*?)\s*\)\s*"
+    r"FILE_FORMAT\s*=\s*\((.*?)\)",
+    re.IGNORECASE | re.DOTALL,
+)
+_COPY_BY_NAME = re.compile(
+    r"COPY\s+INTO\s+(\w+)\s+FROM\s+@(\w+)/?(\S*)\s+FILE_FORMAT\s*=\s*\((.*?)\)",
+    re.IGNORECASE | re.DOTALL,
+)
+_POSITIONAL_CAST = re.compile(r"\$(\d+)::(.+?)\s+AS\s+(\w+)", re.IGNORECASE)
+
+
+def _to_duckdb_types(statement: str) -> str:
+    for pattern, replacement in _TYPE_REWRITES:
+        statement = pattern.sub(replacement, statement)
+    return statement
+
+
+def _sql_list(paths: list[str]) -> str:
+    return "[" + ", ".join("'" + p.replace("'", "''") + "'" for p in paths) + "]"
+
+
+def _copy_result(stage: str, loaded: int) -> list[tuple]:
+    # Snowflake reports (file, status, rows_parsed, rows_loaded, ...) per file; one row for all files here
+    return [(f"@{stage}", "LOADED", loaded, loaded)]
+
+
+class DuckDBCursor:
+    def __init__(self, connection: "DuckDBConnection"):
+        self.connection = connection
+        self._result: list[tuple] = []
+
+    def execute(self, statement: str, *args, **kwargs):
+        if self.connection.is_closed():
+            raise RuntimeError("Connection is closed.")
+        self.connection.statements.append(statement)
+        self._result = self.connection._execute(statement.strip())
+        return self
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+    def fetchall(self):
+        return list(self._result)
+
+    def close(self):
+        pass
+
+
+class DuckDBConnection:
+    """
+    One session: a DuckDB connection to the shared database, plus the
+    session's temporary stages (local directories).
+    """
+
+    def __init__(self, path: str = ":memory:", **kwargs):
+        import duckdb
+
+        with _lock:
+            if path not in _databases:
+                if path != ":memory:":
+                    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                _databases[path] = duckdb.connect(path)
+            # cursor() opens another connection to the same database
+            self._db = _databases[path].cursor()
+        self.path = path
+        self.kwargs = kwargs
+        # The most recent statements, bounded like fake_connector's
+        self.statements: deque[str] = deque(maxlen=MAX_RECORDED)
+        self._stages: dict[str, str] = {}
+        self._in_transaction = False
+        self._closed = False
+
+    def cursor(self) -> DuckDBCursor:
+        return DuckDBCursor(self)
+
+    def _execute(self, statement: str) -> list[tuple]:
+        upper = statement.upper()
+
+        if match := _CREATE_STAGE.match(statement):
+            self._drop_stage(match.group(1))
+            self._stages[match.group(1).upper()] = tempfile.mkdtemp(prefix="duckdb_stage_")
+            return []
+        if match := _PUT.match(statement):
+            stage_dir = self._stage_dir(match.group(2))
+            for path in glob.glob(match.group(1)):
+                shutil.copy(path, stage_dir)
+            return []
+        if match := _REMOVE.match(statement):
+            stage_dir = self._stage_dir(match.group(1))
+            for path in glob.glob(os.path.join(stage_dir, "*")):
+                os.remove(path)
+            return []
+        if match := _CREATE_LIKE.match(statement):
+            table, like = match.groups()
+            self._db.execute(f"CREATE OR REPLACE TEMP TABLE {table} AS SELECT * FROM {like} LIMIT 0")
+            return []
+        if upper.startswith("COPY"):
+            return self._copy_into(statement)
+        if upper.startswith("MERGE"):
+            # Snowflake returns one row of (inserted, updated) counts
+            actions = self._db.execute(f"{statement} RETURNING merge_action").fetchnumpy()["merge_action"]
+            return [(int((actions == "INSERT").sum()), int((actions == "UPDATE").sum()))]
+        if upper in ("BEGIN", "BEGIN TRANSACTION"):
+            self._db.execute("BEGIN TRANSACTION")
+            self._in_transaction = True
+            return []
+        if upper in ("COMMIT", "ROLLBACK"):
+            if self._in_transaction:
+                self._db.execute(upper)
+                self._in_transaction = False
+            return []
+
+        self._db.execute(_to_duckdb_types(statement))
+        return self._db.fetchall() if self._db.description else []
+
+    def _stage_dir(self, name: str) -> str:
+        try:
+            return self._stages[name.upper()]
+        except KeyError:
+            raise RuntimeError(f"Stage '{name}' does not exist.") from None
+
+    def _staged_files(self, stage: str, prefix: str) -> list[str]:
+        return sorted(glob.glob(os.path.join(self._stage_dir(stage), f"{glob.escape(prefix)}*")))
+
+    def _copy_into(self, statement: str) -> list[tuple]:
+        if match := _COPY_SELECT.match(statement):
+            table, columns, select_list, stage, prefix, _ = match.groups()
+            files = self._staged_files(stage, prefix)
+            if not files:
+                return []
+            casts = _POSITIONAL_CAST.findall(select_list)
+            width = max(int(position) for position, _, _ in casts)
+            names = [f"c{i}" for i in range(1, width + 1)]
+            # ON_ERROR='CONTINUE': a value that does not cast becomes NULL
+            select = ", ".join(
+                f"TRY_CAST(c{position} AS {_to_duckdb_types(cast).strip()}) AS {name}"
+                for position, cast, name in casts
+            )
+            loaded = self._db.execute(
+                f"INSERT INTO {table} ({columns}) SELECT {select} FROM read_csv({_sql_list(files)}, "
+                f"header=false, skip=1, quote='\"', all_varchar=true, names={names})"
+            ).fetchone()[0]
+            return _copy_result(stage, loaded)
+
+        if match := _COPY_BY_NAME.match(statement):
+            table, stage, prefix, file_format = match.groups()
+            files = self._staged_files(stage, prefix)
+            if not files:
+                return []
+            file_format = file_format.upper()
+            if "TYPE=PARQUET" in file_format:
+                source = f"read_parquet({_sql_list(files)})"
+            else:
+                compression = "zstd" if "COMPRESSION=ZSTD" in file_format else "auto"
+                source = (
+                    f"read_csv({_sql_list(files)}, header=true, quote='\"', "
+                    f"all_varchar=true, compression='{compression}')"
+                )
+            loaded = self._db.execute(f"INSERT INTO {table} BY NAME SELECT * FROM {source}").fetchone()[0]
+            return _copy_result(stage, loaded)
+
+        raise NotImplementedError(f"Unsupported COPY statement: {statement[:200]}")
+
+    def _drop_stage(self, name: str):
+        stage_dir = self._stages.pop(name.upper(), None)
+        if stage_dir:
+            shutil.rmtree(stage_dir, ignore_errors=True)
+
+    def commit(self):
+        if self._in_transaction:
+            self._db.execute("COMMIT")
+            self._in_transaction = False
+
+    def rollback(self):
+        if self._in_transaction:
+            self._db.execute("ROLLBACK")
+            self._in_transaction = False
+
+    def is_closed(self) -> bool:
+        return self._closed
+
+    def close(self):
+        if self._closed:
+            return
+        self.rollback()
+        for name in list(self._stages):
+            self._drop_stage(name)
+        self._db.close()
+        self._closed = True
+
+
+def connect(path: str = ":memory:", **kwargs) -> DuckDBConnection:
+    """Drop-in replacement for snowflake.connector.connect (credentials are ignored)."""
+    return DuckDBConnection(path, **kwargs)
+
+
+def reset():
+    """Close every shared database (an in-memory database is discarded)."""
+    with _lock:
+        for database in _databases.values():
+            database.close()
+        _databases.clear()
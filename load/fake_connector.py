@@ -0,0 +1,86 @@
+"""
+Offline stand-in for snowflake.connector used when SNOWFLAKE_BACKEND=fake.
+
+It accepts any statement, records it and returns harmless results, so the
+loaders and the connection pool can be exercised without a Snowflake account.
+"""
+import itertools
+import threading
+from collections import deque
+
+# Statements kept by EXECUTED and by each connection (the most recent ones),
+# so a long-lived process (e.g. the scheduler) does not grow without bound
+MAX_RECORDED = 10_000
+
+# Statements executed through any fake connection, in order
+EXECUTED: deque[str] = deque(maxlen=MAX_RECORDED)
+_lock = threading.Lock()
+_ids = itertools.count(1)
+
+
+class FakeCursor:
+    def __init__(self, connection: "FakeConnection"):
+        self.connection = connection
+        self._result: tuple | None = None
+
+    def execute(self, statement: str, *args, **kwargs):
+        if self.connection.is_closed():
+            raise RuntimeError("Connection is closed.")
+        with _lock:
+            EXECUTED.append(statement)
+        self.connection.statements.append(statement)
+
+        # Mirror the shapes the loaders read back: counts and MERGE stats
+        upper = statement.lstrip().upper()
+        if upper.startswith("SELECT COUNT"):
+            self._result = (0, 0, 0)
+        elif upper.startswith("MERGE"):
+            self._result = (0, 0)
+        elif upper.startswith("SELECT"):
+            self._result = (1,)
+        else:
+            self._result = None
+        return self
+
+    def fetchone(self):
+        return self._result
+
+    def fetchall(self):
+        return [self._result] if self._result is not None else []
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, **kwargs):
+        self.id = next(_ids)
+        self.kwargs = kwargs
+        self.statements: deque[str] = deque(maxlen=MAX_RECORDED)
+        self._closed = False
+
+    def cursor(self) -> FakeCursor:
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def is_closed(self) -> bool:
+        return self._closed
+
+    def close(self):
+        self._closed = True
+
+
+def connect(**kwargs) -> FakeConnection:
+    """Drop-in replacement for snowflake.connector.connect."""
+    return FakeConnection(**kwargs)
+
+
+def reset():
+    """Forget all recorded statements."""
+    with _lock:
+        EXECUTED.clear()
@@ -0,0 +1,168 @@
+"""
+Local index of the business keys already loaded into each RAW table.
+
+Each index is a sorted array of 64-bit key hashes (see
+transform/seen_keys.encode_keys) saved as <TABLE>.npy and memory-mapped when
+queried, plus a <TABLE>.json sidecar naming the warehouse it describes. With
+it the loaders split staged rows into keys the table has never seen, which are
+COPied straight into the target table, and keys that may already exist, which
+still go through the MERGE.
+
+Correctness only needs the index to be a superset of the table's keys: a key
+wrongly reported as loaded just takes the MERGE path. So the index is updated
+before the load commits, a missing or mismatching index is rebuilt from the
+table, and every load that does not use the index deletes it. Rows written to
+the RAW tables by anything other than these loaders are not seen; rebuild the
+index (main.py --full-refresh) after such changes.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from config.config import config
+from transform.seen_keys import encode_keys
+
+INDEX_VERSION = 1
+
+
+def encode_index_keys(keys: pd.Series) -> np.ndarray:
+    """
+    Hashes of the non-missing keys, independent of the column's dtype.
+    """
+    return encode_keys(keys.dropna().astype("str"))
+
+
+def warehouse_identity() -> str:
+    """
+    Name of the configured warehouse, so an index built against one database
+    is never trusted for another.
+    """
+    settings = config["snowflake"]
+    if settings["backend"] == "duckdb":
+        path = settings["duckdb_path"]
+        return f"duckdb:{path if path == ':memory:' else os.path.abspath(path)}"
+    return f"{settings['backend']}:{settings['account']}/{settings['database']}/{settings['schema']}"
+
+
+class KeyIndex:
+    """
+    Persistent set of the keys loaded into one target table.
+
+    The object itself only holds paths, so it can be passed to worker
+    processes; the key array is memory-mapped on each query.
+
+    Args:
+        target_table (str): RAW table the index describes.
+        directory (str | None): Directory of the index files; defaults to the configured one.
+        identity (str | None): Warehouse the table lives in; defaults to warehouse_identity().
+        rebuild (bool): Ignore the stored index, so this load rebuilds it from the table.
+    """
+
+    def __init__(
+        self,
+        target_table: str,
+        directory: str | None = None,
+        identity: str | None = None,
+        rebuild: bool = False,
+    ):
+        self.target_table = target_table
+        self.directory = directory or config["load"]["key_index_dir"]
+        self.identity = identity or warehouse_identity()
+        self.rebuild = rebuild
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f"{self.target_table}.npy")
+
+    @property
+    def meta_path(self) -> str:
+        return os.path.join(self.directory, f"{self.target_table}.json")
+
+    def _load(self) -> np.ndarray | None:
+        if self.rebuild or not (os.path.exists(self.path) and os.path.exists(self.meta_path)):
+            return None
+        try:
+            with open(self.meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            codes = np.load(self.path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        # A crash between writing the two files leaves a key count that does not match
+        if meta.get("version") != INDEX_VERSION or meta.get("identity") != self.identity or meta.get("keys") != len(codes):
+            return None
+        return codes
+
+    def codes(self) -> np.ndarray | None:
+        """
+        Sorted key hashes of the index (memory-mapped), or None when there is
+        no usable index.
+        """
+        return self._load()
+
+    @property
+    def trusted(self) -> bool:
+        """Whether a usable index exists (otherwise the next load rebuilds it)."""
+        return self._load() is not None
+
+    def contains(self, needles: np.ndarray) -> np.ndarray | None:
+        """
+        Boolean mask of the encoded keys (see encode_index_keys) already
+        loaded, or None when there is no usable index.
+        """
+        codes = self._load()
+        if codes is None:
+            return None
+        if not len(codes):
+            return np.zeros(len(needles), dtype=bool)
+        pos = np.searchsorted(codes, needles)
+        np.minimum(pos, len(codes) - 1, out=pos)
+        return codes[pos] == needles
+
+    def add(self, new_codes: np.ndarray):
+        """
+        Record newly loaded keys (no-op when there is no usable index to extend).
+        """
+        codes = self._load()
+        if codes is None:
+            return
+        # Both inputs sorted: the stable sort only merges the two runs
+        merged = np.sort(np.concatenate([codes, np.sort(new_codes)]), kind="stable")
+        keep = np.ones(len(merged), dtype=bool)
+        keep[1:] = merged[1:] != merged[:-1]
+        self._write(merged[keep])
+
+    def replace(self, codes: np.ndarray):
+        """
+        Store `codes` as the complete key set of the table.
+        """
+        self._write(np.unique(codes))
+        self.rebuild = False
+
+    def remove(self):
+        """
+        Delete the index, e.g. after the table was loaded without updating it.
+        An index of another warehouse is left alone.
+        """
+        try:
+            with open(self.meta_path, encoding="utf-8") as f:
+                if json.load(f).get("identity") != self.identity:
+                    return
+        except (OSError, ValueError):
+            pass
+        for path in (self.meta_path, self.path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _write(self, codes: np.ndarray):
+        os.makedirs(self.directory, exist_ok=True)
+        # np.save appends .npy to names without it
+        tmp_path = f"{self.path}.tmp.npy"
+        np.save(tmp_path, np.ascontiguousarray(codes, dtype=np.uint64))
+        os.replace(tmp_path, self.path)
+        meta = {"version": INDEX_VERSION, "identity": self.identity, "table": self.target_table, "keys": len(codes)}
+        tmp_meta = f"{self.meta_path}.tmp"
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta, self.meta_path)
@@ -0,0 +1,385 @@
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from config.config import config
+from config.schemas import get_schema
+from load.key_index import KeyIndex, encode_index_keys
+from load.load_utils import (
+    STAGE_SEQ_COLUMN, STAGE_SEQ_TYPE, STAGING_SUFFIXES, add_row_hash_column_sql, add_stage_seq, copy_into_sql,
+    create_table_sql, merge_sql, pooled_connection, prepare_load_frame, prepare_load_table, put_sql,
+    write_staging_file
+)
+from transform.arrow_utils import column_series, filter_rows, is_table
+from transform.seen_keys import ExactSeenKeys
+from utils.logger import get_logger, lazy
+from utils.metrics import PeakRss
+
+logger = get_logger()
+
+# One temporary stage per load session holds the files of every entity
+STAGE_NAME = "ETL_LOAD_STAGE"
+
+
+@dataclass
+class StagedEntity:
+    """
+    Local staging files written for one entity, ready to be PUT and merged.
+
+    With a key index, rows whose key was never loaded are written to separate
+    insert files that are copied straight into the target table; only the
+    other rows go through the staging table and MERGE.
+
+    Args:
+        entity (str): Entity name in the schema registry.
+        target_table (str): RAW table the files are merged into.
+        staging_format (str): Format of the files (see load_utils.STAGING_FORMATS).
+        files (list[str]): Paths of the part files to merge.
+        rows (int): Number of rows written across all part files.
+        bytes_staged (int): Total size of the part files.
+        chunks (int): Number of non-empty chunks staged.
+        insert_files (list[str]): Paths of the part files of new keys.
+        insert_rows (int): Rows written to the insert files.
+        key_index (KeyIndex | None): Index of loaded keys to update after the load.
+        new_keys (np.ndarray | None): Hashes of the keys in the insert files.
+        update_existing (bool): Whether the MERGE may update rows already in the
+            target table. Runs that did not re-read every source file of the
+            entity only insert new keys, so a key keeps the first row read for
+            it, as when the whole source is read at once.
+    """
+    entity: str
+    target_table: str
+    staging_format: str
+    files: list[str] = field(default_factory=list)
+    rows: int = 0
+    bytes_staged: int = 0
+    chunks: int = 0
+    insert_files: list[str] = field(default_factory=list)
+    insert_rows: int = 0
+    key_index: KeyIndex | None = None
+    new_keys: np.ndarray | None = None
+    update_existing: bool = True
+
+    @property
+    def file_prefix(self) -> str:
+        # Table names never contain dots, so "<TABLE>." cannot match another table's files
+        return f"{self.target_table}.merge."
+
+    @property
+    def insert_prefix(self) -> str:
+        return f"{self.target_table}.insert."
+
+
+@dataclass
+class LoadResult:
+    """
+    Outcome of merging one entity into its target table.
+
+    `unchanged` counts matched rows whose update was skipped because their
+    ROW_HASH was identical, or because the entity was staged without
+    update_existing. `direct_inserted` counts the rows of new keys
+    copied straight into the target (included in `inserted`). `copy_seconds`
+    and `merge_seconds` are the wall times of the entity's COPY INTO (with its
+    row count) and MERGE. `peak_rss_bytes` is the peak RSS of the process
+    during the load (see utils.metrics.PeakRss).
+    """
+    entity: str
+    target_table: str
+    rows_staged: int
+    bytes_staged: int
+    rows_copied: int = 0
+    merge_source_rows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    direct_inserted: int = 0
+    copy_seconds: float = 0.0
+    merge_seconds: float = 0.0
+    peak_rss_bytes: int = 0
+
+
+def stage_entity(
+    entity: str,
+    data: pd.DataFrame | pa.Table | Iterable[pd.DataFrame | pa.Table],
+    staging_dir: str,
+    staging_format: str | None = None,
+    target_table: str | None = None,
+    allow_empty: bool = False,
+    key_index: KeyIndex | None = None,
+    update_existing: bool = True,
+) -> StagedEntity:
+    """
+    Validate transformed data and write it to local staging files.
+
+    Args:
+        entity (str): Entity name in the schema registry.
+        data (pd.DataFrame | pa.Table | Iterable): A transformed DataFrame, or an
+            iterable of transformed chunks (each chunk becomes one part file).
+            The Arrow engine passes pyarrow Tables, which are written to the
+            staging files by Arrow without converting them to pandas.
+        staging_dir (str): Directory shared by every entity of the load.
+        staging_format (str | None): Staging file format; defaults to the configured one.
+        target_table (str | None): Override of the registered target table.
+        allow_empty (bool): Return a StagedEntity without files instead of raising
+            when there are no rows (e.g. nothing new in an incremental run).
+        key_index (KeyIndex | None): Index of the keys already in the target table;
+            rows with other keys are staged for a plain insert instead of the MERGE.
+        update_existing (bool): Let the MERGE update rows already in the target
+            table (see StagedEntity.update_existing).
+
+    Returns:
+        StagedEntity: Description of the written files.
+    """
+    schema = get_schema(entity)
+    staged = StagedEntity(
+        entity=entity,
+        target_table=target_table or schema.target_table,
+        staging_format=staging_format or config["load"]["staging_format"],
+        key_index=key_index,
+        update_existing=update_existing,
+    )
+    label = entity.capitalize()
+    # Without a usable index every row is merged and the load rebuilds the index
+    split = key_index is not None and key_index.trusted
+    # Keys staged for insert so far: a repeated key must go through the MERGE
+    staged_new = ExactSeenKeys() if split else None
+    new_keys = []
+
+    chunks = [data] if isinstance(data, (pd.DataFrame, pa.Table)) else data
+    for chunk in chunks:
+        if not len(chunk):
+            continue
+
+        # ✅ Validation checks and column layout from the schema registry
+        prepare = prepare_load_table if is_table(chunk) else prepare_load_frame
+        df = prepare(chunk, schema, label)
+        staged.chunks += 1
+        # Rows of earlier chunks were all written to some part file
+        merge_df = add_stage_seq(df, staged.rows)
+
+        parts = [(merge_df, staged.files, staged.file_prefix)]
+        if split:
+            # Keyless rows are never new: the MERGE inserts them as before
+            keys = column_series(df, schema.key)
+            with_key = np.flatnonzero(keys.notna().to_numpy())
+            codes = encode_index_keys(keys)
+            unloaded = ~key_index.contains(codes)
+            candidates, codes = with_key[unloaded], codes[unloaded]
+            first = staged_new.filter_new_codes(codes)
+            is_new = np.zeros(len(df), dtype=bool)
+            is_new[candidates[first]] = True
+            new_rows = filter_rows(df, is_new)
+            new_keys.append(codes[first])
+            staged.insert_rows += len(new_rows)
+            parts = [
+                (filter_rows(merge_df, ~is_new), staged.files, staged.file_prefix),
+                (new_rows, staged.insert_files, staged.insert_prefix),
+            ]
+
+        for part_df, files, prefix in parts:
+            if not len(part_df):
+                continue
+            path = os.path.join(
+                staging_dir, f"{prefix}part{len(files) + 1:05d}{STAGING_SUFFIXES[staged.staging_format]}"
+            )
+            write_staging_file(part_df, schema, staged.staging_format, path)
+            files.append(path)
+            staged.rows += len(part_df)
+            staged.bytes_staged += os.path.getsize(path)
+
+    if split:
+        staged.new_keys = np.concatenate(new_keys) if new_keys else np.array([], dtype=np.uint64)
+
+    if not staged.rows:
+        if allow_empty:
+            get_logger(entity).info("ℹ️ No %s rows to stage.", entity)
+            return staged
+        raise ValueError(f"❌ {label} DataFrame is empty — no rows to load into Snowflake.")
+
+    get_logger(entity).info(
+        "📦 Staged %d %s rows in %d file(s), %d bytes as %s",
+        staged.rows, entity, len(staged.files) + len(staged.insert_files), staged.bytes_staged, staged.staging_format,
+    )
+    if split:
+        get_logger(entity).info("🔑 %d of %d %s rows have new keys and skip the MERGE", staged.insert_rows, staged.rows, entity)
+    return staged
+
+
+def load_staged(staged: list[StagedEntity], staging_dir: str, transactional: bool = True) -> dict[str, LoadResult]:
+    """
+    Bulk-upsert previously staged entities through a single session.
+
+    All target and staging tables are prepared first, the staging directory is
+    uploaded with one PUT per file format, each staging table is filled with
+    COPY INTO, and then every MERGE runs inside one transaction so the load is
+    all-or-nothing across tables. Rows staged as new keys (see stage_entity)
+    are copied straight into their target table in the same transaction,
+    before the MERGEs.
+
+    Each entity's key index is brought up to date (or rebuilt from the target
+    table) before the commit, so it never misses a committed key; entities
+    staged without an index have theirs deleted.
+
+    Args:
+        staged (list[StagedEntity]): Output of stage_entity for each entity.
+        staging_dir (str): Directory containing every staged file.
+        transactional (bool): Wrap the MERGEs in BEGIN/COMMIT (default True).
+
+    Returns:
+        dict[str, LoadResult]: Entity name -> merge statistics.
+    """
+    results = {
+        s.entity: LoadResult(s.entity, s.target_table, s.rows, s.bytes_staged) for s in staged
+    }
+
+    with PeakRss() as rss, pooled_connection() as conn:
+        cursor = conn.cursor()
+
+        # DDL auto-commits in Snowflake, so do all of it before the transaction
+        for s in staged:
+            schema = get_schema(s.entity)
+            cursor.execute(create_table_sql(schema, s.target_table))
+            cursor.execute(add_row_hash_column_sql(s.target_table))
+            cursor.execute(f"CREATE OR REPLACE TEMP TABLE {s.target_table}_STAGING LIKE {s.target_table}")
+            cursor.execute(f"ALTER TABLE {s.target_table}_STAGING ADD COLUMN {STAGE_SEQ_COLUMN} {STAGE_SEQ_TYPE}")
+        cursor.execute(f"CREATE OR REPLACE TEMPORARY STAGE {STAGE_NAME}")
+
+        # One multi-file PUT per staging format (normally just one)
+        for staging_format in sorted({s.staging_format for s in staged}):
+            pattern = os.path.join(staging_dir, f"*{STAGING_SUFFIXES[staging_format]}")
+            cursor.execute(put_sql(pattern, STAGE_NAME, staging_format))
+
+        for s in staged:
+            if not s.files:
+                continue
+            schema = get_schema(s.entity)
+            staging_table = f"{s.target_table}_STAGING"
+            started = time.perf_counter()
+            cursor.execute(copy_into_sql(
+                schema, staging_table, f"{STAGE_NAME}/{s.file_prefix}", s.staging_format, stage_seq=True
+            ))
+
+            # Debug check: ensure rows landed in staging
+            cursor.execute(f"SELECT COUNT(*), COUNT({schema.key}), COUNT(DISTINCT {schema.key}) FROM {staging_table}")
+            counts = cursor.fetchone()
+            get_logger(s.entity).debug("📊 Row counts in %s (total, with_key, distinct_keys): %s", staging_table, counts)
+            if counts:
+                results[s.entity].rows_copied = counts[0]
+                # Rows the MERGE sees: one per key, plus keyless rows (never matched)
+                results[s.entity].merge_source_rows = counts[2] + (counts[0] - counts[1])
+            results[s.entity].copy_seconds = time.perf_counter() - started
+
+        try:
+            if transactional:
+                cursor.execute("BEGIN")
+
+            # New keys: plain COPY into the target, no join against existing rows
+            for s in staged:
+                if not s.insert_files:
+                    continue
+                schema = get_schema(s.entity)
+                started = time.perf_counter()
+                cursor.execute(copy_into_sql(schema, s.target_table, f"{STAGE_NAME}/{s.insert_prefix}", s.staging_format))
+                result = results[s.entity]
+                result.direct_inserted = _rows_loaded(cursor.fetchall(), s.insert_rows)
+                result.copy_seconds += time.perf_counter() - started
+
+            # MERGE staging → target (idempotent upsert) with row count
+            for s in staged:
+                if not s.files:
+                    continue
+                schema = get_schema(s.entity)
+                staging_table = f"{s.target_table}_STAGING"
+                started = time.perf_counter()
+                cursor.execute(merge_sql(
+                    schema, s.target_table, staging_table, dedupe=len(s.files) > 1, update_existing=s.update_existing
+                ))
+                merge_result = cursor.fetchone()
+                results[s.entity].merge_seconds = time.perf_counter() - started
+                if merge_result:
+                    result = results[s.entity]
+                    result.inserted, result.updated = merge_result[0], merge_result[1]
+                    # MERGE only reports rows it wrote; matched rows with an equal hash were skipped
+                    result.unchanged = max(0, result.merge_source_rows - result.inserted - result.updated)
+                    get_logger(s.entity).info(
+                        "✅ Merge result stats for %s: %d inserted, %d updated, %d unchanged (update skipped)",
+                        s.target_table, result.inserted, result.updated, result.unchanged,
+                    )
+
+            for s in staged:
+                results[s.entity].inserted += results[s.entity].direct_inserted
+                _update_key_index(cursor, s)
+
+            if transactional:
+                cursor.execute("COMMIT")
+        except Exception:
+            if transactional:
+                cursor.execute("ROLLBACK")
+            raise
+        finally:
+            # Cleanup
+            cursor.execute(f"REMOVE @{STAGE_NAME}")
+            cursor.close()
+
+    for result in results.values():
+        result.peak_rss_bytes = rss.bytes
+    logger.info("🎉 Finished upsert into %s", lazy(lambda: ", ".join(s.target_table for s in staged)))
+    return results
+
+
+def _rows_loaded(copy_result: list[tuple], default: int) -> int:
+    """
+    Rows loaded by a COPY INTO, from its per-file result rows
+    (file, status, rows_parsed, rows_loaded, ...); `default` if not reported.
+    """
+    loaded = [row[3] for row in copy_result if len(row) > 3 and isinstance(row[3], int)]
+    return sum(loaded) if loaded else default
+
+
+def _update_key_index(cursor, s: StagedEntity):
+    """
+    Add the keys inserted by this load to the entity's key index, rebuild the
+    index from the target table if it was not usable, or delete it when the
+    entity was loaded without one.
+    """
+    if s.key_index is None:
+        KeyIndex(s.target_table).remove()
+    elif s.new_keys is not None:
+        s.key_index.add(s.new_keys)
+    else:
+        key = get_schema(s.entity).key
+        cursor.execute(f"SELECT {key} FROM {s.target_table} WHERE {key} IS NOT NULL")
+        keys = pd.Series([row[0] for row in cursor.fetchall()], dtype="str")
+        s.key_index.replace(encode_index_keys(keys))
+        get_logger(s.entity).info("🔑 Rebuilt the key index of %s (%d keys)", s.target_table, len(keys))
+
+
+def load_entities(
+    frames: dict[str, pd.DataFrame | Iterable[pd.DataFrame]],
+    staging_format: str | None = None,
+    transactional: bool = True,
+) -> dict[str, LoadResult]:
+    """
+    Stage and bulk-upsert any number of entities in one session.
+
+    Args:
+        frames (dict): Entity name -> transformed DataFrame or iterable of chunks.
+        staging_format (str | None): Staging file format; defaults to the configured one.
+        transactional (bool): Wrap all MERGEs in one transaction (default True).
+
+    Returns:
+        dict[str, LoadResult]: Entity name -> merge statistics.
+    """
+    staging_dir = tempfile.mkdtemp(prefix="etl_stage_")
+    try:
+        staged = [stage_entity(entity, data, staging_dir, staging_format) for entity, data in frames.items()]
+        return load_staged(staged, staging_dir, transactional)
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
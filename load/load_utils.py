@@ -1,12 +1,531 @@
 import os
-import snowflake.connector
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+import pandas as pd
+
+from config.config import config
+from config.schemas import ROW_HASH_COLUMN, EntitySchema
+from utils.logger import get_logger
+
+logger = get_logger()
+
+# Audit column appended to every RAW table by the loaders
+LOAD_TS_COLUMN = "LOAD_TS"
+
+# Snowflake type of the ROW_HASH column (signed 64-bit hash)
+ROW_HASH_TYPE = "NUMBER(19,0)"
+
+# Column of the files staged for the MERGE (and of the staging tables only):
+# each row's position in the order an entity's rows were staged, so the MERGE
+# keeps the first row staged for a key, like the transforms' deduplication
+STAGE_SEQ_COLUMN = "STAGE_SEQ"
+STAGE_SEQ_TYPE = "NUMBER(18,0)"
+
+# Supported formats for the temporary files PUT to the internal stage:
+#   "csv"      plain CSV, gzip-compressed by PUT, loaded with positional $1..$N casts
+#   "csv_zstd" zstd-compressed CSV with a header, loaded with MATCH_BY_COLUMN_NAME
+#   "parquet"  zstd-compressed Parquet, loaded with MATCH_BY_COLUMN_NAME
+STAGING_FORMATS = ("csv", "csv_zstd", "parquet")
 
 def get_connection():
-    return snowflake.connector.connect(
-        user=os.getenv("SNOWFLAKE_USER"),
-        password=os.getenv("SNOWFLAKE_PASSWORD"),
-        account=os.getenv("SNOWFLAKE_ACCOUNT"),
-        warehouse=os.getenv("SNOWFLAKE_WAREHOUSE"),
-        database=os.getenv("SNOWFLAKE_DATABASE"),
-        schema=os.getenv("SNOWFLAKE_SCHEMA")
+    """
+    Open a new, unpooled connection using the configured backend.
+    Loaders should use pooled_connection() instead.
+    """
+    settings = config["snowflake"]
+    if settings["backend"] == "fake":
+        from load import fake_connector as connector
+    elif settings["backend"] == "duckdb":
+        from load import duckdb_connector as connector
+    else:
+        import snowflake.connector as connector
+
+    kwargs = {"path": settings["duckdb_path"]} if settings["backend"] == "duckdb" else {}
+    return connector.connect(
+        **kwargs,
+        user=settings["user"],
+        password=settings["password"],
+        account=settings["account"],
+        warehouse=settings["warehouse"],
+        database=settings["database"],
+        schema=settings["schema"],
+        role=settings["role"],
+        # Let the driver heartbeat idle sessions so pooled connections stay valid
+        client_session_keep_alive=settings["keep_alive"],
     )
+
+class ConnectionPool:
+    """
+    Thread-safe pool of reusable warehouse connections.
+
+    Connections are created lazily up to `max_size`, handed out by acquire()/
+    connection() and returned to the pool afterwards instead of being closed.
+    On checkout a connection is discarded if the driver reports it closed, and
+    connections idle for longer than `validate_after` seconds are checked with a
+    cheap `SELECT 1` round-trip first.
+
+    Args:
+        connect (Callable): Factory returning a new DB-API style connection.
+        max_size (int): Maximum number of open connections.
+        validate_after (float): Idle seconds after which a connection is health-checked.
+        acquire_timeout (float | None): Seconds to wait for a free connection.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any] = get_connection,
+        max_size: int = 4,
+        validate_after: float = 60.0,
+        acquire_timeout: float | None = 300.0,
+    ):
+        self._connect = connect
+        self.max_size = max(1, max_size)
+        self.validate_after = validate_after
+        self.acquire_timeout = acquire_timeout
+        self._idle: deque = deque()
+        self._open = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _is_healthy(self, conn, idle_for: float) -> bool:
+        try:
+            is_closed = getattr(conn, "is_closed", None)
+            if is_closed is not None and is_closed():
+                return False
+            if idle_for >= self.validate_after:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute("SELECT 1")
+                    cursor.fetchone()
+                finally:
+                    cursor.close()
+            return True
+        except Exception as e:
+            logger.warning("⚠️ Discarding unhealthy pooled connection: %s", e)
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    def acquire(self):
+        """
+        Check a connection out of the pool, creating one if the pool is not full.
+        """
+        deadline = None if self.acquire_timeout is None else time.monotonic() + self.acquire_timeout
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("❌ Connection pool is closed.")
+                if self._idle:
+                    conn, released_at = self._idle.pop()
+                elif self._open < self.max_size:
+                    self._open += 1
+                    conn, released_at = None, None
+                else:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"❌ No pooled connection available after {self.acquire_timeout}s.")
+                    self._cond.wait(remaining)
+                    continue
+
+            # Connect / health-check outside the lock so other threads are not blocked
+            if conn is None:
+                try:
+                    return self._connect()
+                except Exception:
+                    with self._cond:
+                        self._open -= 1
+                        self._cond.notify()
+                    raise
+            if self._is_healthy(conn, time.monotonic() - released_at):
+                return conn
+            self._discard(conn)
+
+    def release(self, conn, discard: bool = False):
+        """
+        Return a connection to the pool (or close it if `discard` or the pool is closed).
+        """
+        with self._cond:
+            if not discard and not self._closed:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+                return
+        self._discard(conn)
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager yielding a pooled connection. If the body raises, the
+        connection's open transaction is rolled back before it is reused.
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+        except BaseException:
+            try:
+                conn.rollback()
+                self.release(conn)
+            except Exception:
+                self.release(conn, discard=True)
+            raise
+        else:
+            self.release(conn)
+
+    def close(self):
+        """
+        Close every idle connection and refuse further checkouts.
+        Connections still checked out are closed when they are released.
+        """
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._cond.notify_all()
+        for conn in idle:
+            self._discard(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    """
+    Return the process-wide connection pool shared by all loaders, creating it
+    from the Snowflake settings on first use.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool._closed:
+            settings = config["snowflake"]
+            _pool = ConnectionPool(
+                max_size=settings["pool_size"],
+                validate_after=settings["pool_validate_after"],
+            )
+        return _pool
+
+@contextmanager
+def pooled_connection():
+    """
+    Shortcut for get_pool().connection().
+    """
+    with get_pool().connection() as conn:
+        yield conn
+
+def close_pool():
+    """
+    Close the shared pool (call once at the end of a run).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+def _load_ts() -> datetime:
+    # Current UTC time, naive like the TIMESTAMP_NTZ column it is loaded into
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def prepare_load_frame(df: pd.DataFrame, schema: EntitySchema, label: str) -> pd.DataFrame:
+    """
+    Validate a transformed DataFrame and lay it out in the registry's column
+    order (plus ROW_HASH and LOAD_TS) so it matches the positional COPY mapping.
+
+    Args:
+        df (pd.DataFrame): Transformed entity data.
+        schema (EntitySchema): Registered schema of the entity.
+        label (str): Human-readable entity label used in messages, e.g. "Policy".
+
+    Returns:
+        pd.DataFrame: A new DataFrame ready to be staged.
+    """
+    if df.empty:
+        raise ValueError(f"❌ {label} DataFrame is empty — no rows to load into Snowflake.")
+
+    if schema.key not in df.columns:
+        raise ValueError(f"❌ {label} DataFrame must include {schema.key} column for merge key.")
+
+    missing = [c for c in schema.column_names if c not in df.columns]
+    if missing:
+        logger.warning("⚠️ Warning: Missing expected columns: %s", missing)
+
+    if ROW_HASH_COLUMN not in df.columns:
+        from transform.transform_utils import add_row_hash
+
+        df = add_row_hash(df.copy(), schema)
+
+    # Reorder to the registered layout; missing columns are staged as NULL
+    df = df.reindex(columns=schema.column_names + [ROW_HASH_COLUMN])
+
+    # Add load timestamp safely
+    df[LOAD_TS_COLUMN] = _load_ts().isoformat(sep=" ", timespec="seconds")
+    return df
+
+def prepare_load_table(table, schema: EntitySchema, label: str):
+    """
+    Arrow engine counterpart of prepare_load_frame: validate a transformed
+    pyarrow Table and lay it out in the registry's column order (plus
+    ROW_HASH and LOAD_TS), without converting it to pandas.
+
+    Args:
+        table (pa.Table): Transformed entity data.
+        schema (EntitySchema): Registered schema of the entity.
+        label (str): Human-readable entity label used in messages, e.g. "Policy".
+
+    Returns:
+        pa.Table: A table ready to be staged.
+    """
+    import numpy as np
+    import pyarrow as pa
+
+    if not table.num_rows:
+        raise ValueError(f"❌ {label} table is empty — no rows to load into Snowflake.")
+
+    if schema.key not in table.column_names:
+        raise ValueError(f"❌ {label} table must include {schema.key} column for merge key.")
+
+    missing = [c for c in schema.column_names if c not in table.column_names]
+    if missing:
+        logger.warning("⚠️ Warning: Missing expected columns: %s", missing)
+
+    if ROW_HASH_COLUMN not in table.column_names:
+        from transform.arrow_utils import add_row_hash
+
+        table = add_row_hash(table, schema)
+
+    # Registered layout; missing columns are staged as NULL
+    columns = {
+        c: table.column(c) if c in table.column_names else pa.nulls(table.num_rows, pa.string())
+        for c in schema.column_names + [ROW_HASH_COLUMN]
+    }
+    load_ts = np.datetime64(_load_ts().replace(microsecond=0), "s")
+    columns[LOAD_TS_COLUMN] = pa.array(np.full(table.num_rows, load_ts))
+    return pa.table(columns)
+
+def add_stage_seq(data, start: int):
+    """
+    A prepared DataFrame or pyarrow Table with STAGE_SEQ appended: the
+    numbers start, start + 1, ... in row order. The input is left unchanged.
+    """
+    import numpy as np
+
+    seq = np.arange(start, start + len(data), dtype=np.int64)
+    if isinstance(data, pd.DataFrame):
+        return data.assign(**{STAGE_SEQ_COLUMN: seq})
+    import pyarrow as pa
+
+    return data.append_column(STAGE_SEQ_COLUMN, pa.array(seq))
+
+def create_table_sql(schema: EntitySchema, target_table: str) -> str:
+    """
+    CREATE TABLE IF NOT EXISTS statement for an entity's RAW table.
+    """
+    columns = [
+        f"{c.name} {c.snowflake_type}" + (" PRIMARY KEY" if c.name == schema.key else "")
+        for c in schema.columns
+    ]
+    columns.append(f"{ROW_HASH_COLUMN} {ROW_HASH_TYPE}")
+    columns.append(f"{LOAD_TS_COLUMN} TIMESTAMP_NTZ(9) DEFAULT CURRENT_TIMESTAMP()")
+    return f"CREATE TABLE IF NOT EXISTS {target_table} (\n    " + ",\n    ".join(columns) + "\n)"
+
+def add_row_hash_column_sql(target_table: str) -> str:
+    """
+    Add ROW_HASH to RAW tables created before it existed. Their rows keep a
+    NULL hash until they are next updated.
+    """
+    return f"ALTER TABLE {target_table} ADD COLUMN IF NOT EXISTS {ROW_HASH_COLUMN} {ROW_HASH_TYPE}"
+
+def _check_staging_format(staging_format: str):
+    if staging_format not in STAGING_FORMATS:
+        raise ValueError(f"❌ Unknown staging format '{staging_format}'. Expected one of {STAGING_FORMATS}.")
+
+STAGING_SUFFIXES = {"csv": ".csv", "csv_zstd": ".csv.zst", "parquet": ".parquet"}
+
+def write_staging_file(
+    df: pd.DataFrame, schema: EntitySchema, staging_format: str = "csv", path: str | None = None
+) -> str:
+    """
+    Write a prepared DataFrame (or, from the Arrow engine, pyarrow Table) to
+    a staging file in the requested format.
+
+    Args:
+        df (pd.DataFrame | pa.Table): Output of prepare_load_frame or prepare_load_table.
+        schema (EntitySchema): Registered schema of the entity.
+        staging_format (str): One of STAGING_FORMATS.
+        path (str | None): Destination file; a temporary file is created when omitted.
+
+    Returns:
+        str: Path of the written file; the caller deletes it after the load.
+    """
+    _check_staging_format(staging_format)
+    if path is None:
+        tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=STAGING_SUFFIXES[staging_format])
+        tmp_file.close()
+        path = tmp_file.name
+
+    if not isinstance(df, pd.DataFrame):
+        _write_staging_table(df, schema, staging_format, path)
+    elif staging_format == "csv":
+        df.to_csv(path, index=False, header=True)
+    elif staging_format == "csv_zstd":
+        df.to_csv(path, index=False, header=True, compression="zstd")
+    else:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        df = df.copy()
+        df[LOAD_TS_COLUMN] = pd.to_datetime(df[LOAD_TS_COLUMN])
+        table = pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata(None)
+        # Stage DATE columns as Parquet dates rather than timestamps
+        for col in schema.date_columns:
+            if col in table.column_names:
+                idx = table.column_names.index(col)
+                table = table.set_column(idx, col, table.column(col).cast(pa.date32()))
+        pq.write_table(table, path, compression="zstd")
+
+    return path
+
+def _write_staging_table(table, schema: EntitySchema, staging_format: str, path: str):
+    """
+    Write a prepared pyarrow Table with Arrow's own writers, laid out like
+    the files written from DataFrames.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+
+    # DATE columns as dates rather than timestamps
+    for col in schema.date_columns:
+        idx = table.column_names.index(col)
+        if pa.types.is_timestamp(table.schema.field(idx).type):
+            table = table.set_column(idx, col, pc.cast(table.column(idx), pa.date32()))
+
+    if staging_format == "parquet":
+        pq.write_table(table, path, compression="zstd")
+        return
+
+    # The CSV writer takes plain strings rather than dictionary-encoded ones
+    for idx, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(idx, field.name, pc.cast(table.column(idx), field.type.value_type))
+    options = pacsv.WriteOptions(include_header=True, quoting_style="needed")
+    if staging_format == "csv_zstd":
+        with pa.CompressedOutputStream(path, "zstd") as out:
+            pacsv.write_csv(table, out, options)
+    else:
+        pacsv.write_csv(table, path, options)
+
+def put_sql(local_path: str, stage_name: str, staging_format: str = "csv") -> str:
+    """
+    PUT statement uploading a staging file. Only plain CSV is compressed by PUT;
+    the other formats are already compressed.
+    """
+    _check_staging_format(staging_format)
+    auto_compress = "TRUE" if staging_format == "csv" else "FALSE"
+    return f"PUT file://{local_path} @{stage_name} OVERWRITE=TRUE AUTO_COMPRESS={auto_compress}"
+
+def copy_into_sql(
+    schema: EntitySchema, staging_table: str, staged_path: str, staging_format: str = "csv", stage_seq: bool = False
+) -> str:
+    """
+    COPY INTO statement for a staged file. Plain CSV casts the positional
+    fields ($1..$N) to the registered column types; zstd CSV and Parquet are
+    matched to the table by column name, so column order does not matter.
+    With `stage_seq`, the files end with STAGE_SEQ (see add_stage_seq) and
+    the table has that column.
+    """
+    _check_staging_format(staging_format)
+    if staging_format == "parquet":
+        return f"""
+        COPY INTO {staging_table}
+        FROM @{staged_path}
+        FILE_FORMAT = (TYPE=PARQUET)
+        MATCH_BY_COLUMN_NAME = CASE_INSENSITIVE
+        ON_ERROR='CONTINUE'
+    """
+    if staging_format == "csv_zstd":
+        return f"""
+        COPY INTO {staging_table}
+        FROM @{staged_path}
+        FILE_FORMAT = (TYPE=CSV PARSE_HEADER=TRUE FIELD_OPTIONALLY_ENCLOSED_BY='"' COMPRESSION=ZSTD)
+        MATCH_BY_COLUMN_NAME = CASE_INSENSITIVE
+        ON_ERROR='CONTINUE'
+    """
+
+    casts = [f"${i}::{c.copy_cast} AS {c.name}" for i, c in enumerate(schema.columns, 1)]
+    casts.append(f"${len(schema.columns) + 1}::{ROW_HASH_TYPE} AS {ROW_HASH_COLUMN}")
+    casts.append(f"${len(schema.columns) + 2}::TIMESTAMP_NTZ AS {LOAD_TS_COLUMN}")
+    column_names = schema.column_names + [ROW_HASH_COLUMN, LOAD_TS_COLUMN]
+    if stage_seq:
+        casts.append(f"${len(schema.columns) + 3}::{STAGE_SEQ_TYPE} AS {STAGE_SEQ_COLUMN}")
+        column_names.append(STAGE_SEQ_COLUMN)
+    select_list = ",\n                ".join(casts)
+    # Name the target columns: tables migrated by add_row_hash_column_sql have
+    # ROW_HASH after LOAD_TS, so positional mapping alone would be wrong
+    column_list = ", ".join(column_names)
+    return f"""
+        COPY INTO {staging_table} ({column_list})
+        FROM (
+            SELECT
+                {select_list}
+            FROM @{staged_path}
+        )
+        FILE_FORMAT = (TYPE=CSV FIELD_OPTIONALLY_ENCLOSED_BY='"' SKIP_HEADER=1)
+        ON_ERROR='CONTINUE'
+    """
+
+def merge_sql(
+    schema: EntitySchema, target_table: str, staging_table: str, dedupe: bool = False, update_existing: bool = True
+) -> str:
+    """
+    MERGE staging → target (idempotent upsert) on the entity key.
+
+    Matched rows are only updated when their ROW_HASH differs, so re-delivered
+    identical rows do not rewrite the target table. Rows with a NULL hash (loaded
+    before ROW_HASH existed) are always updated once.
+
+    With `dedupe`, only the first row staged per key (lowest STAGE_SEQ) is
+    merged, the row the transforms' deduplication keeps as well. This is
+    needed when several part files were staged for one entity (chunked runs),
+    because Snowflake rejects a MERGE whose source has duplicate keys.
+
+    Without `update_existing`, matched rows are left alone and only new keys
+    are inserted (see StagedEntity.update_existing).
+    """
+    columns = schema.column_names + [ROW_HASH_COLUMN, LOAD_TS_COLUMN]
+    set_list = ",\n        ".join(f"{c} = s.{c}" for c in columns if c != schema.key)
+    source = staging_table
+    if dedupe:
+        source = (
+            f"(SELECT * FROM {staging_table} "
+            f"QUALIFY ROW_NUMBER() OVER (PARTITION BY {schema.key} ORDER BY {STAGE_SEQ_COLUMN}) = 1)"
+        )
+    update = f"""
+    WHEN MATCHED AND t.{ROW_HASH_COLUMN} IS DISTINCT FROM s.{ROW_HASH_COLUMN} THEN UPDATE SET
+        {set_list}""" if update_existing else ""
+    return f"""
+    MERGE INTO {target_table} t
+    USING {source} s
+    ON t.{schema.key} = s.{schema.key}{update}
+    WHEN NOT MATCHED THEN INSERT (
+        {', '.join(columns)})
+    VALUES (
+        {', '.join(f"s.{c}" for c in columns)})
+    """
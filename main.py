@@ -1,88 +1,554 @@
+import argparse
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+from functools import partial
+
+from config.config import config
+from config.schemas import get_schema
 from extract.extract_claims import extract_claims
 from extract.extract_policy import extract_policy
 from extract.extract_customer import extract_customer
 from extract.extract_agent import extract_agent
 from extract.extract_payment import extract_payment
-from transform.transform_claims import transform_claims
-from transform.transform_policy import transform_policy
-from transform.transform_customer import transform_customer
-from transform.transform_agent import transform_agent
-from transform.transform_payment import transform_payment
-from load.load_claims import load_claims
-from load.load_policy import load_policy
-from load.load_customer import load_customer
-from load.load_agent import load_agent
-from load.load_payment import load_payment
-from utils.logger import logger
-from utils.notify import send_slack_notification
-
-def main():
+from extract.extract_utils import is_appendable, resolve_sources, source_rows
+from extract.state_store import ExtractState, FileState, ReadPlan
+from transform.transform_claims import transform_claims, transform_claims_arrow, transform_claims_polars
+from transform.transform_policy import transform_policy, transform_policy_arrow, transform_policy_polars
+from transform.transform_customer import transform_customer, transform_customer_arrow, transform_customer_polars
+from transform.transform_agent import transform_agent, transform_agent_arrow, transform_agent_polars
+from transform.transform_payment import transform_payment, transform_payment_arrow, transform_payment_polars
+from transform.seen_keys import new_seen_keys
+from transform.arrow_utils import column_series
+from transform.integrity import IntegrityReport, KnownKeys, ReferenceChecker, reference_dependencies, referenced_entities
+from transform.transform_utils import TransformReport, forget_date_formats
+from load.key_index import KeyIndex, encode_index_keys
+from load.load_entities import LoadResult, StagedEntity, load_staged, stage_entity
+from load.load_utils import STAGING_FORMATS, close_pool
+from utils.checkpoint import RunCheckpoints
+from utils.logger import get_logger, lazy, logger, set_run_id, setup_logging
+from utils.metrics import RunReport, StageMetrics
+from utils.notify import close_notifier, send_slack_notification
+from utils.scheduler import DAGExecutionError, run_dag
+
+# Extract → transform chain for each entity; every entity is then loaded
+# together by load/load_entities.py. A source may be a single file or a set of
+# drop files (directory, glob or list; see extract_utils.resolve_sources). Columns, dtypes and target tables come
+# from the schema registry (config/schemas.py).
+ENTITIES = {
+    "claims": {
+        "source": config["extract"]["sources"]["claims"],
+        "extract": extract_claims,
+        "transform": transform_claims,
+        "transform_arrow": transform_claims_arrow,
+        "transform_polars": transform_claims_polars,
+    },
+    "policies": {
+        "source": config["extract"]["sources"]["policies"],
+        "extract": extract_policy,
+        "transform": transform_policy,
+        "transform_arrow": transform_policy_arrow,
+        "transform_polars": transform_policy_polars,
+    },
+    "customers": {
+        "source": config["extract"]["sources"]["customers"],
+        "extract": extract_customer,
+        "transform": transform_customer,
+        "transform_arrow": transform_customer_arrow,
+        "transform_polars": transform_customer_polars,
+    },
+    "agents": {
+        "source": config["extract"]["sources"]["agents"],
+        "extract": extract_agent,
+        "transform": transform_agent,
+        "transform_arrow": transform_agent_arrow,
+        "transform_polars": transform_agent_polars,
+    },
+    "payments": {
+        "source": config["extract"]["sources"]["payments"],
+        "extract": extract_payment,
+        "transform": transform_payment,
+        "transform_arrow": transform_payment_arrow,
+        "transform_polars": transform_payment_polars,
+    },
+}
+
+# Entity -> entities that must finish staging first.
+# The raw tables are independent of each other until dbt runs; with reference
+# checks on, referenced entities go first so their keys are known.
+ENTITY_DEPENDENCIES = {name: [] for name in ENTITIES}
+
+# Name of the DAG task that loads every staged entity in one session
+LOAD_TASK = "load"
+
+# Transform engines: "pandas" DataFrames, or pyarrow Tables from extract to
+# staged file transformed with pyarrow.compute ("arrow") or lazy Polars plans ("polars")
+ENGINES = ("pandas", "arrow", "polars")
+
+
+@dataclass
+class PreparedEntity:
     """
-    Main function to execute the ETL pipeline.
-    It extracts data from a CSV file, transforms it, and loads it into Snowflake.
+    Result of the extract/transform/stage task of one entity.
+
+    Args:
+        entity (str): Key of the entity in ENTITIES.
+        staged (StagedEntity | None): Staged files, or None if there was nothing new.
+        source_states (list[FileState]): Source file states to record once the load succeeded.
+        report (TransformReport | None): Change counters of the transform (None if skipped).
+        metrics (list[StageMetrics]): Extract, transform and stage measurements.
+        integrity (IntegrityReport | None): Reference check results (None if not checked).
+        known_keys (KnownKeys | None): Keys other entities' references are checked
+            against (None unless the entity is referenced and checks are on).
     """
-    try:
-        logger.info("Starting insurance ETL pipeline...")
-        send_slack_notification(":repeat: Insurance ETL pipeline started.")
+    entity: str
+    staged: StagedEntity | None
+    source_states: list[FileState]
+    report: TransformReport | None = None
+    metrics: list[StageMetrics] = field(default_factory=list)
+    integrity: IntegrityReport | None = None
+    known_keys: KnownKeys | None = None
+
+
+def prepare_entity(
+    name: str,
+    staging_dir: str,
+    staging_format: str,
+    plans: list[ReadPlan],
+    key_index: KeyIndex | None = None,
+    engine: str = "pandas",
+    checkpoints: RunCheckpoints | None = None,
+    upstream: dict[str, PreparedEntity] | None = None,
+) -> PreparedEntity:
+    """
+    Run the extract and transform steps for a single entity and write the
+    result to local staging files.
+
+    Only the bytes selected by the read plans (one per source file) are
+    extracted, so incremental runs hand just the rows appended since the last
+    successful load, and the drop files not loaded yet, to the transform and
+    load stages. Such runs only insert new keys: a row appended for a key that
+    is already loaded is dropped, as a full read keeps the first row per key.
 
-        # Extract data from CSV files
-        df_raw_claims = extract_claims("data/claims.csv")
-        logger.info(f"Extracted {len(df_raw_claims)} claim records.")
+    When a chunk size is configured the source is streamed and every chunk is
+    transformed and staged as its own part file before the next one is read, so
+    memory stays bounded by the chunk size. Duplicate keys are still removed
+    across the whole file through a compact seen-key set (see
+    transform/seen_keys.py).
 
-        df_raw_policies = extract_policy("data/policies.csv")
-        logger.info(f"Extracted {len(df_raw_policies)} policy records.")
+    With the "arrow" and "polars" engines the sources are read into pyarrow
+    Tables and transformed with pyarrow.compute or a lazy Polars plan; the
+    Tables are written to the staging files without going through pandas.
 
-        df_raw_customers = extract_customer("data/customers.csv")
-        logger.info(f"Extracted {len(df_raw_customers)} customer records.")
+    With reference checks on, every transformed frame is checked against the
+    keys of the entities it references (prepared upstream) before it is
+    staged; orphans are reported and, in quarantine mode, not staged.
 
-        df_raw_agents = extract_agent("data/agents.csv")
-        logger.info(f"Extracted {len(df_raw_agents)} agent records.")
+    With checkpoints, the extracted and transformed data are written to the
+    run's checkpoint directory as they pass. When a failed run is resumed and
+    its checkpoints were written for the same read plans, the extract (or
+    both extract and transform) is skipped and the checkpointed data is used;
+    validation and staging always run again.
 
-        df_raw_payments = extract_payment("data/payments.csv")
-        logger.info(f"Extracted {len(df_raw_agents)} payment records.")
+    Args:
+        name (str): Key of the entity in ENTITIES.
+        staging_dir (str): Directory shared by the staged files of every entity.
+        staging_format (str): File format used to stage data for COPY INTO.
+        plans (list[ReadPlan]): Part of each source file to read.
+        key_index (KeyIndex | None): Index of the keys already loaded; rows with
+            new keys are staged to skip the MERGE.
+        engine (str): One of ENGINES.
+        checkpoints (RunCheckpoints | None): Checkpoints of the run (the resumed
+            one when resuming), or None to run without checkpoints.
+        upstream (dict[str, PreparedEntity] | None): Prepared referenced entities
+            (passed by the scheduler).
 
-        # Transform data
-        transformed_df_claims = transform_claims(df_raw_claims)
-        logger.info("Claims data transformation completed successfully.")
+    Returns:
+        PreparedEntity: Staged files, the source states to record after loading
+        and the stage metrics.
+    """
+    spec = ENTITIES[name]
+    if engine not in ENGINES:
+        raise ValueError(f"❌ Unknown pipeline engine '{engine}'. Expected one of {ENGINES}.")
+    extract = partial(spec["extract"], arrow=engine != "pandas")
+    transform = spec["transform"] if engine == "pandas" else spec[f"transform_{engine}"]
+    chunksize = config["pipeline"]["chunksize"]
+    check_mode = config["integrity"]["mode"]
+    log = get_logger(name)
+    # Keys to hand to the entities referencing this one
+    key_chunks = [] if check_mode != "off" and name in referenced_entities() else None
+
+    pending = [plan for plan in plans if plan.mode != "unchanged"]
+    if not pending:
+        if plans:
+            log.info("No new %s records in %s; skipping.", name, spec["source"])
+        else:
+            log.warning("No %s source files match %s; skipping.", name, spec["source"])
+        known_keys = KnownKeys.collect(name, [], False, key_index) if key_chunks is not None else None
+        return PreparedEntity(name, None, [plan.processed(0) for plan in plans], known_keys=known_keys)
+
+    # Runs that leave source files unread only add new keys, so a key keeps
+    # the first row read for it, exactly as when every file is read at once
+    full_read = all(plan.mode == "full" for plan in plans)
+    stage = partial(
+        stage_entity,
+        name,
+        staging_dir=staging_dir,
+        staging_format=staging_format,
+        allow_empty=True,
+        key_index=key_index,
+        update_existing=full_read,
+    )
+    paths = [plan.path for plan in pending]
+    byte_ranges = {plan.path: (plan.start_offset, plan.end_offset) for plan in pending}
+    # Rows read from each source file, for the recorded file states
+    rows_read = dict.fromkeys(paths, 0)
+
+    def count_rows(df):
+        for path, rows in (source_rows(df) or {paths[0]: len(df)}).items():
+            rows_read[path] += rows
+    report = TransformReport(name)
+    extract_metrics, transform_metrics, validate_metrics, stage_metrics = (
+        StageMetrics(name, stage) for stage in ("extract", "transform", "validate", "stage")
+    )
+
+    # Stage outputs a resumed run left for exactly these inputs
+    checkpoint = checkpoints.entity(name, pending, engine, chunksize) if checkpoints is not None else None
+    transformed_manifest = checkpoint.manifest("transformed") if checkpoint is not None else None
+    raw_manifest = checkpoint.manifest("raw") if checkpoint is not None and transformed_manifest is None else None
+    if transformed_manifest is not None:
+        report = TransformReport(**transformed_manifest["report"])
+        rows_read.update(transformed_manifest["rows_read"])
+        log.info("Resuming %s from its transform checkpoint; skipping extract and transform.", name)
+    elif raw_manifest is not None:
+        rows_read.update(raw_manifest["rows_read"])
+        log.info("Resuming %s from its extract checkpoint; skipping extract.", name)
+
+    checker = None
+    schema = get_schema(name)
+    if check_mode != "off" and schema.references:
+        parents = {
+            prepared.entity: prepared.known_keys
+            for prepared in (upstream or {}).values() if prepared.known_keys is not None
+        }
+        checker = ReferenceChecker(schema, parents, check_mode)
+
+    def validated(df):
+        with validate_metrics.track():
+            validate_metrics.rows_in += len(df)
+            if checker is not None and len(df):
+                df = checker.check(df)
+            if key_chunks is not None and len(df):
+                key_chunks.append(encode_index_keys(column_series(df, schema.key)))
+            validate_metrics.rows_out += len(df)
+        return df
 
-        transformed_df_policies = transform_policy(df_raw_policies)
-        logger.info("Policy data transformation completed successfully.")
+    def extracted():
+        # Raw data: a single frame, or chunks when streaming
+        if raw_manifest is not None:
+            yield from checkpoint.read("raw", raw_manifest)
+            return
+        if chunksize:
+            chunks = extract(paths, chunksize=chunksize, byte_range=byte_ranges)
+        else:
+            chunks = [extract(paths, byte_range=byte_ranges)]
+        for df_raw in chunks:
+            count_rows(df_raw)
+            yield df_raw
 
-        transformed_df_customers = transform_customer(df_raw_customers)
-        logger.info("Customer data transformation completed successfully.")
+    def transformed(seen_keys=None):
+        if transformed_manifest is not None:
+            chunks = checkpoint.read("transformed", transformed_manifest)
+            while True:
+                with transform_metrics.track():
+                    df_transformed = next(chunks, None)
+                if df_transformed is None:
+                    return
+                yield df_transformed
 
-        transformed_df_agents = transform_agent(df_raw_agents)
-        logger.info("Agent data transformation completed successfully.")
+        chunks = extracted()
+        if checkpoint is not None and raw_manifest is None:
+            chunks = checkpoint.write("raw", chunks, rows_read=rows_read)
+        if not chunksize:
+            # A single frame: complete its checkpoint before the transform can fail
+            with extract_metrics.track():
+                chunks = iter(list(chunks))
+        sources = None
+        while True:
+            with extract_metrics.track():
+                df_raw = next(chunks, None)
+            if df_raw is None:
+                return
+            extract_metrics.rows_out += len(df_raw)
+            # Date formats are resolved per source file: a cached format could misread another file's dates
+            if sorted(source_rows(df_raw)) != sources:
+                sources = sorted(source_rows(df_raw))
+                forget_date_formats(name)
+            if not chunksize and raw_manifest is None:
+                log.info("Extracted %d %s records.", len(df_raw), name)
+            with transform_metrics.track():
+                df_transformed = transform(df_raw, report, seen_keys)
+            yield df_transformed
 
-        transformed_df_payments = transform_payment(df_raw_payments)
-        logger.info("Payment data transformation completed successfully.")
+    def validated_chunks(seen_keys=None):
+        chunks = transformed(seen_keys)
+        if checkpoint is not None and transformed_manifest is None:
+            chunks = checkpoint.write("transformed", chunks, report=report, rows_read=rows_read)
+        for df_transformed in chunks:
+            yield validated(df_transformed)
 
-        # Load data to Snowflake        
-        load_claims(transformed_df_claims, "RAW_CLAIM")
-        logger.info("Claims data loaded to Snowflake successfully.")
+    for plan in pending:
+        if plan.mode == "append" and raw_manifest is None and transformed_manifest is None:
+            log.info("Reading %s records appended after byte %d of %s.", name, plan.start_offset, plan.path)
+    if len(plans) > 1:
+        log.info("Reading %d of %d %s source files.", len(pending), len(plans), name)
 
-        load_policy(transformed_df_policies, "RAW_POLICY")
-        logger.info("Policy data loaded to Snowflake successfully.")
+    if not chunksize:
+        [df_transformed] = validated_chunks()
+        if transformed_manifest is None:
+            log.info("%s data transformation completed successfully.", name.capitalize())
 
-        load_customer(transformed_df_customers, "RAW_CUSTOMER")
-        logger.info("Customer data loaded to Snowflake successfully.")
+        with stage_metrics.track():
+            staged = stage(df_transformed)
+    else:
+        # Keys kept so far, so duplicates are dropped across chunks, not just within one
+        seen_keys = new_seen_keys(config["pipeline"]["dedup"], config["pipeline"]["dedup_expected_keys"])
+        with seen_keys, stage_metrics.track():
+            staged = stage(validated_chunks(seen_keys))
+        # The chunks were extracted, transformed and validated inside stage_entity's loop
+        for metrics in (extract_metrics, transform_metrics, validate_metrics):
+            stage_metrics.wall_seconds -= metrics.wall_seconds
+            stage_metrics.cpu_seconds -= metrics.cpu_seconds
+        log.info("%s data streamed in %d chunk(s).", name.capitalize(), staged.chunks)
 
-        load_agent(transformed_df_agents, "RAW_AGENT")
-        logger.info("Agent data loaded to Snowflake successfully.")
+    if raw_manifest is None and transformed_manifest is None:
+        extract_metrics.bytes = sum(plan.end_offset - plan.start_offset for plan in pending)
+    transform_metrics.rows_in, transform_metrics.rows_out = report.rows_in, report.rows_out
+    stage_metrics.rows_in, stage_metrics.rows_out = validate_metrics.rows_out, staged.rows
+    stage_metrics.bytes = staged.bytes_staged
 
-        load_payment(transformed_df_payments, "RAW_PAYMENT")
-        logger.info("Payment data loaded to Snowflake successfully.")
+    log.info("Transform report for %s", lazy(report.summary))
+    metrics = [extract_metrics, transform_metrics, stage_metrics]
+    integrity = None
+    if checker is not None:
+        integrity = checker.report
+        metrics.insert(2, validate_metrics)
+        (log.warning if integrity.orphan_rows else log.info)("Reference check for %s", lazy(integrity.summary))
+    known_keys = None
+    if key_chunks is not None:
+        known_keys = KnownKeys.collect(name, key_chunks, full_read, key_index)
+    return PreparedEntity(
+        name,
+        staged if staged.rows else None,
+        [plan.processed(rows_read.get(plan.path, 0)) for plan in plans],
+        report,
+        metrics,
+        integrity,
+        known_keys,
+    )
+
+
+def load_all(staging_dir: str, upstream: dict[str, PreparedEntity]) -> dict[str, LoadResult]:
+    """
+    Load every staged entity through one Snowflake session and transaction.
+    """
+    staged = [prepared.staged for prepared in upstream.values() if prepared.staged is not None]
+    if not staged:
+        logger.info("Nothing new to load.")
+        return {}
+
+    results = load_staged(staged, staging_dir)
+    for result in results.values():
+        get_logger(result.entity).info(
+            "%s data loaded to Snowflake successfully (%d inserted, %d updated, %d unchanged).",
+            result.entity.capitalize(), result.inserted, result.updated, result.unchanged,
+        )
+    return results
+
+
+def collect_metrics(results: dict) -> list[StageMetrics]:
+    """
+    Gather the stage metrics of every finished DAG task, in entity order.
+    """
+    metrics = []
+    for name in ENTITIES:
+        if name in results:
+            metrics.extend(results[name].metrics)
+    for result in results.get(LOAD_TASK, {}).values():
+        metrics.append(StageMetrics(
+            result.entity,
+            "load",
+            # COPY INTO + MERGE of this entity; the shared PUT is not attributed
+            wall_seconds=result.copy_seconds + result.merge_seconds,
+            rows_in=result.rows_staged,
+            rows_out=result.inserted + result.updated,
+            bytes=result.bytes_staged,
+            peak_rss_bytes=result.peak_rss_bytes,
+            inserted=result.inserted,
+            updated=result.updated,
+            unchanged=result.unchanged,
+        ))
+    return metrics
+
+
+def write_run_report(run: RunReport):
+    """
+    Write the JSON run report and the Prometheus textfile; failures are logged
+    but never fail the pipeline.
+    """
+    try:
+        logger.info(f"Run report written to {run.write_json(config['metrics']['report_dir'])}")
+        if config["metrics"]["textfile_path"]:
+            run.write_prometheus(config["metrics"]["textfile_path"])
+    except OSError as e:
+        logger.warning(f"Could not write run metrics: {e}")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """
+    Parse the per-run command line options.
+    """
+    parser = argparse.ArgumentParser(description="Insurance ETL pipeline")
+    parser.add_argument(
+        "--staging-format",
+        choices=STAGING_FORMATS,
+        default=config["load"]["staging_format"],
+        help="File format used to stage data for COPY INTO (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default=config["pipeline"]["engine"],
+        help="Transform engine: pandas DataFrames, pyarrow Tables or lazy Polars plans (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--full-refresh",
+        action="store_true",
+        help="Ignore the incremental extract state and re-read every source file "
+        "(and rebuild the key indexes when KEY_INDEX is enabled)",
+    )
+    parser.add_argument(
+        "--resume",
+        nargs="?",
+        const="latest",
+        metavar="RUN_ID",
+        help="Resume a failed run (default: the latest) from its extract and transform checkpoints",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None):
+    """
+    Main function to execute the ETL pipeline.
+    It extracts data from CSV files and transforms it, running the independent
+    entity pipelines concurrently, then loads every entity into Snowflake in a
+    single session.
+    """
+    args = parse_args(argv)
+    setup_logging()
+    staging_dir = tempfile.mkdtemp(prefix="etl_stage_")
+    run = RunReport()
+    set_run_id(run.run_id)
+    results = {}
+    checkpoints = None
+    success = False
+    try:
+        logger.info(f"Starting insurance ETL pipeline (run {run.run_id})...")
+        send_slack_notification(f":repeat: Insurance ETL pipeline started (run {run.run_id}).")
+
+        # Stage outputs are checkpointed under the run being resumed, if any
+        if config["checkpoint"]["enabled"]:
+            if args.resume:
+                resumed = RunCheckpoints.latest() if args.resume == "latest" else RunCheckpoints(args.resume)
+                if resumed is not None and resumed.exists():
+                    checkpoints = resumed
+                    logger.info(f"Resuming run {resumed.run_id} from its checkpoints...")
+                else:
+                    logger.warning(f"No checkpoints of run {args.resume} to resume from; starting from the extract.")
+            checkpoints = checkpoints or RunCheckpoints(run.run_id)
+        elif args.resume:
+            logger.warning("Checkpoints are disabled (CHECKPOINTS=false); starting from the extract.")
+
+        # Decide per source file what still has to be read
+        state = ExtractState(full_refresh=args.full_refresh or not config["incremental"]["enabled"])
+        plans = {
+            name: [state.plan(path, is_appendable(path)) for path in resolve_sources(spec["source"])]
+            for name, spec in ENTITIES.items()
+        }
+
+        # A full refresh also rebuilds the key indexes from the target tables
+        key_indexes = {
+            name: KeyIndex(get_schema(name).target_table, rebuild=args.full_refresh) if config["load"]["key_index"] else None
+            for name in ENTITIES
+        }
+
+        tasks = {
+            name: partial(
+                prepare_entity,
+                name,
+                staging_dir,
+                args.staging_format,
+                plans[name],
+                key_indexes[name],
+                args.engine,
+                checkpoints,
+            )
+            for name in ENTITIES
+        }
+        tasks[LOAD_TASK] = partial(load_all, staging_dir)
+        dependencies = {name: list(deps) for name, deps in ENTITY_DEPENDENCIES.items()}
+        if config["integrity"]["mode"] != "off":
+            for name, parents in reference_dependencies(ENTITIES).items():
+                dependencies[name] = sorted(set(dependencies[name]) | set(parents))
+        dependencies[LOAD_TASK] = list(ENTITIES)
+
+        results = run_dag(
+            tasks,
+            dependencies,
+            max_workers=config["pipeline"]["max_workers"],
+            executor=config["pipeline"]["executor"],
+        )
+
+        # Only now that the load committed may the processed offsets advance
+        state.mark_processed([file_state for name in ENTITIES for file_state in results[name].source_states])
+        state.save()
+        success = True
+        if checkpoints is not None:
+            checkpoints.remove_obsolete()
 
         # Log pipeline completion
         logger.info("Insurance ETL pipeline completed successfully.")
 
         # Send notification to Slack
-        send_slack_notification("✅ Insurance ETL pipeline executed successfully.")
-        
+        send_slack_notification(f"✅ Insurance ETL pipeline executed successfully (run {run.run_id}).")
+
     except Exception as e:
+        if isinstance(e, DAGExecutionError):
+            results = e.results
         logger.error(f"An error occurred: {e}")
+        if checkpoints is not None and checkpoints.exists():
+            logger.info(
+                f"Stage checkpoints kept; rerun with --resume {checkpoints.run_id} "
+                "to skip the extracts and transforms that finished."
+            )
         # Send notification to Slack in case of failure
-        send_slack_notification(f"🔴 Insurance ETL pipeline failed: {e}")
+        send_slack_notification(f"🔴 Insurance ETL pipeline failed (run {run.run_id}): {e}")
+
+    finally:
+        # Close the pooled Snowflake sessions opened during the run
+        close_pool()
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+        run.stages = collect_metrics(results)
+        run.integrity = [
+            results[name].integrity.to_dict()
+            for name in ENTITIES if name in results and results[name].integrity is not None
+        ]
+        run.finish(success)
+        write_run_report(run)
+
+        # Deliver the queued Slack messages (bounded by SLACK_SHUTDOWN_TIMEOUT)
+        close_notifier()
 
 if __name__ == "__main__":
-    main()  
+    main()
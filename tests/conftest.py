@@ -0,0 +1,86 @@
+"""
+Shared fixtures: the whole pipeline run offline against copies of the sample
+files in data/ and a DuckDB warehouse, with every piece of state in a
+temporary directory.
+"""
+import glob
+import json
+import os
+import shutil
+
+import duckdb
+import pytest
+
+import main
+from config.config import config
+from load import duckdb_connector
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Pipeline:
+    """
+    Runs main.main() on a private copy of the sample data.
+
+    Args:
+        root (str): Temporary directory holding the data and every state file.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.data_dir = os.path.join(root, "data")
+        self.report_dir = os.path.join(root, "reports")
+
+    def source(self, entity: str) -> str:
+        return os.path.join(self.data_dir, f"{entity}.csv")
+
+    def append(self, entity: str, text: str):
+        with open(self.source(entity), "a", encoding="utf-8") as f:
+            f.write(text)
+
+    def run(self, *args: str) -> str:
+        """
+        Run the pipeline; its status ("success" or "failed") from the run
+        report, which is kept in `self.report`.
+        """
+        before = set(glob.glob(os.path.join(self.report_dir, "run_*.json")))
+        main.main(list(args))
+        [report] = set(glob.glob(os.path.join(self.report_dir, "run_*.json"))) - before
+        with open(report, encoding="utf-8") as f:
+            self.report = json.load(f)
+        return self.report["status"]
+
+    def query(self, sql: str, read_only: bool = True) -> list[tuple]:
+        # The pipeline keeps its database open for the rest of the process
+        duckdb_connector.reset()
+        with duckdb.connect(config["snowflake"]["duckdb_path"], read_only=read_only) as conn:
+            return conn.execute(sql).fetchall()
+
+    def state_offset(self, entity: str) -> int | None:
+        with open(config["incremental"]["state_path"], encoding="utf-8") as f:
+            files = json.load(f)["files"]
+        state = files.get(os.path.abspath(self.source(entity)))
+        return state["offset"] if state else None
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    pipeline = Pipeline(root)
+    shutil.copytree(os.path.join(REPO_DIR, "data"), pipeline.data_dir, ignore=shutil.ignore_patterns("*.py"))
+    for section, key, value in (
+        ("snowflake", "backend", "duckdb"),
+        ("snowflake", "duckdb_path", os.path.join(root, "warehouse.duckdb")),
+        ("incremental", "state_path", os.path.join(root, "extract_state.json")),
+        ("load", "key_index_dir", os.path.join(root, "key_index")),
+        ("integrity", "quarantine_dir", os.path.join(root, "quarantine")),
+        ("checkpoint", "dir", os.path.join(root, "checkpoints")),
+        ("metrics", "report_dir", pipeline.report_dir),
+        ("metrics", "textfile_path", ""),
+    ):
+        monkeypatch.setitem(config[section], key, value)
+    monkeypatch.setitem(config, "slack_webhook", None)
+    for name, spec in main.ENTITIES.items():
+        monkeypatch.setitem(spec, "source", pipeline.source(name))
+    yield pipeline
+    duckdb_connector.reset()
@@ -0,0 +1,50 @@
+"""
+Stage checkpoints and --resume (utils/checkpoint.py).
+"""
+import glob
+import os
+
+import pytest
+
+import main
+from config.config import config
+
+
+@pytest.fixture
+def checkpointed(pipeline, monkeypatch):
+    monkeypatch.setitem(config["checkpoint"], "enabled", True)
+    return pipeline
+
+
+def _manifests(stage: str, entity: str) -> list[str]:
+    return glob.glob(os.path.join(config["checkpoint"]["dir"], "*", entity, f"{stage}.json"))
+
+
+def _fail(*args, **kwargs):
+    raise RuntimeError("boom")
+
+
+def test_resume_after_a_failed_load_skips_extract_and_transform(checkpointed, monkeypatch):
+    # RAW_PAYMENT with the wrong columns makes the load fail
+    checkpointed.query("CREATE TABLE RAW_PAYMENT (X INTEGER)", read_only=False)
+    assert checkpointed.run() == "failed"
+    checkpointed.query("DROP TABLE RAW_PAYMENT", read_only=False)
+
+    for spec in main.ENTITIES.values():
+        monkeypatch.setitem(spec, "extract", _fail)
+        monkeypatch.setitem(spec, "transform", _fail)
+    assert checkpointed.run("--resume") == "success"
+    assert checkpointed.query("SELECT COUNT(*) FROM RAW_PAYMENT") == [(1438,)]
+    assert not os.listdir(config["checkpoint"]["dir"])
+
+
+def test_failed_transform_leaves_no_transform_checkpoint(checkpointed, monkeypatch):
+    transform = main.ENTITIES["claims"]["transform"]
+    monkeypatch.setitem(main.ENTITIES["claims"], "transform", _fail)
+    assert checkpointed.run() == "failed"
+    assert _manifests("raw", "claims")
+    assert not _manifests("transformed", "claims")
+
+    monkeypatch.setitem(main.ENTITIES["claims"], "transform", transform)
+    assert checkpointed.run("--resume") == "success"
+    assert checkpointed.query("SELECT COUNT(*) FROM RAW_CLAIM") == [(259,)]
@@ -0,0 +1,58 @@
+"""
+The vectorized cleaning kernels (transform/cleaning.py) against the per-row
+code they replaced (benchmarks/legacy_cleaning.py).
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.legacy_cleaning import LEGACY, SAMPLE_COLUMNS, VECTORIZED
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+# Hand-picked edge cases on top of the sample data
+EDGE_CASES = {
+    "title": ["  mary-ann o'neil ", "JOHN", "", " ", "élodie", "mc donald", np.nan],
+    "upper": [" ny", "ca ", "Tx", "", np.nan],
+    "email": [" John.Doe@Example.COM ", "", "ÅSA@example.com", np.nan],
+    "gender": ["male", " Female ", "m", "F", "x", "", "unknown", np.nan],
+    "zip": ["123", "00501", "123456789", "", "1234-5678", np.nan],
+    "phone": ["(271)-900-6734", "271.900.6734", "+1 271 900 6734", "2719006734", "12345", "", "٠١٢٣٤٥٦٧٨٩", np.nan],
+    "agency": [" prime insurance", "TRUSTGUARD", "", np.nan],
+}
+
+
+def _inputs(kernel: str) -> list[tuple[str, pd.Series]]:
+    """
+    Edge cases as object and string columns, plus the sample data as loaded by
+    the extractors (string) and as categoricals.
+    """
+    inputs = [
+        ("edge cases (object)", pd.Series(EDGE_CASES[kernel], dtype="object", name=kernel)),
+        ("edge cases (str)", pd.Series(EDGE_CASES[kernel], dtype="str", name=kernel)),
+    ]
+    for entity, column in SAMPLE_COLUMNS[kernel]:
+        series = pd.read_csv(os.path.join(DATA_DIR, f"{entity}.csv"), dtype=str)[column]
+        inputs.append((f"{entity}.{column} (str)", series))
+        inputs.append((f"{entity}.{column} (category)", series.astype("category")))
+    return inputs
+
+
+@pytest.mark.parametrize("kernel, label, series", [
+    pytest.param(kernel, label, series, id=f"{kernel}-{label}")
+    for kernel in LEGACY
+    for label, series in _inputs(kernel)
+])
+def test_kernel_matches_legacy_code(kernel, label, series):
+    try:
+        expected = LEGACY[kernel](series)
+    except TypeError:
+        # The per-row phone lambda crashes on missing values; compare the rest
+        series = series.dropna()
+        expected = LEGACY[kernel](series)
+
+    actual = VECTORIZED[kernel](series)
+    # Categorical input stays categorical; compare the values only
+    pd.testing.assert_series_equal(actual.astype(object), expected.astype(object), check_dtype=False)
@@ -0,0 +1,56 @@
+"""
+Date columns written differently by different source files and runs
+(transform_utils.resolve_date_format, forget_date_formats).
+"""
+import os
+
+import pandas as pd
+import pytest
+
+from config.config import config
+import main
+from main import ENGINES
+
+DATES_SQL = "SELECT CLAIM_ID, CLAIM_DATE, INCIDENT_DATE FROM RAW_CLAIM ORDER BY CLAIM_ID"
+
+
+def write_claims(path: str, claims: pd.DataFrame, date_format: str):
+    """Write ISO-dated claims with their dates in `date_format`."""
+    rewritten = claims.copy()
+    for column in ("claim_date", "incident_date"):
+        rewritten[column] = pd.to_datetime(rewritten[column], format="%Y-%m-%d").dt.strftime(date_format)
+    rewritten.to_csv(path, index=False)
+
+
+@pytest.fixture
+def iso_claims(pipeline) -> pd.DataFrame:
+    return pd.read_csv(pipeline.source("claims"), dtype=str, keep_default_na=False)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_each_run_resolves_the_date_format_of_its_file(pipeline, iso_claims, engine):
+    assert pipeline.run("--engine", engine) == "success"
+    expected = pipeline.query(DATES_SQL)
+
+    # Day-first, then month-first: most days are ambiguous in one format or the other
+    for date_format in ("%d/%m/%Y", "%m/%d/%Y"):
+        write_claims(pipeline.source("claims"), iso_claims, date_format)
+        assert pipeline.run("--engine", engine, "--full-refresh") == "success"
+        assert pipeline.query(DATES_SQL) == expected
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_each_source_file_resolves_its_own_date_format(pipeline, monkeypatch, iso_claims, engine):
+    assert pipeline.run("--engine", engine) == "success"
+    expected = pipeline.query(DATES_SQL)
+
+    drops = os.path.join(pipeline.root, "claims")
+    os.makedirs(drops)
+    half = len(iso_claims) // 2
+    write_claims(os.path.join(drops, "claims_1.csv"), iso_claims.iloc[:half], "%d/%m/%Y")
+    write_claims(os.path.join(drops, "claims_2.csv"), iso_claims.iloc[half:], "%m/%d/%Y")
+    monkeypatch.setitem(main.ENTITIES["claims"], "source", drops)
+    monkeypatch.setitem(config["pipeline"], "chunksize", 100)
+
+    assert pipeline.run("--engine", engine, "--full-refresh") == "success"
+    assert pipeline.query(DATES_SQL) == expected
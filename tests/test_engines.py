@@ -0,0 +1,104 @@
+"""
+The Arrow and Polars engines (PIPELINE_ENGINE=arrow / polars) against the
+pandas engine: every entity must come out as the same rows, ROW_HASHes and
+transform report, on the sample files in data/ and on a generated dataset,
+read in one go and in chunks.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from benchmarks.datasets import SAMPLE_FILES, dataset_path
+from config.schemas import ROW_HASH_COLUMN, get_schema
+from main import ENGINES, ENTITIES
+from transform import arrow_utils
+from transform.seen_keys import ExactSeenKeys
+from transform.transform_utils import TransformReport, add_row_hash
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHUNKSIZE = 2_500
+
+GENERATED_ROWS = 10_000
+
+
+def _run(entity: str, path: str, engine: str, chunksize: int | None) -> tuple[pd.DataFrame, TransformReport]:
+    """
+    Extract and transform one file with one engine; the result as a pandas
+    DataFrame of comparable values.
+    """
+    spec = ENTITIES[entity]
+    arrow = engine != "pandas"
+    transform = spec["transform"] if engine == "pandas" else spec[f"transform_{engine}"]
+    report = TransformReport(entity)
+    if chunksize:
+        with ExactSeenKeys() as seen_keys:
+            chunks = [
+                transform(chunk, report, seen_keys)
+                for chunk in spec["extract"](path, chunksize=chunksize, arrow=arrow)
+            ]
+        chunks = [chunk.to_pandas() if arrow else chunk for chunk in chunks if len(chunk)]
+        df = pd.concat(chunks, ignore_index=True)
+    else:
+        df = transform(spec["extract"](path, arrow=arrow), report)
+        df = df.to_pandas() if arrow else df
+    return _comparable(df), report
+
+
+def _comparable(df: pd.DataFrame) -> pd.DataFrame:
+    # Dates to whole seconds, categories to their values, missing values to None
+    columns = {}
+    for column in df.columns:
+        values = df[column]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            values = values.astype("datetime64[s]")
+        values = values.astype(object)
+        columns[column] = values.where(values.notna(), None).to_numpy()
+    return pd.DataFrame(columns)
+
+
+@pytest.fixture(scope="module")
+def generated_dir(tmp_path_factory):
+    return str(tmp_path_factory.mktemp("datasets"))
+
+
+@pytest.mark.parametrize("chunksize", [None, CHUNKSIZE], ids=["whole", "chunks"])
+@pytest.mark.parametrize("engine", ENGINES[1:])
+@pytest.mark.parametrize("generated", [False, True], ids=["sample", "generated"])
+@pytest.mark.parametrize("entity", list(SAMPLE_FILES))
+def test_engine_matches_pandas(entity, generated, engine, chunksize, generated_dir):
+    if generated:
+        path = dataset_path(entity, GENERATED_ROWS, generated_dir)
+    else:
+        path = os.path.join(ROOT, SAMPLE_FILES[entity])
+
+    expected, expected_report = _run(entity, path, "pandas", chunksize)
+    actual, actual_report = _run(entity, path, engine, chunksize)
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+    assert actual_report == expected_report
+
+
+def test_row_hash_only_depends_on_the_values():
+    schema, spec = get_schema("claims"), ENTITIES["claims"]
+    path = os.path.join(ROOT, SAMPLE_FILES["claims"])
+    df = spec["transform"](spec["extract"](path), TransformReport("claims")).drop(columns=ROW_HASH_COLUMN)
+    expected = add_row_hash(df.copy(), schema)[ROW_HASH_COLUMN].tolist()
+
+    variants = {
+        "text": df.astype({"CLAIM_TYPE": "str", "STATUS": "object"}),
+        "negative zero": df.assign(CLAIM_AMOUNT=df["CLAIM_AMOUNT"].where(df["CLAIM_AMOUNT"] != 0, -0.0)),
+        "time of day": df.assign(CLAIM_DATE=df["CLAIM_DATE"] + pd.Timedelta(hours=5)),
+        "column order": df[df.columns[::-1]],
+    }
+    for name, variant in variants.items():
+        assert add_row_hash(variant.copy(), schema)[ROW_HASH_COLUMN].tolist() == expected, name
+    table = arrow_utils.add_row_hash(pa.Table.from_pandas(df, preserve_index=False), schema)
+    assert table.column(ROW_HASH_COLUMN).to_pylist() == expected
+
+    # Missing values hash alike whatever their type, and like absent columns
+    missing = df.assign(ADJUSTER_NOTES=None, CLAIM_AMOUNT=np.nan, CLAIM_DATE=pd.NaT)
+    absent = df.drop(columns=["ADJUSTER_NOTES", "CLAIM_AMOUNT", "CLAIM_DATE"])
+    assert add_row_hash(missing, schema)[ROW_HASH_COLUMN].tolist() == add_row_hash(absent, schema)[ROW_HASH_COLUMN].tolist()
@@ -0,0 +1,28 @@
+"""
+Extraction of multi-file sources (extract/extract_utils.py).
+"""
+import os
+
+import pandas as pd
+import pytest
+
+from config.config import config
+from extract.extract_payment import extract_payment
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "payments.csv")
+
+
+@pytest.mark.parametrize("arrow", [False, True])
+def test_drop_files_read_in_parallel_match_one_file(tmp_path, monkeypatch, arrow):
+    monkeypatch.setitem(config["extract"], "max_workers", 2)
+    with open(SAMPLE, encoding="utf-8") as f:
+        header, *rows = f.readlines()
+    for part, start in enumerate(range(0, len(rows), 700)):
+        with open(tmp_path / f"payments_{part}.csv", "w", encoding="utf-8") as f:
+            f.writelines([header, *rows[start:start + 700]])
+
+    expected = extract_payment(SAMPLE, arrow=arrow)
+    actual = extract_payment(str(tmp_path), arrow=arrow)
+    if arrow:
+        expected, actual = expected.to_pandas(), actual.to_pandas()
+    pd.testing.assert_frame_equal(actual, expected)
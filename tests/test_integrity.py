@@ -0,0 +1,101 @@
+"""
+Reference checks before load (transform/integrity.py).
+"""
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from config.schemas import get_schema
+from load.key_index import KeyIndex, encode_index_keys
+from transform.integrity import ORPHAN_COLUMN, KnownKeys, ReferenceChecker
+
+
+def keys(*values) -> list:
+    return [encode_index_keys(pd.Series(values, dtype="str"))]
+
+
+@pytest.fixture
+def parents() -> dict[str, KnownKeys]:
+    return {
+        "policies": KnownKeys.collect("policies", keys("POL1", "POL2"), full_read=True),
+        "customers": KnownKeys.collect("customers", keys("CUST1"), full_read=True),
+    }
+
+
+def claims(policy_ids, customer_ids) -> pd.DataFrame:
+    return pd.DataFrame({
+        "CLAIM_ID": [f"CLM{n}" for n in range(len(policy_ids))],
+        "POLICY_ID": pd.Series(policy_ids, dtype="str"),
+        "CUSTOMER_ID": pd.Series(customer_ids, dtype="str"),
+    })
+
+
+def test_warn_mode_counts_orphans_and_loads_every_row(parents):
+    checker = ReferenceChecker(get_schema("claims"), parents, "warn")
+    chunk = claims(["POL1", "POL9", "POL8", "POL2"], ["CUST1", "CUST1", "CUST7", "CUST1"])
+
+    assert checker.check(chunk) is chunk
+    report = checker.report
+    assert (report.rows_checked, report.orphan_rows, report.quarantined) == (4, 2, 0)
+    assert report.orphans == {"POLICY_ID": 2, "CUSTOMER_ID": 1}
+    assert report.samples == {"POLICY_ID": ["POL9", "POL8"], "CUSTOMER_ID": ["CUST7"]}
+    assert report.quarantine_path is None
+
+
+def test_quarantine_mode_writes_orphans_aside(parents, tmp_path):
+    path = str(tmp_path / "run" / "claims.csv")
+    checker = ReferenceChecker(get_schema("claims"), parents, "quarantine", path)
+
+    kept = checker.check(claims(["POL1", "POL9", "POL8"], ["CUST1", "CUST1", "CUST7"]))
+    assert kept["CLAIM_ID"].tolist() == ["CLM0"]
+    # Arrow engine chunks are checked the same way; the file gets one header
+    kept = checker.check(pa.Table.from_pandas(claims(["POL2", "POL7"], ["CUST1", "CUST1"]), preserve_index=False))
+    assert kept.column("CLAIM_ID").to_pylist() == ["CLM0"]
+
+    report = checker.report
+    assert (report.rows_checked, report.orphan_rows, report.quarantined) == (5, 3, 3)
+    assert report.quarantine_path == path
+    quarantined = pd.read_csv(path, dtype=str)
+    assert quarantined["CLAIM_ID"].tolist() == ["CLM1", "CLM2", "CLM1"]
+    assert quarantined[ORPHAN_COLUMN].tolist() == ["POLICY_ID", "POLICY_ID;CUSTOMER_ID", "POLICY_ID"]
+
+
+def test_missing_references_are_not_orphans(parents, tmp_path):
+    checker = ReferenceChecker(get_schema("claims"), parents, "quarantine", str(tmp_path / "claims.csv"))
+    chunk = claims([None, "POL1", None], ["CUST1", None, None])
+
+    assert len(checker.check(chunk)) == 3
+    assert (checker.report.orphan_rows, checker.report.orphans) == (0, {})
+
+
+def test_references_to_incomplete_keys_are_not_checked(parents, tmp_path):
+    # An incremental read without a key index only knows this run's keys
+    parents["policies"] = KnownKeys.collect("policies", keys("POL1"), full_read=False)
+    assert not parents["policies"].complete
+    del parents["customers"]
+
+    checker = ReferenceChecker(get_schema("claims"), parents, "warn")
+    checker.check(claims(["POL9"], ["CUST9"]))
+    assert checker.report.orphan_rows == 0
+    assert checker.report.unchecked == {
+        "POLICY_ID": "policies keys from earlier runs unknown",
+        "CUSTOMER_ID": "customers keys not available",
+    }
+
+
+def test_collect_merges_this_runs_keys_with_the_key_index(tmp_path):
+    index = KeyIndex("RAW_POLICY", directory=str(tmp_path), identity="duckdb::memory:")
+    index.replace(encode_index_keys(pd.Series(["POL1", "POL2"], dtype="str")))
+
+    known = KnownKeys.collect("policies", keys("POL3", "POL1"), full_read=False, key_index=index)
+    assert known.complete
+    assert known.codes.tolist() == sorted(encode_index_keys(pd.Series(["POL1", "POL2", "POL3"], dtype="str")).tolist())
+
+    # An untrusted index does not complete an incremental read
+    index.remove()
+    assert not KnownKeys.collect("policies", keys("POL3"), full_read=False, key_index=index).complete
+
+
+def test_off_is_not_a_checker_mode(parents):
+    with pytest.raises(ValueError):
+        ReferenceChecker(get_schema("claims"), parents, "off")
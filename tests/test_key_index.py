@@ -0,0 +1,80 @@
+"""
+Local index of loaded keys (load/key_index.py).
+"""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from load.key_index import INDEX_VERSION, KeyIndex, encode_index_keys
+
+
+def codes(*keys) -> np.ndarray:
+    return encode_index_keys(pd.Series(keys, dtype="str"))
+
+
+@pytest.fixture
+def index(tmp_path) -> KeyIndex:
+    return KeyIndex("RAW_CLAIM", directory=str(tmp_path), identity="duckdb:/warehouse.duckdb")
+
+
+def test_missing_index_is_not_trusted(index):
+    assert not index.trusted
+    assert index.contains(codes("CLM001")) is None
+    index.add(codes("CLM001"))
+    assert not index.trusted
+
+
+def test_contains_add_replace_remove(index):
+    index.replace(codes("CLM001", "CLM002", "CLM002"))
+    assert index.trusted
+    assert index.contains(codes("CLM001", "CLM003", "CLM002")).tolist() == [True, False, True]
+
+    index.add(codes("CLM003", "CLM001"))
+    assert index.contains(codes("CLM001", "CLM003", "CLM004")).tolist() == [True, True, False]
+    assert len(index.codes()) == 3
+
+    index.replace(codes("CLM004"))
+    assert index.contains(codes("CLM001", "CLM004")).tolist() == [False, True]
+
+    index.remove()
+    assert not index.trusted
+    assert index.contains(codes("CLM004")) is None
+
+
+def test_empty_index_contains_nothing(index):
+    index.replace(codes())
+    assert index.trusted
+    assert index.contains(codes("CLM001")).tolist() == [False]
+
+
+def test_index_of_another_warehouse_is_not_used_or_removed(index, tmp_path):
+    index.replace(codes("CLM001"))
+    other = KeyIndex("RAW_CLAIM", directory=str(tmp_path), identity="duckdb:/other.duckdb")
+    assert not other.trusted
+    assert other.contains(codes("CLM001")) is None
+
+    other.remove()
+    assert index.trusted
+
+
+@pytest.mark.parametrize("meta", [{"version": INDEX_VERSION + 1}, {"keys": 2}], ids=["version", "key-count"])
+def test_mismatching_metadata_forces_a_rebuild(index, meta):
+    index.replace(codes("CLM001"))
+    with open(index.meta_path, encoding="utf-8") as f:
+        stored = json.load(f)
+    with open(index.meta_path, "w", encoding="utf-8") as f:
+        json.dump({**stored, **meta}, f)
+
+    assert not index.trusted
+
+
+def test_rebuild_ignores_the_stored_index(index):
+    index.replace(codes("CLM001"))
+    rebuilding = KeyIndex(index.target_table, index.directory, index.identity, rebuild=True)
+    assert not rebuilding.trusted
+
+    rebuilding.replace(codes("CLM002"))
+    assert rebuilding.trusted
+    assert index.contains(codes("CLM001", "CLM002")).tolist() == [False, True]
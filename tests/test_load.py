@@ -0,0 +1,211 @@
+"""
+Staging and loading (load/load_entities.py) against an in-memory DuckDB
+warehouse (load/duckdb_connector.py).
+"""
+import itertools
+import os
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+
+from config.config import config
+from config.schemas import ROW_HASH_COLUMN, get_schema
+from extract.extract_claims import extract_claims
+from load import duckdb_connector, load_utils
+from load.key_index import KeyIndex, encode_index_keys
+from load.load_entities import load_entities, load_staged, stage_entity
+from load.load_utils import (
+    STAGING_FORMATS, STAGING_SUFFIXES, close_pool, copy_into_sql, create_table_sql, pooled_connection,
+    prepare_load_frame, put_sql, write_staging_file,
+)
+from transform.transform_claims import transform_claims
+from transform.transform_utils import add_row_hash
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "claims.csv")
+
+
+@pytest.fixture
+def warehouse(tmp_path, monkeypatch):
+    monkeypatch.setitem(config["snowflake"], "backend", "duckdb")
+    monkeypatch.setitem(config["snowflake"], "duckdb_path", ":memory:")
+    monkeypatch.setitem(config["load"], "key_index_dir", str(tmp_path / "key_index"))
+    yield
+    close_pool()
+    duckdb_connector.reset()
+
+
+@pytest.fixture
+def cursor(warehouse):
+    """A cursor of one DuckDB session, issuing Snowflake statements directly."""
+    conn = duckdb_connector.connect(":memory:")
+    yield conn.cursor()
+    conn.close()
+
+
+@pytest.fixture(scope="module")
+def claims() -> pd.DataFrame:
+    return transform_claims(extract_claims(SAMPLE))
+
+
+def query(sql: str) -> list[tuple]:
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql)
+        return cursor.fetchall()
+
+
+def stage_dir(cursor, stage: str) -> list[str]:
+    return sorted(os.listdir(cursor.connection._stage_dir(stage)))
+
+
+def load(tmp_path, chunks, staging_format: str = "csv", **kwargs):
+    staging_dir = tmp_path / f"staging_{len(os.listdir(tmp_path))}"
+    staging_dir.mkdir()
+    staged = stage_entity("claims", iter(chunks), str(staging_dir), staging_format, **kwargs)
+    return load_staged([staged], str(staging_dir))["claims"]
+
+
+@pytest.mark.parametrize("staging_format", STAGING_FORMATS)
+def test_merge_keeps_the_first_row_staged_for_a_key(warehouse, tmp_path, monkeypatch, claims, staging_format):
+    # Each chunk is staged a second after the previous one
+    clock = (datetime(2024, 1, 1) + timedelta(seconds=n) for n in itertools.count())
+    monkeypatch.setattr(load_utils, "_load_ts", lambda: next(clock))
+    # Every key staged three times, in later chunks with other statuses
+    later = [claims.assign(STATUS=status) for status in ("Reopened", "Withdrawn")]
+
+    result = load(tmp_path, [claims, *later], staging_format)
+    assert (result.rows_staged, result.inserted) == (3 * len(claims), len(claims))
+    expected = sorted(zip(claims["CLAIM_ID"], claims["STATUS"].astype(str)))
+    assert query("SELECT CLAIM_ID, STATUS FROM RAW_CLAIM ORDER BY CLAIM_ID") == expected
+
+
+def test_second_load_merges_existing_keys_and_inserts_new_ones(warehouse, tmp_path, claims):
+    first = load(tmp_path, [claims], key_index=KeyIndex("RAW_CLAIM"))
+    # No index yet: every row went through the MERGE, and the load built the index
+    assert (first.inserted, first.direct_inserted) == (len(claims), 0)
+    assert KeyIndex("RAW_CLAIM").contains(encode_index_keys(claims["CLAIM_ID"])).all()
+
+    # Edited rows get their ROW_HASH again, like from the transform
+    changed = claims.head(20).assign(STATUS="Reopened").drop(columns=ROW_HASH_COLUMN)
+    new = claims.head(5).assign(CLAIM_ID=[f"CLM9{n:03d}" for n in range(5)])
+    second_run = pd.concat([add_row_hash(changed, get_schema("claims")), claims.iloc[20:], new])
+    second = load(tmp_path, [second_run], key_index=KeyIndex("RAW_CLAIM"))
+
+    assert (second.inserted, second.direct_inserted) == (5, 5)
+    assert second.merge_source_rows == len(claims)
+    assert second.updated == (claims.head(20)["STATUS"] != "Reopened").sum()
+    assert query("SELECT COUNT(*), COUNT(DISTINCT CLAIM_ID) FROM RAW_CLAIM") == [(len(claims) + 5,) * 2]
+    assert query("SELECT COUNT(*) FROM RAW_CLAIM WHERE STATUS = 'Reopened'") == [(20,)]
+
+
+def test_put_copies_matching_files_and_remove_empties_the_stage(cursor, tmp_path):
+    for name in ("claims_0.csv", "claims_1.csv", "policies_0.parquet"):
+        (tmp_path / name).write_text("CLAIM_ID\nCLM001\n")
+    with pytest.raises(RuntimeError):
+        cursor.execute(put_sql(str(tmp_path / "*.csv"), "ETL_LOAD_STAGE"))
+
+    cursor.execute("CREATE OR REPLACE TEMPORARY STAGE ETL_LOAD_STAGE")
+    cursor.execute(put_sql(str(tmp_path / "*.csv"), "ETL_LOAD_STAGE"))
+    assert stage_dir(cursor, "ETL_LOAD_STAGE") == ["claims_0.csv", "claims_1.csv"]
+
+    cursor.execute("REMOVE @ETL_LOAD_STAGE")
+    assert stage_dir(cursor, "ETL_LOAD_STAGE") == []
+
+
+def test_positional_copy_casts_fields_by_position(cursor, tmp_path):
+    cursor.execute("CREATE TABLE T (ID VARCHAR, AMOUNT NUMBER(12,2), N NUMBER(18,0), TS TIMESTAMP_NTZ(9))")
+    (tmp_path / "t_0.csv").write_text('n,ts,id,amount\n1,2024-01-02 03:04:05,"A,1",10.5\nx,2024-01-03,B,bad\n')
+    cursor.execute("CREATE OR REPLACE TEMPORARY STAGE S")
+    cursor.execute(put_sql(str(tmp_path / "t_0.csv"), "S"))
+
+    # Fields in another order than the table; values that do not cast load as NULL
+    cursor.execute("""
+        COPY INTO T (N, TS, ID, AMOUNT)
+        FROM (
+            SELECT
+                $1::NUMBER(18,0) AS N,
+                $2::TIMESTAMP_NTZ AS TS,
+                $3::VARCHAR AS ID,
+                $4::NUMBER(12,2) AS AMOUNT
+            FROM @S/t_
+        )
+        FILE_FORMAT = (TYPE=CSV FIELD_OPTIONALLY_ENCLOSED_BY='"' SKIP_HEADER=1)
+        ON_ERROR='CONTINUE'
+    """)
+    assert cursor.fetchall() == [("@S", "LOADED", 2, 2)]
+
+    cursor.execute("SELECT ID, AMOUNT, N, TS FROM T ORDER BY ID")
+    assert cursor.fetchall() == [
+        ("A,1", Decimal("10.50"), 1, datetime(2024, 1, 2, 3, 4, 5)),
+        ("B", None, None, datetime(2024, 1, 3)),
+    ]
+    cursor.execute("SELECT data_type FROM information_schema.columns WHERE table_name = 'T' ORDER BY ordinal_position")
+    assert [row[0] for row in cursor.fetchall()] == ["VARCHAR", "DECIMAL(12,2)", "BIGINT", "TIMESTAMP"]
+
+
+@pytest.mark.parametrize("staging_format", STAGING_FORMATS)
+def test_copy_of_each_staging_format_loads_the_prepared_rows(cursor, tmp_path, claims, staging_format):
+    schema = get_schema("claims")
+    prepared = prepare_load_frame(claims, schema, "Claim")
+    write_staging_file(prepared, schema, staging_format, str(tmp_path / f"claims_0{STAGING_SUFFIXES[staging_format]}"))
+    cursor.execute(create_table_sql(schema, "RAW_CLAIM"))
+    cursor.execute("CREATE OR REPLACE TEMPORARY STAGE S")
+    cursor.execute(put_sql(str(tmp_path / "*"), "S", staging_format))
+
+    # Plain CSV is cast by position, zstd CSV and Parquet are matched by name
+    cursor.execute(copy_into_sql(schema, "RAW_CLAIM", "S/claims_", staging_format))
+    assert cursor.fetchall() == [("@S", "LOADED", len(claims), len(claims))]
+    # Nothing is loaded from a prefix without files
+    cursor.execute(copy_into_sql(schema, "RAW_CLAIM", "S/policies_", staging_format))
+    assert cursor.fetchall() == []
+
+    cursor.execute(f"SELECT CLAIM_ID, CLAIM_DATE, {ROW_HASH_COLUMN} FROM RAW_CLAIM ORDER BY CLAIM_ID")
+    expected = prepared.sort_values("CLAIM_ID")
+    assert cursor.fetchall() == list(zip(
+        expected["CLAIM_ID"], pd.to_datetime(expected["CLAIM_DATE"]).dt.date, expected[ROW_HASH_COLUMN]
+    ))
+
+
+def test_merge_returns_inserted_and_updated_counts(cursor):
+    cursor.execute("CREATE TABLE T (K VARCHAR, V VARCHAR, ROW_HASH NUMBER(19,0))")
+    cursor.execute("INSERT INTO T VALUES ('a', 'old', 1), ('b', 'same', 2), ('c', 'untouched', 3)")
+    cursor.execute("CREATE TABLE S (K VARCHAR, V VARCHAR, ROW_HASH NUMBER(19,0))")
+    cursor.execute("INSERT INTO S VALUES ('a', 'new', 10), ('b', 'same', 2), ('d', 'added', 4)")
+
+    cursor.execute("""
+        MERGE INTO T t
+        USING S s
+        ON t.K = s.K
+        WHEN MATCHED AND t.ROW_HASH IS DISTINCT FROM s.ROW_HASH THEN UPDATE SET V = s.V, ROW_HASH = s.ROW_HASH
+        WHEN NOT MATCHED THEN INSERT (K, V, ROW_HASH) VALUES (s.K, s.V, s.ROW_HASH)
+    """)
+    assert cursor.fetchall() == [(1, 1)]
+    cursor.execute("SELECT K, V FROM T ORDER BY K")
+    assert cursor.fetchall() == [("a", "new"), ("b", "same"), ("c", "untouched"), ("d", "added")]
+
+
+def test_load_entities_updates_exactly_the_rows_whose_hash_changed(warehouse, claims):
+    first = load_entities({"claims": claims})["claims"]
+    assert (first.rows_copied, first.inserted, first.updated) == (len(claims), len(claims), 0)
+
+    # Every third row edited (some to the value they already had), plus new keys
+    edited = claims.iloc[::3].assign(STATUS="Approved").drop(columns=ROW_HASH_COLUMN)
+    new = claims.head(7).assign(CLAIM_ID=[f"CLM9{n:03d}" for n in range(7)])
+    second_run = pd.concat([
+        add_row_hash(edited, get_schema("claims")), claims.drop(index=claims.index[::3]), new
+    ])
+    stored = dict(query(f"SELECT CLAIM_ID, {ROW_HASH_COLUMN} FROM RAW_CLAIM"))
+    changed = sum(
+        key in stored and stored[key] != row_hash
+        for key, row_hash in zip(second_run["CLAIM_ID"], second_run[ROW_HASH_COLUMN])
+    )
+    assert 0 < changed < len(edited)
+
+    second = load_entities({"claims": second_run})["claims"]
+    assert (second.inserted, second.updated) == (len(new), changed)
+    assert second.unchanged == len(claims) - changed
+    assert query(f"SELECT CLAIM_ID, {ROW_HASH_COLUMN} FROM RAW_CLAIM ORDER BY CLAIM_ID") == sorted(
+        zip(second_run["CLAIM_ID"], second_run[ROW_HASH_COLUMN])
+    )
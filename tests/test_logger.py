@@ -0,0 +1,54 @@
+"""
+Queue-based logging (utils/logger.py).
+"""
+import json
+import logging
+import os
+import queue
+import subprocess
+import sys
+
+from utils import logger
+from utils.logger import RUN_ID_ENV, JsonFormatter, TextFormatter
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_importing_the_pipeline_does_not_start_logging():
+    code = "import main, utils.logger as logger; print(logger._listener is None, logger._queue_handler is None)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, capture_output=True, text=True, check=True)
+    assert out.stdout.split() == ["True", "True"]
+
+
+def test_queued_exceptions_keep_their_traceback(monkeypatch):
+    monkeypatch.delenv(RUN_ID_ENV, raising=False)
+    records = queue.SimpleQueue()
+    log = logging.getLogger("insurance_etl.test_logger")
+    handler = logger._QueueHandler(records)
+    handler.addFilter(logger._ContextFilter())
+    log.addHandler(handler)
+    try:
+        try:
+            raise ValueError("bad claim amount")
+        except ValueError:
+            log.exception("❌ Failed to transform %s", "claims", extra={"entity": "claims"})
+    finally:
+        log.removeHandler(handler)
+
+    record = records.get_nowait()
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "❌ Failed to transform claims"
+    assert entry["level"] == "ERROR" and entry["entity"] == "claims"
+    assert entry["exception"].startswith("Traceback (most recent call last):")
+    assert entry["exception"].endswith("ValueError: bad claim amount")
+
+    lines = TextFormatter().format(record).splitlines()
+    assert lines[0].endswith("[claims] ❌ Failed to transform claims")
+    assert lines[-1] == "ValueError: bad claim amount"
+
+
+def test_records_without_exception_have_no_exception_field():
+    record = logging.LogRecord("insurance_etl", logging.INFO, __file__, 1, "Loaded %d rows", (3,), None)
+    entry = json.loads(JsonFormatter().format(logger._QueueHandler(queue.SimpleQueue()).prepare(record)))
+    assert entry["message"] == "Loaded 3 rows"
+    assert "exception" not in entry
@@ -0,0 +1,67 @@
+"""
+Per-stage run metrics (utils/metrics.py, main.collect_metrics).
+"""
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+from load import load_entities
+from utils.metrics import StageMetrics
+
+SPIN = """
+import time
+end = time.process_time() + {seconds}
+while time.process_time() < end:
+    pass
+"""
+
+
+def _spin(seconds: float):
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        pass
+
+
+def test_stage_peak_rss_is_the_peak_during_that_stage():
+    big, small = StageMetrics("claims", "transform"), StageMetrics("claims", "stage")
+    with big.track():
+        block = np.ones(400 * 2**20 // 8)
+        time.sleep(0.1)
+        del block
+    with small.track():
+        time.sleep(0.1)
+
+    assert big.peak_rss_bytes - small.peak_rss_bytes > 300 * 2**20
+
+
+def test_stage_cpu_includes_worker_threads_and_processes():
+    metrics = StageMetrics("claims", "extract")
+    with metrics.track():
+        worker = threading.Thread(target=_spin, args=(0.3,))
+        worker.start()
+        worker.join()
+        subprocess.run([sys.executable, "-c", SPIN.format(seconds=0.3)], check=True)
+
+    assert metrics.cpu_seconds > 0.5
+
+
+class _FixedPeak:
+    bytes = 123_456_789
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+def test_load_peak_rss_is_sampled_by_the_load(pipeline, monkeypatch):
+    monkeypatch.setattr(load_entities, "PeakRss", _FixedPeak)
+
+    assert pipeline.run() == "success"
+    loads = [stage for stage in pipeline.report["stages"] if stage["stage"] == "load"]
+    assert len(loads) == 5
+    assert {stage["peak_rss_bytes"] for stage in loads} == {123_456_789}
@@ -0,0 +1,126 @@
+"""
+Slack notifications (utils/notify.py) against the local webhook stand-in
+benchmarks/slack_stub.py.
+"""
+import time
+
+import pytest
+
+from benchmarks.slack_stub import SlackStub
+from config.config import config
+from utils import notify
+from utils.notify import SlackNotifier, close_notifier, send_slack_notification
+
+
+@pytest.fixture
+def stub():
+    server = SlackStub().start()
+    yield server
+    close_notifier(timeout=0)
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def waits(monkeypatch) -> list[float]:
+    """Retry delays the notifier sleeps for, without sleeping."""
+    recorded = []
+    monkeypatch.setattr(notify.time, "sleep", recorded.append)
+    return recorded
+
+
+def test_failed_posts_are_retried_with_exponential_backoff(stub, waits):
+    stub.fail_first = 3
+    notifier = SlackNotifier(stub.url, max_retries=3, backoff=0.5, coalesce_seconds=0)
+    notifier.notify("Pipeline started")
+    notifier.close(timeout=5)
+
+    assert stub.requests == 4
+    assert stub.messages == ["Pipeline started"]
+    assert [wait for wait in waits if wait] == [0.5, 1.0, 2.0]
+    assert (notifier.sent, notifier.failed) == (1, 0)
+
+
+def test_retries_give_up_after_max_retries(stub, waits):
+    stub.fail_first = 10
+    notifier = SlackNotifier(stub.url, max_retries=2, backoff=0.5, coalesce_seconds=0)
+    notifier.notify("Pipeline failed")
+    notifier.close(timeout=5)
+
+    assert stub.requests == 3
+    assert stub.messages == []
+    assert (notifier.sent, notifier.failed) == (0, 1)
+
+
+def test_rate_limited_posts_wait_for_retry_after(stub, waits):
+    stub.fail_first, stub.fail_status = 1, 429
+    notifier = SlackNotifier(stub.url, backoff=0.01, coalesce_seconds=0)
+    notifier.notify("Pipeline started")
+    notifier.close(timeout=5)
+
+    # The stub answers 429 with Retry-After: 1
+    assert [wait for wait in waits if wait] == [1.0]
+    assert stub.messages == ["Pipeline started"]
+
+
+def test_client_errors_are_not_retried(stub, waits):
+    stub.fail_first, stub.fail_status = 1, 404
+    notifier = SlackNotifier(stub.url, coalesce_seconds=0)
+    notifier.notify("Pipeline started")
+    notifier.close(timeout=5)
+
+    assert stub.requests == 1
+    assert notifier.failed == 1
+
+
+def test_bursts_are_coalesced_into_one_digest(stub):
+    notifier = SlackNotifier(stub.url, coalesce_seconds=0.5)
+    for entity in ("claims", "policies", "customers"):
+        notifier.notify(f"Loaded {entity}")
+    notifier.close(timeout=5)
+
+    assert stub.messages == ["• Loaded claims\n• Loaded policies\n• Loaded customers"]
+    assert notifier.sent == 3
+
+
+def test_full_queue_drops_the_oldest_messages(stub):
+    stub.delay = 0.5
+    notifier = SlackNotifier(stub.url, queue_size=2, coalesce_seconds=0)
+    notifier.notify("m0")
+    # Wait until the worker is posting m0, so the next messages queue up behind it
+    deadline = time.monotonic() + 5
+    while not notifier._queue.empty() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    for n in range(1, 5):
+        notifier.notify(f"m{n}")
+    notifier.close(timeout=5)
+
+    assert stub.messages == ["m0", "• m3\n• m4\n_(2 earlier notification(s) dropped)_"]
+    assert (notifier.sent, notifier.dropped) == (3, 0)
+
+
+def test_close_notifier_gives_up_retries_past_the_deadline(stub, monkeypatch):
+    stub.fail_first = 10
+    monkeypatch.setitem(config, "slack_webhook", stub.url)
+    monkeypatch.setitem(config["slack"], "coalesce_seconds", 0)
+    send_slack_notification("Pipeline failed")
+    notifier = notify.get_notifier()
+
+    # The first retry (1 s backoff) would end after the 0.5 s deadline
+    started = time.monotonic()
+    close_notifier(timeout=0.5)
+    assert time.monotonic() - started < 0.5
+    assert (stub.requests, notifier.failed) == (1, 1)
+    assert notify.get_notifier() is not notifier
+
+
+def test_close_notifier_does_not_wait_past_the_deadline(stub, monkeypatch):
+    stub.delay = 2
+    monkeypatch.setitem(config, "slack_webhook", stub.url)
+    monkeypatch.setitem(config["slack"], "coalesce_seconds", 0)
+    send_slack_notification("Pipeline started")
+
+    started = time.monotonic()
+    close_notifier(timeout=0.3)
+    assert time.monotonic() - started < 1.5
+    assert stub.messages == []
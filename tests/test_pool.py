@@ -0,0 +1,130 @@
+"""
+The warehouse connection pool (load/load_utils.ConnectionPool) on fake
+connections (load/fake_connector.py).
+"""
+import threading
+
+import pytest
+
+from load import fake_connector
+from load.fake_connector import FakeConnection
+from load.load_utils import ConnectionPool
+
+
+class BrokenConnection(FakeConnection):
+    """Open connection whose statements all fail, e.g. after a network drop."""
+
+    def cursor(self):
+        cursor = super().cursor()
+
+        def execute(statement, *args, **kwargs):
+            raise ConnectionError("connection reset by peer")
+
+        cursor.execute = execute
+        return cursor
+
+
+def test_pool_opens_at_most_max_size_connections():
+    pool = ConnectionPool(fake_connector.connect, max_size=2, acquire_timeout=0.1)
+    first, second = pool.acquire(), pool.acquire()
+    assert first is not second
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+
+    pool.release(first)
+    assert pool.acquire() is first
+
+
+def test_acquire_waits_for_a_released_connection():
+    pool = ConnectionPool(fake_connector.connect, max_size=1, acquire_timeout=5)
+    conn = pool.acquire()
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+    waiter.start()
+    waiter.join(0.2)
+    assert waiter.is_alive() and not acquired
+
+    pool.release(conn)
+    waiter.join(5)
+    assert acquired == [conn]
+
+
+def test_closed_connections_are_replaced():
+    pool = ConnectionPool(fake_connector.connect, max_size=1)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.close()
+
+    replacement = pool.acquire()
+    assert replacement is not conn and not replacement.is_closed()
+
+
+def test_idle_connections_are_checked_after_validate_after():
+    pool = ConnectionPool(fake_connector.connect, max_size=1, validate_after=60)
+    conn = pool.acquire()
+    pool.release(conn)
+    assert pool.acquire() is conn
+    assert list(conn.statements) == []
+
+    pool.validate_after = 0
+    pool.release(conn)
+    assert pool.acquire() is conn
+    assert list(conn.statements) == ["SELECT 1"]
+
+
+def test_connections_failing_the_check_are_discarded():
+    connections = iter([BrokenConnection(), FakeConnection()])
+    pool = ConnectionPool(lambda: next(connections), max_size=1, validate_after=0)
+    broken = pool.acquire()
+    pool.release(broken)
+
+    # The broken connection is closed and its slot reused for a new one
+    healthy = pool.acquire()
+    assert isinstance(healthy, FakeConnection) and not isinstance(healthy, BrokenConnection)
+    assert broken.is_closed()
+
+
+def test_failed_bodies_roll_back_and_failed_rollbacks_discard():
+    pool = ConnectionPool(fake_connector.connect, max_size=1)
+    with pytest.raises(ValueError):
+        with pool.connection() as conn:
+            raise ValueError("load failed")
+    assert pool.acquire() is conn
+    pool.release(conn)
+
+    def rollback():
+        raise ConnectionError("connection reset by peer")
+
+    conn.rollback = rollback
+    with pytest.raises(ValueError):
+        with pool.connection():
+            raise ValueError("load failed")
+    assert conn.is_closed()
+    assert pool.acquire() is not conn
+
+
+def test_close_closes_idle_connections_and_refuses_checkouts():
+    pool = ConnectionPool(fake_connector.connect, max_size=2)
+    idle, busy = pool.acquire(), pool.acquire()
+    pool.release(idle)
+
+    pool.close()
+    assert idle.is_closed() and not busy.is_closed()
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+    # Connections checked out during close() are closed when they come back
+    pool.release(busy)
+    assert busy.is_closed()
+
+
+def test_recorded_statements_are_bounded():
+    fake_connector.reset()
+    cursor = fake_connector.connect().cursor()
+    for n in range(fake_connector.MAX_RECORDED + 5):
+        cursor.execute(f"SELECT {n}")
+
+    for recorded in (fake_connector.EXECUTED, cursor.connection.statements):
+        assert len(recorded) == fake_connector.MAX_RECORDED
+        assert recorded[0] == "SELECT 5"
+    fake_connector.reset()
+    assert not fake_connector.EXECUTED
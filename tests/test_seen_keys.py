@@ -0,0 +1,45 @@
+"""
+Cross-chunk key dedup (transform/seen_keys.py).
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from transform import seen_keys
+from transform.seen_keys import ExactSeenKeys
+
+
+def _filter(keys: ExactSeenKeys, chunks: list[list]) -> list[list]:
+    kept = []
+    for chunk in chunks:
+        series = pd.Series(chunk, dtype="str")
+        kept.append([None if pd.isna(key) else key for key in series[keys.filter_new(series)]])
+    return kept
+
+
+@pytest.mark.parametrize("collide", [False, True], ids=["hashes", "colliding-hashes"])
+def test_exact_keys_keep_the_first_row_of_every_key(monkeypatch, collide):
+    if collide:
+        # Every key gets the same code: only the values tell them apart
+        monkeypatch.setattr(seen_keys, "encode_keys", lambda keys: np.zeros(len(keys), dtype="uint64"))
+    chunks = [
+        ["CLM001", "CLM002", "CLM001", "CLM003"],
+        ["CLM004", "CLM002", "CLM005", None],
+        ["CLM005", "CLM006", None, "CLM001"],
+        ["CLM007", "CLM008", "CLM009", "CLM010"],
+    ]
+    with ExactSeenKeys() as keys:
+        kept = _filter(keys, chunks)
+        assert len(keys) == 11
+    assert kept == [
+        ["CLM001", "CLM002", "CLM003"],
+        ["CLM004", "CLM005", None],
+        ["CLM006"],
+        ["CLM007", "CLM008", "CLM009", "CLM010"],
+    ]
+
+
+def test_exact_keys_match_values_across_dtypes():
+    with ExactSeenKeys() as keys:
+        keys.filter_new(pd.Series(["A", "B"], dtype="category"))
+        assert keys.filter_new(pd.Series(["B", "C"], dtype="object")).tolist() == [False, True]
@@ -0,0 +1,74 @@
+"""
+pyarrow.compute versions of the cleaning kernels in transform/cleaning.py,
+used by the Arrow engine. Each one returns the same values as its pandas
+counterpart (see tests/test_engines.py).
+"""
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from transform.cleaning import DEFAULT_PHONE, GENDER_CODES
+
+
+def _filled(values: pa.ChunkedArray, fill_value=None) -> pa.ChunkedArray:
+    return values if fill_value is None else pc.fill_null(values, fill_value)
+
+
+def clean_title(values: pa.ChunkedArray, fill_value=None) -> pa.ChunkedArray:
+    """
+    Strip surrounding whitespace and title-case (names, addresses, cities).
+    """
+    return pc.utf8_title(pc.utf8_trim_whitespace(_filled(values, fill_value)))
+
+
+def clean_upper(values: pa.ChunkedArray, fill_value=None) -> pa.ChunkedArray:
+    """
+    Strip surrounding whitespace and upper-case (state codes).
+    """
+    return pc.utf8_upper(pc.utf8_trim_whitespace(_filled(values, fill_value)))
+
+
+def clean_email(values: pa.ChunkedArray, fill_value=None) -> pa.ChunkedArray:
+    """
+    Strip surrounding whitespace and lower-case e-mail addresses.
+    """
+    return pc.utf8_lower(pc.utf8_trim_whitespace(_filled(values, fill_value)))
+
+
+def clean_gender(values: pa.ChunkedArray, other: str = "O") -> pa.ChunkedArray:
+    """
+    Map free-text gender values to 'M', 'F' or `other`.
+    """
+    normalized = pc.utf8_trim_whitespace(pc.utf8_upper(values))
+    positions = pc.index_in(normalized, value_set=pa.array(list(GENDER_CODES)))
+    return pc.fill_null(pc.take(pa.array(list(GENDER_CODES.values())), positions), other)
+
+
+def clean_zip(values: pa.ChunkedArray, width: int = 5) -> pa.ChunkedArray:
+    """
+    Left-pad ZIP codes with zeros and cut them to `width` characters.
+    """
+    values = pc.cast(values, pa.string())
+    # str.zfill keeps a leading sign in front of the zeros
+    signed = pc.fill_null(pc.starts_with(values, "-"), False)
+    signed = pc.or_(signed, pc.fill_null(pc.starts_with(values, "+"), False))
+    padded = pc.if_else(
+        signed,
+        pc.binary_join_element_wise(
+            pc.utf8_slice_codeunits(values, 0, 1),
+            pc.utf8_lpad(pc.utf8_slice_codeunits(values, 1), width - 1, "0"),
+            "",
+        ),
+        pc.utf8_lpad(values, width, "0"),
+    )
+    return pc.utf8_slice_codeunits(padded, 0, width)
+
+
+def format_phone(values: pa.ChunkedArray, default: str = DEFAULT_PHONE) -> pa.ChunkedArray:
+    """
+    Keep the digits of a phone number and format 10-digit numbers as
+    XXX-XXX-XXXX; anything else (including missing values) becomes `default`.
+    """
+    digits = pc.replace_substring_regex(pc.cast(values, pa.string()), r"\D", "")
+    formatted = pc.replace_substring_regex(digits, r"^(\d{3})(\d{3})(\d{4})$", r"\1-\2-\3")
+    valid = pc.fill_null(pc.equal(pc.utf8_length(digits), 10), False)
+    return pc.if_else(valid, formatted, default)
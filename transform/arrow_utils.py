@@ -0,0 +1,222 @@
+"""
+pyarrow.compute versions of the transform helpers in transform_utils, used by
+the Arrow engine (PIPELINE_ENGINE=arrow).
+
+They take and return pyarrow Tables and update the same TransformReport
+counters. Values come out the same as with the pandas helpers, so both
+engines stage identical rows with identical ROW_HASHes (computed by Polars
+for every engine, see transform/row_hash.py). pandas is used for the
+distinct date strings that need format inference.
+
+Categorical columns stay plain strings through the transform and are
+dictionary-encoded by apply_schema_dtypes at the end.
+
+The first helpers accept a DataFrame or a Table, for the code shared by both
+engines (reference checks, staging).
+"""
+import numpy as np
+import pandas as pd
+import polars as pl
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from config.schemas import ROW_HASH_COLUMN, EntitySchema
+from transform.row_hash import row_hash_values
+from transform.seen_keys import SeenKeys
+from transform.transform_utils import (
+    DATE_SAMPLE_SIZE, TransformReport, parse_mixed_dates, resolve_date_format
+)
+
+# Row numbers appended while deduplicating
+_ROW_COLUMN = "__row"
+
+
+def is_table(data) -> bool:
+    """Whether `data` is a pyarrow Table (Arrow engine) rather than a DataFrame."""
+    return isinstance(data, pa.Table)
+
+
+def column_names(data: pd.DataFrame | pa.Table) -> list[str]:
+    return data.column_names if is_table(data) else list(data.columns)
+
+
+def column_series(data: pd.DataFrame | pa.Table, column: str) -> pd.Series:
+    """One column of a DataFrame or Table as a pandas Series."""
+    return data.column(column).to_pandas() if is_table(data) else data[column]
+
+
+def filter_rows(data: pd.DataFrame | pa.Table, mask: np.ndarray) -> pd.DataFrame | pa.Table:
+    """Rows of a DataFrame or Table where the boolean `mask` is True."""
+    return data.filter(pa.array(mask, type=pa.bool_())) if is_table(data) else data[mask]
+
+
+def _missing(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    # pandas counts NaN as missing too
+    return pc.is_null(column, nan_is_null=True)
+
+
+def _count(mask: pa.ChunkedArray) -> int:
+    return int(pc.sum(mask).as_py() or 0)
+
+
+def _set(table: pa.Table, column: str, values) -> pa.Table:
+    return table.set_column(table.column_names.index(column), column, values)
+
+
+def normalize_columns(table: pa.Table, schema: EntitySchema) -> pa.Table:
+    """
+    Upper-case and strip column names, apply the schema aliases and make sure
+    the entity key column is present.
+    """
+    names = [str(c).strip().upper() for c in table.column_names]
+    table = table.rename_columns([schema.aliases.get(c, c) for c in names])
+    if schema.key not in table.column_names:
+        raise ValueError(f"❌ {schema.key} column missing after normalization.")
+    return table
+
+
+def drop_duplicate_keys(
+    table: pa.Table, schema: EntitySchema, report: TransformReport, seen_keys: SeenKeys | None = None
+) -> pa.Table:
+    """
+    Keep the first row per entity key (missing keys count as one key) and
+    count the dropped duplicates. With `seen_keys` (chunked transforms), keys
+    already kept from earlier chunks are dropped as well.
+    """
+    rows = table.num_rows
+    if seen_keys is not None:
+        table = filter_rows(table, seen_keys.filter_new(column_series(table, schema.key)))
+    elif rows:
+        numbered = pa.table({schema.key: table.column(schema.key), _ROW_COLUMN: pa.array(np.arange(rows))})
+        first = numbered.group_by(schema.key).aggregate([(_ROW_COLUMN, "min")]).column(f"{_ROW_COLUMN}_min")
+        if len(first) < rows:
+            table = table.take(np.sort(first.to_numpy()))
+    report.duplicates_dropped += rows - table.num_rows
+    return table
+
+
+def fill_missing(table: pa.Table, defaults: dict, report: TransformReport) -> pa.Table:
+    """
+    Fill missing values of the given columns with their defaults, counting
+    the filled cells. Columns absent from the table are ignored.
+    """
+    for column, value in defaults.items():
+        if column not in table.column_names:
+            continue
+        values = table.column(column)
+        if pa.types.is_null(values.type):
+            values = values.cast(pa.scalar(value).type)
+        missing = _missing(values)
+        count = _count(missing)
+        if count:
+            table = _set(table, column, pc.if_else(missing, pa.scalar(value, type=values.type), values))
+            report._add(report.cells_filled, column, count)
+    return table
+
+
+def rewrite_column(table: pa.Table, column: str, cleaned, report: TransformReport) -> pa.Table:
+    """
+    Replace a column with its cleaned version, counting the values that
+    actually changed (missing values count as equal to each other).
+    """
+    old = table.column(column)
+    differs = pc.fill_null(pc.not_equal(old, cleaned), False)
+    changed = pc.or_(differs, pc.xor(pc.is_null(old), pc.is_null(cleaned)))
+    report._add(report.values_rewritten, column, _count(changed))
+    return _set(table, column, cleaned)
+
+
+def to_float(values: pa.ChunkedArray) -> pa.ChunkedArray:
+    """
+    Cast a column to float64; unparseable values become null. Columns the
+    Arrow cast rejects are converted like pd.to_numeric(errors="coerce").
+    """
+    if pa.types.is_float64(values.type):
+        return values
+    try:
+        return pc.cast(values, pa.float64())
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        numbers = pd.to_numeric(values.to_pandas(), errors="coerce").astype("float64")
+        return pa.chunked_array([pa.array(numbers.to_numpy(), from_pandas=True)])
+
+
+def coerce_numeric(table: pa.Table, column: str, report: TransformReport) -> pa.Table:
+    """
+    Convert a column to numbers; unparseable values become null and are counted.
+    """
+    values = table.column(column)
+    missing_before = _count(_missing(values))
+    values = to_float(values)
+    report._add(report.values_coerced_to_null, column, _count(_missing(values)) - missing_before)
+    return _set(table, column, values)
+
+
+def parse_dates(values: pa.ChunkedArray, date_format: str | None, cache_key: tuple[str, str] | None = None) -> pa.ChunkedArray:
+    """
+    Parse a date column to timestamp[s]; unparseable values become null.
+
+    The format is resolved from a sample of the distinct values exactly like
+    transform_utils.parse_dates, then every value is parsed with
+    pyarrow.compute.strptime. The rare distinct values that do not match it
+    go through pandas' per-value inference.
+    """
+    if not pa.types.is_string(values.type) and not pa.types.is_large_string(values.type):
+        values = pc.cast(values, pa.string())
+    uniques = pc.unique(values).drop_null()
+    if not len(uniques):
+        return pa.chunked_array([pa.nulls(len(values), pa.timestamp("s"))])
+    sample = pd.Index(uniques.slice(0, DATE_SAMPLE_SIZE).to_pylist(), dtype="str")
+    date_format = resolve_date_format(sample, date_format, cache_key)
+
+    if date_format:
+        parsed = pc.strptime(values, format=date_format, unit="s", error_is_null=True)
+    else:
+        parsed = pa.chunked_array([pa.nulls(len(values), pa.timestamp("s"))])
+    failed = pc.and_(pc.is_valid(values), pc.is_null(parsed))
+    if _count(failed):
+        distinct = pc.unique(pc.filter(values, failed))
+        fallback = parse_mixed_dates(pd.Index(distinct.to_pylist(), dtype="str"), after_format=bool(date_format))
+        fallback = pa.array(fallback.as_unit("s").to_numpy(), type=pa.timestamp("s"), from_pandas=True)
+        parsed = pc.if_else(failed, pc.take(fallback, pc.index_in(values, value_set=distinct)), parsed)
+    return parsed
+
+
+def parse_date_columns(table: pa.Table, schema: EntitySchema, report: TransformReport) -> pa.Table:
+    """
+    Parse every registered date column present in the table; unparseable
+    values become null and are counted.
+    """
+    for column in schema.date_columns:
+        if column in table.column_names:
+            values = table.column(column)
+            parsed = parse_dates(values, schema.column(column).date_format, (schema.name, column))
+            report._add(report.values_coerced_to_null, column, parsed.null_count - values.null_count)
+            table = _set(table, column, parsed)
+    return table
+
+
+def apply_schema_dtypes(table: pa.Table, schema: EntitySchema) -> pa.Table:
+    """
+    Cast the entity's columns to their registered types: dictionary-encoded
+    strings for categories, float64 amounts and parsed dates.
+    """
+    for spec in schema.columns:
+        if spec.name not in table.column_names:
+            continue
+        values = table.column(spec.name)
+        if spec.dtype == "category" and not pa.types.is_dictionary(values.type):
+            table = _set(table, spec.name, pc.dictionary_encode(values))
+        elif spec.dtype == "float64" and not pa.types.is_float64(values.type):
+            table = _set(table, spec.name, to_float(values))
+        elif spec.dtype == "datetime" and not pa.types.is_timestamp(values.type):
+            table = _set(table, spec.name, parse_dates(values, spec.date_format))
+    return table
+
+
+def add_row_hash(table: pa.Table, schema: EntitySchema) -> pa.Table:
+    """
+    Append ROW_HASH, computed exactly like transform_utils.add_row_hash; the
+    hashed columns are handed to Polars without copying them.
+    """
+    columns = pl.from_arrow(table.select([c for c in schema.column_names if c in table.column_names]))
+    return table.append_column(ROW_HASH_COLUMN, pa.array(row_hash_values(columns, schema)))
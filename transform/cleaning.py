@@ -0,0 +1,92 @@
+"""
+Vectorized cleaning kernels shared by the customer and agent transforms.
+
+Every kernel is built from whole-column string ops (no per-row Python). For
+categorical columns (GENDER, CITY, STATE, AGENCY_NAME) a kernel only cleans
+the distinct categories and broadcasts the result through the integer codes,
+so the work no longer grows with the number of rows.
+"""
+import pandas as pd
+
+DEFAULT_PHONE = "000-000-0000"
+
+GENDER_CODES = {
+    "MALE": "M", "M": "M",
+    "FEMALE": "F", "F": "F",
+}
+
+
+def _apply(series: pd.Series, kernel, fill_value=None) -> pd.Series:
+    """
+    Apply `kernel` (a Series -> Series function of vectorized ops) to a column.
+
+    Args:
+        series (pd.Series): Input column (string, object or categorical).
+        kernel (Callable): Vectorized cleaning function.
+        fill_value: Value cleaned in place of missing entries (default: keep them missing).
+
+    Returns:
+        pd.Series: Cleaned column with the input's index and name; categorical
+        input gives a categorical result.
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return kernel(series if fill_value is None else series.fillna(fill_value))
+
+    categories = series.cat.categories
+    missing = pd.Series([fill_value], dtype=categories.dtype)
+    # Missing rows have code -1, which picks the appended last slot
+    distinct = pd.concat([pd.Series(categories), missing], ignore_index=True)
+    # Cleaning can merge categories (" ny" and "NY"), so factorize the results again
+    cleaned_codes, cleaned = pd.factorize(kernel(distinct), use_na_sentinel=True)
+    codes = cleaned_codes[series.cat.codes.to_numpy()]
+    return pd.Series(
+        pd.Categorical.from_codes(codes, categories=cleaned), index=series.index, name=series.name
+    )
+
+
+def clean_title(series: pd.Series, fill_value=None) -> pd.Series:
+    """
+    Strip surrounding whitespace and title-case (names, addresses, cities).
+    """
+    return _apply(series, lambda s: s.str.strip().str.title(), fill_value)
+
+
+def clean_upper(series: pd.Series, fill_value=None) -> pd.Series:
+    """
+    Strip surrounding whitespace and upper-case (state codes).
+    """
+    return _apply(series, lambda s: s.str.strip().str.upper(), fill_value)
+
+
+def clean_email(series: pd.Series, fill_value=None) -> pd.Series:
+    """
+    Strip surrounding whitespace and lower-case e-mail addresses.
+    """
+    return _apply(series, lambda s: s.str.strip().str.lower(), fill_value)
+
+
+def clean_gender(series: pd.Series, other: str = "O") -> pd.Series:
+    """
+    Map free-text gender values to 'M', 'F' or `other`.
+    """
+    return _apply(series, lambda s: s.str.upper().str.strip().map(GENDER_CODES).fillna(other))
+
+
+def clean_zip(series: pd.Series, width: int = 5) -> pd.Series:
+    """
+    Left-pad ZIP codes with zeros and cut them to `width` characters.
+    """
+    return _apply(series, lambda s: s.astype(str).str.zfill(width).str[:width])
+
+
+def format_phone(series: pd.Series, default: str = DEFAULT_PHONE) -> pd.Series:
+    """
+    Keep the digits of a phone number and format 10-digit numbers as
+    XXX-XXX-XXXX; anything else (including missing values) becomes `default`.
+    """
+    def kernel(values: pd.Series) -> pd.Series:
+        digits = values.astype(str).str.replace(r"\D", "", regex=True)
+        formatted = digits.str.replace(r"^(\d{3})(\d{3})(\d{4})$", r"\1-\2-\3", regex=True)
+        return formatted.where(digits.str.len() == 10, default)
+
+    return _apply(series, kernel)
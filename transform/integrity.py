@@ -0,0 +1,245 @@
+"""
+Referential integrity checks on the transformed frames, before anything is
+staged or loaded.
+
+Each entity declares its foreign keys in the schema registry
+(EntitySchema.references). The keys of every referenced entity are gathered
+as a sorted array of 64-bit hashes while it is staged, merged with its key
+index (keys loaded by earlier runs) when there is one, and handed to the
+entities that reference it. Their rows are then checked with one vectorized
+lookup per reference column; orphans are counted and, in "quarantine" mode,
+written to a quarantine file instead of being loaded.
+"""
+import os
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from config.config import config
+from config.schemas import SCHEMAS, EntitySchema
+from load.key_index import KeyIndex, encode_index_keys
+from transform.arrow_utils import column_names, column_series, filter_rows, is_table
+from utils.logger import RUN_ID_ENV
+
+# "off", "warn" (count and report orphans, load them anyway) or "quarantine"
+CHECK_MODES = ("off", "warn", "quarantine")
+
+# Column added to quarantined rows: the reference columns that had no match
+ORPHAN_COLUMN = "ORPHAN_REFERENCES"
+
+# Orphan values kept per column as examples in the report
+SAMPLE_SIZE = 5
+
+
+def referenced_entities() -> set[str]:
+    """
+    Entities whose keys are referenced by another entity.
+    """
+    return {parent for schema in SCHEMAS.values() for parent in schema.references.values()}
+
+
+def reference_dependencies(entities) -> dict[str, list[str]]:
+    """
+    Entity -> referenced entities among `entities`, i.e. what has to be
+    prepared first so its keys are known.
+    """
+    return {
+        name: sorted({p for p in SCHEMAS[name].references.values() if p in entities and p != name})
+        for name in entities
+    }
+
+
+@dataclass
+class KnownKeys:
+    """
+    Keys of one entity that references may point at.
+
+    Args:
+        entity (str): Entity name in the schema registry.
+        codes (np.ndarray): Sorted, unique key hashes (see encode_index_keys).
+        complete (bool): False when keys loaded by earlier runs are unknown
+            (incremental read without a key index); references to the entity
+            are then not checked.
+    """
+    entity: str
+    codes: np.ndarray
+    complete: bool
+
+    @classmethod
+    def collect(cls, entity: str, chunks: list[np.ndarray], full_read: bool, key_index: KeyIndex | None = None):
+        """
+        Combine the key hashes staged in this run with the entity's key index.
+
+        Args:
+            entity (str): Entity name in the schema registry.
+            chunks (list[np.ndarray]): Key hashes of the staged chunks.
+            full_read (bool): Whether the whole source file was read in this run.
+            key_index (KeyIndex | None): Index of the keys loaded by earlier runs.
+        """
+        codes = [np.asarray(c, dtype=np.uint64) for c in chunks]
+        loaded = key_index.codes() if key_index is not None else None
+        if loaded is not None:
+            codes.append(np.asarray(loaded))
+        merged = np.unique(np.concatenate(codes)) if codes else np.array([], dtype=np.uint64)
+        return cls(entity, merged, full_read or loaded is not None)
+
+
+@dataclass
+class IntegrityReport:
+    """
+    Outcome of the reference checks of one entity.
+
+    Args:
+        entity (str): Entity name in the schema registry.
+        mode (str): One of CHECK_MODES.
+        rows_checked (int): Rows whose references were checked.
+        orphan_rows (int): Rows with at least one orphan reference.
+        quarantined (int): Orphan rows written to the quarantine file instead of loaded.
+        orphans (dict[str, int]): Reference column -> rows whose value has no match.
+        samples (dict[str, list[str]]): Reference column -> a few orphan values.
+        unchecked (dict[str, str]): Reference column -> why it could not be checked.
+        quarantine_path (str | None): File holding the quarantined rows.
+    """
+    entity: str
+    mode: str = "warn"
+    rows_checked: int = 0
+    orphan_rows: int = 0
+    quarantined: int = 0
+    orphans: dict[str, int] = field(default_factory=dict)
+    samples: dict[str, list[str]] = field(default_factory=dict)
+    unchecked: dict[str, str] = field(default_factory=dict)
+    quarantine_path: str | None = None
+
+    def summary(self) -> str:
+        """
+        One-line human-readable summary.
+        """
+        parts = [f"{self.rows_checked} rows checked", f"{self.orphan_rows} with orphan references"]
+        if self.orphans:
+            parts.append(", ".join(
+                f"{column}={count} (e.g. {', '.join(self.samples.get(column, []))})"
+                for column, count in self.orphans.items()
+            ))
+        if self.quarantined:
+            parts.append(f"{self.quarantined} quarantined to {self.quarantine_path}")
+        if self.unchecked:
+            parts.append("not checked: " + ", ".join(f"{c} ({reason})" for c, reason in self.unchecked.items()))
+        return f"{self.entity}: " + "; ".join(parts)
+
+    def to_dict(self) -> dict:
+        return {
+            "entity": self.entity,
+            "mode": self.mode,
+            "rows_checked": self.rows_checked,
+            "orphan_rows": self.orphan_rows,
+            "quarantined": self.quarantined,
+            "orphans": dict(self.orphans),
+            "samples": dict(self.samples),
+            "unchecked": dict(self.unchecked),
+            "quarantine_path": self.quarantine_path,
+        }
+
+
+class ReferenceChecker:
+    """
+    Check the reference columns of an entity's chunks against the known keys
+    of the entities they point at.
+
+    Args:
+        schema (EntitySchema): Registered schema of the checked entity.
+        parents (dict[str, KnownKeys]): Referenced entity -> its known keys.
+        mode (str): "warn" or "quarantine" (see CHECK_MODES).
+        quarantine_path (str | None): CSV file receiving quarantined rows.
+    """
+
+    def __init__(
+        self,
+        schema: EntitySchema,
+        parents: dict[str, KnownKeys],
+        mode: str = "warn",
+        quarantine_path: str | None = None,
+    ):
+        if mode not in CHECK_MODES or mode == "off":
+            raise ValueError(f"❌ Unknown reference check mode '{mode}'. Expected 'warn' or 'quarantine'.")
+        self.schema = schema
+        self.mode = mode
+        self.report = IntegrityReport(schema.name, mode)
+        self._quarantine_path = quarantine_path
+        self._checks: dict[str, np.ndarray] = {}
+        for column, parent in schema.references.items():
+            known = parents.get(parent)
+            if known is None:
+                self.report.unchecked[column] = f"{parent} keys not available"
+            elif not known.complete:
+                self.report.unchecked[column] = f"{parent} keys from earlier runs unknown"
+            else:
+                self._checks[column] = known.codes
+
+    def check(self, df: pd.DataFrame):
+        """
+        Count the orphan references of a chunk (DataFrame or, from the Arrow
+        engine, pyarrow Table) and return the rows to load (all of them in
+        "warn" mode, the others in "quarantine" mode).
+        """
+        self.report.rows_checked += len(df)
+        orphan = np.zeros(len(df), dtype=bool)
+        failed: dict[str, np.ndarray] = {}
+        for column, codes in self._checks.items():
+            if column not in column_names(df):
+                continue
+            values = column_series(df, column)
+            # Missing references are not orphans (the column is nullable)
+            present = np.flatnonzero(values.notna().to_numpy())
+            needles = encode_index_keys(values)
+            if len(codes):
+                pos = np.searchsorted(codes, needles)
+                np.minimum(pos, len(codes) - 1, out=pos)
+                missing = codes[pos] != needles
+            else:
+                missing = np.ones(len(needles), dtype=bool)
+            if not missing.any():
+                continue
+            rows = present[missing]
+            failed[column] = rows
+            orphan[rows] = True
+            self._record(column, values.iloc[rows])
+
+        count = int(orphan.sum())
+        if not count:
+            return df
+        self.report.orphan_rows += count
+        if self.mode == "warn":
+            return df
+        self._quarantine(df, orphan, failed)
+        return filter_rows(df, ~orphan)
+
+    def _record(self, column: str, values: pd.Series):
+        self.report.orphans[column] = self.report.orphans.get(column, 0) + len(values)
+        samples = self.report.samples.setdefault(column, [])
+        if len(samples) < SAMPLE_SIZE:
+            for value in values.drop_duplicates().head(SAMPLE_SIZE).astype(str):
+                if value not in samples and len(samples) < SAMPLE_SIZE:
+                    samples.append(value)
+
+    def _quarantine(self, df: pd.DataFrame, orphan: np.ndarray, failed: dict[str, np.ndarray]):
+        rows = filter_rows(df, orphan)
+        rows = rows.to_pandas() if is_table(rows) else rows.copy()
+        reasons = pd.Series("", index=range(len(df)))
+        for column, positions in failed.items():
+            reasons.iloc[positions] += f"{column};"
+        rows[ORPHAN_COLUMN] = reasons[orphan].str.rstrip(";").to_numpy()
+        path = self._quarantine_path or quarantine_path(self.schema.name)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # One file per entity and run; chunks are appended
+        rows.to_csv(path, mode="a", index=False, header=not self.report.quarantined)
+        self.report.quarantined += len(rows)
+        self.report.quarantine_path = path
+
+
+def quarantine_path(entity: str, run_id: str | None = None) -> str:
+    """
+    <quarantine_dir>/<run_id>/<entity>.csv for the current run.
+    """
+    run_id = run_id or os.environ.get(RUN_ID_ENV) or "manual"
+    return os.path.join(config["integrity"]["quarantine_dir"], run_id, f"{entity}.csv")
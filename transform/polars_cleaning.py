@@ -0,0 +1,91 @@
+"""
+Polars expression versions of the cleaning kernels in transform/cleaning.py,
+used by the Polars engine. Each one returns the same values as its pandas
+counterpart (see tests/test_engines.py).
+
+Every kernel is a native Polars expression. Polars' case mapping matches
+pandas' on ASCII text but not on some other letters (e.g. 'ß', ligatures,
+word boundaries after 'ª'), so the case-mapping kernels hand the values
+holding non-ASCII characters, and only those, to the Arrow kernels.
+"""
+import polars as pl
+import pyarrow as pa
+
+from transform import arrow_cleaning
+from transform.cleaning import DEFAULT_PHONE, GENDER_CODES
+
+# Characters str.strip() removes (str.isspace()), for strip_chars
+_WHITESPACE = (
+    "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005"
+    "\u2006\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000"
+)
+
+
+def _non_ascii_fallback(columns: pl.Series, kernel) -> pl.Series:
+    # Re-map the values Polars may map differently from pandas with the Arrow kernel
+    values, mapped = columns.struct.field("values"), columns.struct.field("mapped")
+    # A value holds non-ASCII characters when it has more UTF-8 bytes than characters
+    rows = (values.str.len_bytes() != values.str.len_chars()).fill_null(False).arg_true()
+    if not len(rows):
+        return mapped
+    fixed = kernel(pa.chunked_array([values.gather(rows).to_arrow(compat_level=pl.CompatLevel.oldest())]))
+    return mapped.scatter(rows, pl.from_arrow(fixed))
+
+
+def _case_mapping(expr: pl.Expr, case, kernel, fill_value=None) -> pl.Expr:
+    values = expr.cast(pl.String)
+    if fill_value is not None:
+        values = values.fill_null(pl.lit(fill_value))
+    mapped = case(values.str.strip_chars(_WHITESPACE))
+    return pl.struct(values.alias("values"), mapped.alias("mapped")).map_batches(
+        lambda columns: _non_ascii_fallback(columns, kernel), return_dtype=pl.String
+    )
+
+
+def clean_title(expr: pl.Expr, fill_value=None) -> pl.Expr:
+    """
+    Strip surrounding whitespace and title-case (names, addresses, cities).
+    """
+    return _case_mapping(expr, lambda values: values.str.to_titlecase(), arrow_cleaning.clean_title, fill_value)
+
+
+def clean_upper(expr: pl.Expr, fill_value=None) -> pl.Expr:
+    """
+    Strip surrounding whitespace and upper-case (state codes).
+    """
+    return _case_mapping(expr, lambda values: values.str.to_uppercase(), arrow_cleaning.clean_upper, fill_value)
+
+
+def clean_email(expr: pl.Expr, fill_value=None) -> pl.Expr:
+    """
+    Strip surrounding whitespace and lower-case e-mail addresses.
+    """
+    return _case_mapping(expr, lambda values: values.str.to_lowercase(), arrow_cleaning.clean_email, fill_value)
+
+
+def clean_gender(expr: pl.Expr, other: str = "O") -> pl.Expr:
+    """
+    Map free-text gender values to 'M', 'F' or `other`.
+    """
+    normalized = expr.cast(pl.String).str.to_uppercase().str.strip_chars(_WHITESPACE)
+    return normalized.replace_strict(GENDER_CODES, default=other, return_dtype=pl.String)
+
+
+def clean_zip(expr: pl.Expr, width: int = 5) -> pl.Expr:
+    """
+    Left-pad ZIP codes with zeros (after a leading sign, like str.zfill) and
+    cut them to `width` characters.
+    """
+    return expr.cast(pl.String).str.zfill(width).str.slice(0, width)
+
+
+def format_phone(expr: pl.Expr, default: str = DEFAULT_PHONE) -> pl.Expr:
+    """
+    Keep the digits of a phone number and format 10-digit numbers as
+    XXX-XXX-XXXX; anything else (including missing values) becomes `default`.
+    """
+    # ASCII digits only, like the \\d of pandas' (RE2) regular expressions
+    digits = expr.cast(pl.String).str.replace_all(r"[^0-9]", "")
+    formatted = digits.str.replace(r"^([0-9]{3})([0-9]{3})([0-9]{4})$", "${1}-${2}-${3}")
+    valid = (digits.str.len_bytes() == 10).fill_null(False)
+    return pl.when(valid).then(formatted).otherwise(pl.lit(default))
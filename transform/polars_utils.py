@@ -0,0 +1,280 @@
+"""
+Polars lazy-frame versions of the transform helpers in transform_utils, used
+by the Polars engine (PIPELINE_ENGINE=polars).
+
+A LazyTransform wraps one entity's lazy plan. Each step extends the plan,
+and the changes it makes are counted by flag columns added to the same plan,
+so collect() evaluates every expression once and Polars optimizes the whole
+transform and runs independent column expressions on its thread pool.
+
+Values come out the same as with the pandas helpers, so every engine stages
+identical rows with identical ROW_HASHes; the plan computes ROW_HASH itself
+with the expression shared by every engine (transform/row_hash.py). Dates
+are parsed by str.strptime with the format transform_utils resolves from a
+sample of the column. pandas only sees the rare values that need more: the
+distinct date strings that do not match the format and the distinct amounts
+the Polars cast rejects.
+
+The engine reads and stages pyarrow Tables like the Arrow engine; the
+conversions to and from Polars do not copy the column buffers.
+"""
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+import polars as pl
+import pyarrow as pa
+
+from config.schemas import EntitySchema
+from transform.row_hash import row_hash_expr
+from transform.seen_keys import SeenKeys
+from transform.transform_utils import DATE_SAMPLE_SIZE, TransformReport, parse_mixed_dates, resolve_date_format
+
+# Prefixes of the cleaned columns held next to the originals until counted,
+# and of the columns counting the changes
+_NEW_PREFIX = "__new_"
+_COUNT_PREFIX = "__count_"
+
+
+def _is_missing(expr: pl.Expr, dtype: pl.DataType) -> pl.Expr:
+    # pandas counts NaN as missing too
+    return expr.is_null() | expr.is_nan() if dtype.is_float() else expr.is_null()
+
+
+def _to_float(values: pl.Series) -> pl.Series:
+    """
+    Cast to float64 like pd.to_numeric(errors="coerce"). The distinct values
+    the Polars cast rejects (e.g. padded with spaces) go through pandas.
+    """
+    numbers = values.cast(pl.Float64, strict=False)
+    failed = numbers.is_null() & values.is_not_null()
+    if not failed.any():
+        return numbers
+    distinct = values.filter(failed).unique()
+    parsed = pd.to_numeric(pd.Series(distinct.cast(pl.String).to_list(), dtype="str"), errors="coerce")
+    fallback = values.replace_strict(
+        distinct, pl.Series(parsed.to_numpy(dtype="float64"), nan_to_null=True), default=None, return_dtype=pl.Float64
+    )
+    return numbers.zip_with(~failed, fallback)
+
+
+def to_float(column: str) -> pl.Expr:
+    """Expression casting a column to float64; unparseable values become null."""
+    return pl.col(column).map_batches(_to_float, return_dtype=pl.Float64)
+
+
+def _parse_failed_dates(columns: pl.Series, after_format: bool) -> pl.Series:
+    """
+    Fill in the dates str.strptime left null: the distinct strings that did
+    not parse are parsed by pandas' per-value inference.
+    """
+    values, parsed = columns.struct.field("values"), columns.struct.field("parsed")
+    failed = parsed.is_null() & values.is_not_null()
+    if not failed.any():
+        return parsed
+    distinct = values.filter(failed).unique(maintain_order=True)
+    fallback = parse_mixed_dates(pd.Index(distinct.to_list(), dtype="str"), after_format=after_format)
+    fallback = pl.Series(fallback.as_unit("us").to_numpy(), dtype=pl.Datetime("us"))
+    return parsed.zip_with(~failed, values.replace_strict(distinct, fallback, default=None))
+
+
+def parse_dates_expr(column: str, date_format: str | None) -> pl.Expr:
+    """
+    Expression parsing a date column with an already resolved format (see
+    LazyTransform.resolve_date_format); values that do not match it are
+    parsed like transform_utils.parse_dates does, unparseable ones become null.
+    """
+    values = pl.col(column).cast(pl.String)
+    if date_format:
+        parsed = values.str.strptime(pl.Datetime("us"), date_format, strict=False)
+    else:
+        parsed = pl.lit(None, dtype=pl.Datetime("us"))
+    return pl.struct(values.alias("values"), parsed.alias("parsed")).map_batches(
+        lambda columns: _parse_failed_dates(columns, after_format=bool(date_format)), return_dtype=pl.Datetime("us")
+    )
+
+
+class LazyTransform:
+    """
+    Lazy Polars plan of one entity's transform, with the change counts
+    computed by the plan itself.
+
+    Args:
+        table (pa.Table): Extracted entity data.
+        schema (EntitySchema): Registered schema of the entity.
+        report (TransformReport): Counters updated when the plan is evaluated.
+    """
+
+    def __init__(self, table: pa.Table, schema: EntitySchema, report: TransformReport):
+        self.frame = pl.from_arrow(table).lazy()
+        self.schema = schema
+        self.report = report
+        # Count column -> (report counter, column, how it is read: "flags"
+        # per row, a "total" repeated on every row or "rows" before dedup)
+        self._counts: dict[str, tuple[str, str, str]] = {}
+
+    @property
+    def columns(self) -> dict[str, pl.DataType]:
+        return {c: dtype for c, dtype in self.frame.collect_schema().items() if c not in self._counts}
+
+    def _count(self, counter: str, column: str, flags: pl.Expr):
+        name = f"{_COUNT_PREFIX}{len(self._counts)}"
+        self._counts[name] = (counter, column, "flags")
+        self.frame = self.frame.with_columns(flags.alias(name))
+
+    def _evaluate(self) -> pl.DataFrame:
+        """
+        Evaluate the plan built so far and add its counts to the report.
+        """
+        frame = self.frame.collect()
+        if self._counts:
+            totals = frame.select(
+                pl.col(name).sum() if kind == "flags" else pl.col(name).first()
+                for name, (_, _, kind) in self._counts.items()
+            ).row(0)
+            for (counter, column, kind), total in zip(self._counts.values(), totals):
+                total = int(total or 0) - (frame.height if kind == "rows" else 0)
+                if counter == "duplicates_dropped":
+                    self.report.duplicates_dropped += total
+                else:
+                    self.report._add(getattr(self.report, counter), column, total)
+            frame = frame.drop(list(self._counts))
+            self._counts = {}
+        self.frame = frame.lazy()
+        return frame
+
+    def _replace(self, cleaned: dict[str, pl.Expr], counter: str, changed: Callable[[pl.Expr, pl.Expr], pl.Expr]):
+        # The new values sit next to the old ones until both are compared
+        columns = {column: f"{_NEW_PREFIX}{column}" for column in cleaned}
+        self.frame = self.frame.with_columns(expr.alias(columns[column]) for column, expr in cleaned.items())
+        for column, new in columns.items():
+            self._count(counter, column, changed(pl.col(column), pl.col(new)))
+        self.frame = self.frame.with_columns(pl.col(new).alias(column) for column, new in columns.items())
+        self.frame = self.frame.drop(list(columns.values()))
+
+    def normalize_columns(self):
+        """
+        Upper-case and strip column names, apply the schema aliases and make
+        sure the entity key column is present.
+        """
+        names = {c: str(c).strip().upper() for c in self.columns}
+        self.frame = self.frame.rename({c: self.schema.aliases.get(n, n) for c, n in names.items()})
+        if self.schema.key not in self.columns:
+            raise ValueError(f"❌ {self.schema.key} column missing after normalization.")
+
+    def drop_duplicate_keys(self, seen_keys: SeenKeys | None = None):
+        """
+        Keep the first row per entity key (missing keys count as one key) and
+        count the dropped duplicates. With `seen_keys` (chunked transforms),
+        keys already kept from earlier chunks are dropped as well; the plan is
+        evaluated up to here so the key set sees every row exactly once.
+        """
+        key = self.schema.key
+        if seen_keys is not None:
+            frame = self._evaluate()
+            keep = np.asarray(seen_keys.filter_new(frame.get_column(key).to_pandas()), dtype=bool)
+            self.frame = frame.filter(pl.Series(keep)).lazy()
+            self.report.duplicates_dropped += len(keep) - int(keep.sum())
+            return
+        # Counts of the rows about to be dropped are totalled first
+        flags = [name for name, (_, _, kind) in self._counts.items() if kind == "flags"]
+        self.frame = self.frame.with_columns(pl.col(flags).sum())
+        for name in flags:
+            self._counts[name] = self._counts[name][:2] + ("total",)
+        name = f"{_COUNT_PREFIX}{len(self._counts)}"
+        self._counts[name] = ("duplicates_dropped", key, "rows")
+        self.frame = self.frame.with_columns(pl.len().alias(name))
+        self.frame = self.frame.unique(subset=key, keep="first", maintain_order=True)
+
+    def fill_missing(self, defaults: dict):
+        """
+        Fill missing values of the given columns with their defaults, counting
+        the filled cells. Columns absent from the frame are ignored.
+        """
+        columns = self.columns
+        fills = []
+        for column, value in defaults.items():
+            if column not in columns:
+                continue
+            missing = _is_missing(pl.col(column), columns[column])
+            self._count("cells_filled", column, missing)
+            fills.append(pl.when(missing).then(pl.lit(value)).otherwise(pl.col(column)).alias(column))
+        if fills:
+            self.frame = self.frame.with_columns(fills)
+
+    def rewrite_columns(self, cleaned: dict[str, pl.Expr]):
+        """
+        Replace columns with their cleaned versions (computed in parallel),
+        counting the values that actually changed (missing values count as
+        equal to each other).
+        """
+        self._replace(cleaned, "values_rewritten", lambda old, new: old.ne_missing(new))
+
+    def coerce_numeric(self, column: str):
+        """
+        Convert a column to numbers; unparseable values become null and are counted.
+        """
+        dtype = self.columns[column]
+        self._replace(
+            {column: to_float(column)},
+            "values_coerced_to_null",
+            lambda old, new: _is_missing(new, pl.Float64) & ~_is_missing(old, dtype),
+        )
+
+    def resolve_date_format(
+        self, column: str, date_format: str | None, cache_key: tuple[str, str] | None = None
+    ) -> str | None:
+        """
+        Format to parse a date column with, resolved by
+        transform_utils.resolve_date_format from the same sample as with the
+        pandas engine: the first distinct values, in order of appearance, at
+        this point of the plan.
+        """
+        sample = self.frame.select(
+            pl.col(column).cast(pl.String).drop_nulls().unique(maintain_order=True).head(DATE_SAMPLE_SIZE)
+        ).collect().to_series()
+        return resolve_date_format(pd.Index(sample.to_list(), dtype="str"), date_format, cache_key)
+
+    def parse_date_columns(self):
+        """
+        Parse every registered date column present in the frame; unparseable
+        values become null and are counted.
+        """
+        columns = self.columns
+        parsed = {
+            column: parse_dates_expr(column, self.resolve_date_format(
+                column, self.schema.column(column).date_format, (self.schema.name, column)
+            ))
+            for column in self.schema.date_columns if column in columns
+        }
+        if parsed:
+            self._replace(parsed, "values_coerced_to_null", lambda old, new: new.is_null() & old.is_not_null())
+
+    def apply_schema_dtypes(self):
+        """
+        Cast the entity's columns to their registered types: categoricals,
+        float64 amounts and parsed dates.
+        """
+        columns = self.columns
+        casts = []
+        for spec in self.schema.columns:
+            dtype = columns.get(spec.name)
+            if dtype is None:
+                continue
+            if spec.dtype == "category" and dtype != pl.Categorical:
+                casts.append(pl.col(spec.name).cast(pl.Categorical))
+            elif spec.dtype == "float64" and dtype != pl.Float64:
+                casts.append(to_float(spec.name).alias(spec.name))
+            elif spec.dtype == "datetime" and not dtype.is_temporal():
+                date_format = self.resolve_date_format(spec.name, spec.date_format)
+                casts.append(parse_dates_expr(spec.name, date_format).alias(spec.name))
+        if casts:
+            self.frame = self.frame.with_columns(casts)
+
+    def collect(self) -> pa.Table:
+        """
+        Evaluate the plan and its counts; the result as a pyarrow Table with
+        ROW_HASH appended (computed exactly like transform_utils.add_row_hash).
+        """
+        self.frame = self.frame.with_columns(row_hash_expr(self.schema, self.columns))
+        return self._evaluate().to_arrow()
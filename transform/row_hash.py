@@ -0,0 +1,66 @@
+"""
+ROW_HASH, the content hash of an entity's registered columns, computed the
+same way by every engine so identical rows get identical hashes whichever
+engine staged them.
+
+The hash is a Polars expression, evaluated on Polars' thread pool: the
+Polars engine adds it to its plan, the Arrow engine hands its Table to
+Polars without copying the column buffers and the pandas engine its
+DataFrame columns.
+
+Values are hashed in a canonical form, so the hash only depends on the
+values and not on how a column is held: text hashes the same as str,
+object, category or dictionary column, floats by value (-0.0 like 0.0) and
+dates and timestamps by their day. Missing values (including NaN) and
+registered columns absent from the data all hash alike.
+
+Polars does not promise the same hash values across its releases. A Polars
+upgrade that changes them makes the next load update every existing row
+once (the MERGE only compares hashes) and changes nothing else.
+"""
+from typing import Mapping
+
+import numpy as np
+import polars as pl
+
+from config.schemas import ROW_HASH_COLUMN, EntitySchema
+
+# Hash given to missing values, and seed of the value and row hashes
+_NULL_HASH = 0x9E3779B97F4A7C15
+_SEED = 0
+
+
+def _canonical(expr: pl.Expr, dtype: pl.DataType) -> pl.Expr:
+    if dtype.is_temporal():
+        return expr.cast(pl.Date).cast(pl.Int64)
+    if dtype.is_float():
+        # + 0.0 turns -0.0 into 0.0; pandas counts NaN as missing
+        return (expr.cast(pl.Float64) + 0.0).fill_nan(None)
+    if dtype.is_integer():
+        return expr.cast(pl.Int64)
+    return expr.cast(pl.String)
+
+
+def row_hash_expr(schema: EntitySchema, dtypes: Mapping[str, pl.DataType]) -> pl.Expr:
+    """
+    Expression computing ROW_HASH (Int64) from the registered columns of a
+    frame with the given column dtypes; registered columns missing from
+    `dtypes` hash as NULL, like they are staged.
+    """
+    missing = pl.lit(_NULL_HASH, dtype=pl.UInt64)
+    hashes = []
+    for spec in schema.columns:
+        if spec.name in dtypes:
+            value = _canonical(pl.col(spec.name), dtypes[spec.name])
+            hashes.append(pl.when(value.is_null()).then(missing).otherwise(value.hash(_SEED)).alias(spec.name))
+        else:
+            hashes.append(missing.alias(spec.name))
+    # Combine the column hashes in registry order; stored as NUMBER(19,0)
+    return pl.struct(hashes).hash(_SEED).reinterpret(signed=True).alias(ROW_HASH_COLUMN)
+
+
+def row_hash_values(frame: pl.DataFrame, schema: EntitySchema) -> np.ndarray:
+    """
+    ROW_HASH values (int64) of the rows of a Polars DataFrame.
+    """
+    return frame.select(row_hash_expr(schema, frame.schema)).to_series().to_numpy()
@@ -0,0 +1,318 @@
+"""
+Compact sets of entity keys already seen in earlier chunks, so chunked
+transforms drop duplicate keys across the whole file, not just per chunk.
+
+Keys are encoded as 64-bit hashes (8 bytes per key instead of a Python string
+object). Hashes alone are exact up to collisions: the chance of any
+collision among n keys is about n**2 / 2**65 (3e-4 for 100 million keys),
+and a new key colliding with a seen one would be dropped as a duplicate.
+
+    ExactSeenKeys  every encoded key in memory as sorted NumPy runs, next to
+                   the key values as Arrow strings; keys whose hashes match
+                   are compared by value, so collisions never drop a key.
+    BloomSeenKeys  a Bloom filter in memory; encoded keys are spilled to
+                   memory-mapped files on disk and only read to confirm the
+                   rare keys the filter reports as possibly seen. Exact up
+                   to hash collisions.
+"""
+import math
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+
+def encode_keys(keys: pd.Series) -> np.ndarray:
+    """
+    64-bit encoding of key values (equal values, including missing ones, get
+    equal codes regardless of the column's dtype).
+    """
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy(dtype="uint64")
+
+
+def _key_values(keys: pd.Series) -> pa.Array:
+    # Key values as one string type whatever the column's dtype (str, object, category)
+    values = pa.array(keys.astype("str"), from_pandas=True).cast(pa.large_string())
+    return values.combine_chunks() if isinstance(values, pa.ChunkedArray) else values
+
+
+def _equal(a: pa.Array, b: pa.Array) -> np.ndarray:
+    # Element-wise equality where two missing values are equal, like encode_keys
+    equal = pc.or_kleene(pc.equal(a, b), pc.and_(a.is_null(), b.is_null()))
+    return pc.fill_null(equal, False).to_numpy(zero_copy_only=False)
+
+
+def _mix(codes: np.ndarray) -> np.ndarray:
+    # splitmix64 finalizer: a second, independent hash derived from the first
+    z = codes ^ (codes >> np.uint64(30))
+    z = z * _MIX_1
+    z = z ^ (z >> np.uint64(27))
+    z = z * _MIX_2
+    return z ^ (z >> np.uint64(31))
+
+
+class _SortedRuns:
+    """
+    Set of uint64 codes stored as a few sorted, disjoint runs. New runs are
+    merged with the previous one while it is at most twice as large, so there
+    are O(log n) runs. With a `directory`, runs are saved as .npy files and
+    memory-mapped, and merges stop at `max_merge` codes so a merge never loads
+    more than that into memory.
+    """
+
+    def __init__(self, directory: str | None = None, max_merge: int | None = None):
+        self.directory = directory
+        self.max_merge = max_merge
+        self.runs: list[np.ndarray] = []
+        self.size = 0
+        self._files = 0
+
+    def contains(self, codes: np.ndarray) -> np.ndarray:
+        found = np.zeros(len(codes), dtype=bool)
+        for run in self.runs:
+            pos = np.searchsorted(run, codes)
+            np.minimum(pos, len(run) - 1, out=pos)
+            found |= run[pos] == codes
+        return found
+
+    def add(self, codes: np.ndarray):
+        """Add sorted, unique codes that are not in the set yet."""
+        if not len(codes):
+            return
+        self.size += len(codes)
+        while self.runs and len(self.runs[-1]) <= 2 * len(codes):
+            if self.max_merge is not None and len(self.runs[-1]) + len(codes) > self.max_merge:
+                break
+            previous = self._drop_last()
+            codes = np.sort(np.concatenate([previous, codes]), kind="mergesort")
+        self.runs.append(self._store(codes))
+
+    def _store(self, codes: np.ndarray) -> np.ndarray:
+        if self.directory is None:
+            return codes
+        self._files += 1
+        path = os.path.join(self.directory, f"run_{self._files:06d}.npy")
+        np.save(path, codes)
+        return np.load(path, mmap_mode="r")
+
+    def _drop_last(self) -> np.ndarray:
+        run = self.runs.pop()
+        if self.directory is None:
+            return run
+        codes = np.array(run)
+        path = run.filename
+        del run
+        os.remove(path)
+        return codes
+
+
+class _KeyRuns:
+    """
+    Set of keys stored as a few runs of codes sorted by code, each with the
+    key values in the same order, merged like _SortedRuns. Codes may repeat
+    (different keys whose hashes collide); a key is only found when a code
+    and its value both match.
+    """
+
+    def __init__(self):
+        self.runs: list[tuple[np.ndarray, pa.Array]] = []
+        self.size = 0
+
+    def contains(self, codes: np.ndarray, values: pa.Array) -> np.ndarray:
+        found = np.zeros(len(codes), dtype=bool)
+        for run, run_values in self.runs:
+            start = np.searchsorted(run, codes, side="left")
+            end = np.searchsorted(run, codes, side="right")
+            # Compare values where the code matches, once per stored key with that code
+            pending = np.flatnonzero(end > start)
+            while len(pending):
+                match = _equal(run_values.take(start[pending]), values.take(pending))
+                found[pending[match]] = True
+                start[pending] += 1
+                pending = pending[~match & (start[pending] < end[pending])]
+        return found
+
+    def add(self, codes: np.ndarray, values: pa.Array):
+        """Add keys sorted by code that are not in the set yet."""
+        if not len(codes):
+            return
+        self.size += len(codes)
+        while self.runs and len(self.runs[-1][0]) <= 2 * len(codes):
+            previous, previous_values = self.runs.pop()
+            codes = np.concatenate([previous, codes])
+            order = np.argsort(codes, kind="stable")
+            codes = codes[order]
+            values = pa.concat_arrays([previous_values, values]).take(order)
+        self.runs.append((codes, values))
+
+
+class SeenKeys:
+    """
+    Base class: filter_new() keeps the first occurrence of each key across
+    every chunk passed to it.
+    """
+
+    def filter_new(self, keys: pd.Series) -> np.ndarray:
+        """
+        Boolean mask of the rows whose key was neither seen in an earlier
+        chunk nor earlier in this one; those keys are recorded as seen.
+        """
+        return self.filter_new_codes(encode_keys(keys))
+
+    def filter_new_codes(self, codes: np.ndarray) -> np.ndarray:
+        """
+        filter_new() for keys already encoded with encode_keys().
+        """
+        first = ~pd.Series(codes).duplicated().to_numpy()
+        candidates = np.flatnonzero(first)
+        seen = self._seen(codes[candidates])
+        keep = np.zeros(len(codes), dtype=bool)
+        keep[candidates[~seen]] = True
+        self._add(np.sort(codes[keep]))
+        return keep
+
+    def _seen(self, codes: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def _add(self, codes: np.ndarray):
+        raise NotImplementedError
+
+    def close(self):
+        """Release memory and any spill files."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ExactSeenKeys(SeenKeys):
+    """
+    Every key kept in memory: its code (8 bytes) and, for keys passed to
+    filter_new(), its value as an Arrow string (about 8 bytes plus the
+    key's length), compared whenever codes match.
+
+    filter_new_codes() only has codes, so keys given that way are matched by
+    code alone; the load uses it only to decide which rows need the MERGE,
+    where a collision costs a MERGE and never a row.
+    """
+
+    def __init__(self):
+        self._runs = _SortedRuns()
+        self._keys = _KeyRuns()
+
+    def __len__(self):
+        return self._runs.size + self._keys.size
+
+    def filter_new(self, keys: pd.Series) -> np.ndarray:
+        codes = encode_keys(keys)
+        values = _key_values(keys)
+        candidates = np.flatnonzero(~keys.duplicated().to_numpy())
+        seen = self._keys.contains(codes[candidates], values.take(candidates))
+        new = candidates[~seen]
+        new = new[np.argsort(codes[new], kind="stable")]
+        self._keys.add(codes[new], values.take(new))
+        keep = np.zeros(len(codes), dtype=bool)
+        keep[new] = True
+        return keep
+
+    def _seen(self, codes: np.ndarray) -> np.ndarray:
+        return self._runs.contains(codes)
+
+    def _add(self, codes: np.ndarray):
+        self._runs.add(codes)
+
+    def close(self):
+        self._runs = _SortedRuns()
+        self._keys = _KeyRuns()
+
+
+class BloomSeenKeys(SeenKeys):
+    """
+    Blocked Bloom filter in memory with the encoded keys spilled to disk.
+
+    New keys are almost always rejected by the filter alone. Keys it reports
+    as possibly seen (real duplicates and ~`false_positive_rate` of new keys)
+    are checked against the spilled runs, so the result stays exact. Memory
+    is the filter (~1.5 bytes per expected key at 1%) plus one chunk; exceeding
+    `expected_keys` only makes disk checks more frequent.
+
+    Args:
+        expected_keys (int): Distinct keys the filter is sized for.
+        false_positive_rate (float): Target rate of disk checks for new keys.
+        spill_dir (str | None): Parent directory of the spill files (system temp by default).
+        max_merge (int): Maximum codes merged into one spill file.
+    """
+
+    def __init__(
+        self,
+        expected_keys: int = 10_000_000,
+        false_positive_rate: float = 0.01,
+        spill_dir: str | None = None,
+        max_merge: int = 8_000_000,
+    ):
+        n = max(1, expected_keys)
+        # Standard sizing, with 25% extra for the blocked layout
+        bits = 1.25 * -n * math.log(false_positive_rate) / math.log(2) ** 2
+        self._words = np.zeros(max(1, math.ceil(bits / 64)), dtype=np.uint64)
+        self._hashes = min(10, max(1, round(bits / n * math.log(2))))
+        self._directory = tempfile.mkdtemp(prefix="seen_keys_", dir=spill_dir)
+        self._runs = _SortedRuns(self._directory, max_merge=max_merge)
+        self.disk_checks = 0
+
+    def __len__(self):
+        return self._runs.size
+
+    def _positions(self, codes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # One 64-bit word per key; k bit positions taken 6 bits at a time from a second hash
+        word = (codes % np.uint64(len(self._words))).astype(np.intp)
+        h2 = _mix(codes)
+        mask = np.zeros(len(codes), dtype=np.uint64)
+        for i in range(self._hashes):
+            mask |= np.uint64(1) << ((h2 >> np.uint64(6 * i)) & np.uint64(63))
+        return word, mask
+
+    def _seen(self, codes: np.ndarray) -> np.ndarray:
+        word, mask = self._positions(codes)
+        maybe = (self._words[word] & mask) == mask
+        seen = np.zeros(len(codes), dtype=bool)
+        if maybe.any():
+            self.disk_checks += int(maybe.sum())
+            seen[maybe] = self._runs.contains(codes[maybe])
+        return seen
+
+    def _add(self, codes: np.ndarray):
+        word, mask = self._positions(codes)
+        np.bitwise_or.at(self._words, word, mask)
+        self._runs.add(codes)
+
+    def close(self):
+        self._runs = _SortedRuns()
+        shutil.rmtree(self._directory, ignore_errors=True)
+
+
+def new_seen_keys(mode: str = "exact", expected_keys: int = 10_000_000, spill_dir: str | None = None) -> SeenKeys:
+    """
+    Create a seen-key set for one chunked transform.
+
+    Args:
+        mode (str): "exact" (all keys in memory) or "bloom" (filter in memory, keys on disk).
+        expected_keys (int): Sizing hint for the Bloom filter.
+        spill_dir (str | None): Where the Bloom mode spills keys.
+
+    Returns:
+        SeenKeys: The key set; close() it when the entity is done.
+    """
+    if mode == "exact":
+        return ExactSeenKeys()
+    if mode == "bloom":
+        return BloomSeenKeys(expected_keys, spill_dir=spill_dir)
+    raise ValueError(f"❌ Unknown dedup mode '{mode}'. Expected 'exact' or 'bloom'.")
@@ -1,66 +1,154 @@
-import pandas as pd
+import polars as pl
 
-def transform_agent(df):
+from config.schemas import get_schema
+from transform import arrow_cleaning, arrow_utils, polars_cleaning, polars_utils
+from transform.cleaning import clean_email, clean_title, format_phone
+from transform.seen_keys import SeenKeys
+from transform.transform_utils import (
+    TransformReport, add_row_hash, apply_schema_dtypes, drop_duplicate_keys, fill_missing,
+    normalize_columns, rewrite_column
+)
+from utils.logger import get_logger, lazy
+
+logger = get_logger("agents")
+
+def transform_agent(df, report: TransformReport | None = None, seen_keys: SeenKeys | None = None):
     """
     Transforms the agent DataFrame by performing necessary data cleaning and processing.
     
     Args:
         df (pd.DataFrame): The DataFrame containing agent data.
+        report (TransformReport | None): Change counters to update (e.g. shared
+            across chunks); a fresh report is used when omitted.
+        seen_keys (SeenKeys | None): Keys kept from earlier chunks of the same
+            source, so duplicates are also dropped across chunks.
         
     Returns:
         pd.DataFrame: A transformed DataFrame with cleaned and processed agent data.
     """
+    schema = get_schema("agents")
+    report = report if report is not None else TransformReport(schema.name)
     try:
-        print("🔍 Incoming DataFrame shape:", df.shape)
-
-        # Normalize columns to uppercase and strip whitespace
-        df.columns = df.columns.str.strip().str.upper()
-
-        # Column alias map (to guarantee AGENT_ID is found)
-        column_aliases = {
-            "AGENTID": "AGENT_ID",
-            "ID": "AGENT_ID",
-            "AGNTID": "AGENT_ID"
-        }
-        df = df.rename(columns={col: column_aliases[col] for col in df.columns if col in column_aliases})
+        logger.debug("🔍 Incoming DataFrame shape: %s", df.shape)
+        report.rows_in += len(df)
+        changes_before = report.total_changes
 
-        if "AGENT_ID" not in df.columns:
-            raise ValueError("❌ AGENT_ID column missing after normalization.")
+        # Normalize column names and aliases from the schema registry
+        df = normalize_columns(df, schema)
 
-        print("✅ Columns normalized:", df.columns.tolist())
-
-        # Track changes for "no transformation" message
-        original_df = df.copy()
+        logger.debug("✅ Columns normalized: %s", lazy(lambda: df.columns.tolist()))
 
         # Deduplicate AGENT_ID entries
-        df = df.drop_duplicates(subset="AGENT_ID")
-        print("After dedup:", df.shape)
+        df = drop_duplicate_keys(df, schema, report, seen_keys)
+        logger.debug("After dedup: %s", df.shape)
 
         # Standardize names to title case
-        df["FIRST_NAME"] = df["FIRST_NAME"].str.strip().str.title()
-        df["LAST_NAME"] = df["LAST_NAME"].str.strip().str.title()
-        print("After name cleanup:", df.shape)
+        df = rewrite_column(df, "FIRST_NAME", clean_title(df["FIRST_NAME"]), report)
+        df = rewrite_column(df, "LAST_NAME", clean_title(df["LAST_NAME"]), report)
+        logger.debug("After name cleanup: %s", df.shape)
 
         # Normalize email
-        df["EMAIL"] = df["EMAIL"].str.strip().str.lower()
+        df = rewrite_column(df, "EMAIL", clean_email(df["EMAIL"]), report)
 
         # Standardize phone numbers
-        df["PHONE"] = df["PHONE"].astype(str).str.replace(r'\D', '', regex=True)
-        df["PHONE"] = df["PHONE"].apply(
-            lambda x: f"{x[:3]}-{x[3:6]}-{x[6:10]}" if len(x) == 10 else "000-000-0000"
-        )
-        print("After phone cleanup:", df.shape)
+        df = rewrite_column(df, "PHONE", format_phone(df["PHONE"]), report)
+        logger.debug("After phone cleanup: %s", df.shape)
 
         # Fill missing AGENCY_NAME with 'Unknown'
-        df["AGENCY_NAME"] = df["AGENCY_NAME"].fillna("Unknown").str.strip().str.title()
-        print("After agency name cleanup:", df.shape)
+        df = fill_missing(df, {"AGENCY_NAME": "Unknown"}, report)
+        df = rewrite_column(df, "AGENCY_NAME", clean_title(df["AGENCY_NAME"]), report)
+        logger.debug("After agency name cleanup: %s", df.shape)
+
+        # Compact dtypes (categoricals for AGENCY_NAME)
+        df = apply_schema_dtypes(df, schema)
 
-        # Check if transformations changed the data
-        if df.equals(original_df):
-            print("ℹ️ No transformations were required.")
+        # Counters were updated step by step; no copy of the input is needed
+        report.rows_out += len(df)
+        if report.total_changes == changes_before:
+            logger.info("ℹ️ No transformations were required.")
+
+        # Content hash used by the loaders to skip no-op updates
+        df = add_row_hash(df, schema)
 
         return df
 
     except Exception as e:
-        print(f"❌ Error transforming agent DataFrame: {e}")
-        return pd.DataFrame()
+        logger.error("❌ Error transforming agent DataFrame: %s", e)
+        raise
+
+def transform_agent_arrow(table, report: TransformReport | None = None, seen_keys: SeenKeys | None = None):
+    """
+    Arrow engine version of transform_agent: the same steps with pyarrow.compute
+    (see transform/arrow_utils.py), on a pyarrow Table.
+
+    Returns:
+        pa.Table: The transformed table.
+    """
+    schema = get_schema("agents")
+    report = report if report is not None else TransformReport(schema.name)
+    try:
+        logger.debug("🔍 Incoming table shape: %s", table.shape)
+        report.rows_in += table.num_rows
+        changes_before = report.total_changes
+
+        table = arrow_utils.normalize_columns(table, schema)
+
+        table = arrow_utils.drop_duplicate_keys(table, schema, report, seen_keys)
+
+        table = arrow_utils.rewrite_column(table, "FIRST_NAME", arrow_cleaning.clean_title(table.column("FIRST_NAME")), report)
+        table = arrow_utils.rewrite_column(table, "LAST_NAME", arrow_cleaning.clean_title(table.column("LAST_NAME")), report)
+        table = arrow_utils.rewrite_column(table, "EMAIL", arrow_cleaning.clean_email(table.column("EMAIL")), report)
+        table = arrow_utils.rewrite_column(table, "PHONE", arrow_cleaning.format_phone(table.column("PHONE")), report)
+
+        table = arrow_utils.fill_missing(table, {"AGENCY_NAME": "Unknown"}, report)
+        table = arrow_utils.rewrite_column(table, "AGENCY_NAME", arrow_cleaning.clean_title(table.column("AGENCY_NAME")), report)
+        table = arrow_utils.apply_schema_dtypes(table, schema)
+
+        report.rows_out += table.num_rows
+        if report.total_changes == changes_before:
+            logger.info("ℹ️ No transformations were required.")
+
+        return arrow_utils.add_row_hash(table, schema)
+
+    except Exception as e:
+        logger.error("❌ Error transforming agent table: %s", e)
+        raise
+
+def transform_agent_polars(table, report: TransformReport | None = None, seen_keys: SeenKeys | None = None):
+    """
+    Polars engine version of transform_agent: the same steps as one lazy Polars
+    plan (see transform/polars_utils.py), on a pyarrow Table.
+
+    Returns:
+        pa.Table: The transformed table.
+    """
+    schema = get_schema("agents")
+    report = report if report is not None else TransformReport(schema.name)
+    try:
+        logger.debug("🔍 Incoming table shape: %s", table.shape)
+        report.rows_in += table.num_rows
+        changes_before = report.total_changes
+
+        plan = polars_utils.LazyTransform(table, schema, report)
+        plan.normalize_columns()
+        plan.drop_duplicate_keys(seen_keys)
+        plan.rewrite_columns({
+            "FIRST_NAME": polars_cleaning.clean_title(pl.col("FIRST_NAME")),
+            "LAST_NAME": polars_cleaning.clean_title(pl.col("LAST_NAME")),
+            "EMAIL": polars_cleaning.clean_email(pl.col("EMAIL")),
+            "PHONE": polars_cleaning.format_phone(pl.col("PHONE")),
+        })
+        plan.fill_missing({"AGENCY_NAME": "Unknown"})
+        plan.rewrite_columns({"AGENCY_NAME": polars_cleaning.clean_title(pl.col("AGENCY_NAME"))})
+        plan.apply_schema_dtypes()
+        table = plan.collect()
+
+        report.rows_out += table.num_rows
+        if report.total_changes == changes_before:
+            logger.info("ℹ️ No transformations were required.")
+
+        return table
+
+    except Exception as e:
+        logger.error("❌ Error transforming agent table with Polars: %s", e)
+        raise
@@ -1,66 +1,141 @@
-import pandas as pd
+from config.schemas import get_schema
+from transform import arrow_utils, polars_utils
+from transform.seen_keys import SeenKeys
+from transform.transform_utils import (
+    TransformReport, add_row_hash, apply_schema_dtypes, coerce_numeric,
+    drop_duplicate_keys, fill_missing, normalize_columns, parse_date_columns
+)
+from utils.logger import get_logger, lazy
 
-def transform_claims(df):
+logger = get_logger("claims")
+
+def transform_claims(df, report: TransformReport | None = None, seen_keys: SeenKeys | None = None):
     """
     Transforms the claims DataFrame by performing necessary data cleaning and processing.
     
     Args:
         df (pd.DataFrame): The DataFrame containing claims data.
+        report (TransformReport | None): Change counters to update (e.g. shared
+            across chunks); a fresh report is used when omitted.
+        seen_keys (SeenKeys | None): Keys kept from earlier chunks of the same
+            source, so duplicates are also dropped across chunks.
         
     Returns:
         pd.DataFrame: A transformed DataFrame with cleaned and processed claims data.
     """
+    schema = get_schema("claims")
+    report = report if report is not None else TransformReport(schema.name)
     try:
-        print("🔍 Incoming DataFrame shape:", df.shape)
-
-        # Normalize column names to uppercase and strip whitespace
-        df.columns = df.columns.str.strip().str.upper()
+        logger.debug("🔍 Incoming DataFrame shape: %s", df.shape)
+        report.rows_in += len(df)
+        changes_before = report.total_changes
 
-        # Column alias map (to guarantee CLAIM_ID is found)
-        column_aliases = {
-            "CLAIMID": "CLAIM_ID",
-            "ID": "CLAIM_ID",
-            "CLMID": "CLAIM_ID"
-        }
-        df = df.rename(columns={col: column_aliases[col] for col in df.columns if col in column_aliases})   
-
-        if "claim_id" not in df.columns:
-            raise ValueError("❌ CLAIM_ID column missing after normalization.")
-        
-        print("✅ Columns normalized:", df.columns.tolist())
+        # Normalize column names and aliases from the schema registry
+        df = normalize_columns(df, schema)
 
-        # Track changes for "no transformation" message
-        original_df = df.copy() 
+        logger.debug("✅ Columns normalized: %s", lazy(lambda: df.columns.tolist()))
 
         # Numeric columns
-        numeric_cols = df.select_dtypes(include=['int64', 'float64']).columns
-        if not numeric_cols.empty:
-            df.loc[:, numeric_cols] = df[numeric_cols].astype(float)
+        if "CLAIM_AMOUNT" in df.columns:
+            df = coerce_numeric(df, "CLAIM_AMOUNT", report)
 
-        # Fill NaN claim_amount
-        if "claim_amount" in df.columns:
-            df.loc[:, "claim_amount"] = df["claim_amount"].fillna(0)
+        # Fill NaN CLAIM_AMOUNT
+        df = fill_missing(df, {"CLAIM_AMOUNT": 0}, report)
 
         # Deduplicate by CLAIM_ID only
-        if "claim_id" in df.columns:
-            df = df.drop_duplicates(subset="claim_id")
-            print("After dedup:", df.shape)
+        df = drop_duplicate_keys(df, schema, report, seen_keys)
+        logger.debug("After dedup: %s", df.shape)
 
-        # Fill missing adjuster_notes
-        if "adjuster_notes" in df.columns:
-            df.loc[:, "adjuster_notes"] = df["adjuster_notes"].fillna("No notes provided")
+        # Fill missing ADJUSTER_NOTES
+        df = fill_missing(df, {"ADJUSTER_NOTES": "No notes provided"}, report)
 
         # Convert date columns
-        for col in ["claim_date", "incident_date"]:
-            if col in df.columns:
-                df.loc[:, col] = pd.to_datetime(df[col], errors="coerce")
+        df = parse_date_columns(df, schema, report)
 
-        # Check if transformations changed the data
-        if df.equals(original_df):
-            print("ℹ️ No transformations were required.")
+        # Compact dtypes (categoricals for CLAIM_TYPE / STATUS)
+        df = apply_schema_dtypes(df, schema)
+
+        # Counters were updated step by step; no copy of the input is needed
+        report.rows_out += len(df)
+        if report.total_changes == changes_before:
+            logger.info("ℹ️ No transformations were required.")
+
+        # Content hash used by the loaders to skip no-op updates
+        df = add_row_hash(df, schema)
 
         return df
 
     except Exception as e:
-        print(f"❌ Error transforming claims DataFrame: {e}")
-        return pd.DataFrame()
+        logger.error("❌ Error transforming claims DataFrame: %s", e)
+        raise
+
+def transform_claims_arrow(table, report: TransformReport | None = None, seen_keys: SeenKeys | None = None):
+    """
+    Arrow engine version of transform_claims: the same steps with pyarrow.compute
+    (see transform/arrow_utils.py), on a pyarrow Table.
+
+    Returns:
+        pa.Table: The transformed table.
+    """
+    schema = get_schema("claims")
+    report = report if report is not None else TransformReport(schema.name)
+    try:
+        logger.debug("🔍 Incoming table shape: %s", table.shape)
+        report.rows_in += table.num_rows
+        changes_before = report.total_changes
+
+        table = arrow_utils.normalize_columns(table, schema)
+
+        if "CLAIM_AMOUNT" in table.column_names:
+            table = arrow_utils.coerce_numeric(table, "CLAIM_AMOUNT", report)
+        table = arrow_utils.fill_missing(table, {"CLAIM_AMOUNT": 0}, report)
+        table = arrow_utils.drop_duplicate_keys(table, schema, report, seen_keys)
+        table = arrow_utils.fill_missing(table, {"ADJUSTER_NOTES": "No notes provided"}, report)
+        table = arrow_utils.parse_date_columns(table, schema, report)
+        table = arrow_utils.apply_schema_dtypes(table, schema)
+
+        report.rows_out += table.num_rows
+        if report.total_changes == changes_before:
+            logger.info("ℹ️ No transformations were required.")
+
+        return arrow_utils.add_row_hash(table, schema)
+
+    except Exception as e:
+        logger.error("❌ Error transforming claims table: %s", e)
+        raise
+
+def transform_claims_polars(table, report: TransformReport | None = None, seen_keys: SeenKeys | None = None):
+    """
+    Polars engine version of transform_claims: the same steps as one lazy Polars
+    plan (see transform/polars_utils.py), on a pyarrow Table.
+
+    Returns:
+        pa.Table: The transformed table.
+    """
+    schema = get_schema("claims")
+    report = report if report is not None else TransformReport(schema.name)
+    try:
+        logger.debug("🔍 Incoming table shape: %s", table.shape)
+        report.rows_in += table.num_rows
+        changes_before = report.total_changes
+
+        plan = polars_utils.LazyTransform(table, schema, report)
+        plan.normalize_columns()
+        if "CLAIM_AMOUNT" in plan.columns:
+            plan.coerce_numeric("CLAIM_AMOUNT")
+        plan.fill_missing({"CLAIM_AMOUNT": 0})
+        plan.drop_duplicate_keys(seen_keys)
+        plan.fill_missing({"ADJUSTER_NOTES": "No notes provided"})
+        plan.parse_date_columns()
+        plan.apply_schema_dtypes()
+        table = plan.collect()
+
+        report.rows_out += table.num_rows
+        if report.total_changes == changes_before:
+            logger.info("ℹ️ No transformations were required.")
+
+        return table
+
+    except Exception as e:
+        logger.error("❌ Error transforming claims table with Polars: %s", e)
+        raise
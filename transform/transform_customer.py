@@ -1,87 +1,193 @@
-import pandas as pd
+import polars as pl
 
-def transform_customer(df):
+from config.schemas import get_schema
+from transform import arrow_cleaning, arrow_utils, polars_cleaning, polars_utils
+from transform.cleaning import clean_email, clean_gender, clean_title, clean_upper, clean_zip, format_phone
+from transform.seen_keys import SeenKeys
+from transform.transform_utils import (
+    TransformReport, add_row_hash, apply_schema_dtypes, drop_duplicate_keys, fill_missing,
+    normalize_columns, rewrite_column
+)
+from utils.logger import get_logger, lazy
+
+logger = get_logger("customers")
+
+def transform_customer(df, report: TransformReport | None = None, seen_keys: SeenKeys | None = None):
     """
     Transforms the customer DataFrame by performing necessary data cleaning and processing.
     
     Args:
         df (pd.DataFrame): The DataFrame containing customer data.
+        report (TransformReport | None): Change counters to update (e.g. shared
+            across chunks); a fresh report is used when omitted.
+        seen_keys (SeenKeys | None): Keys kept from earlier chunks of the same
+            source, so duplicates are also dropped across chunks.
         
     Returns:
         pd.DataFrame: A transformed DataFrame with cleaned and processed customer data.
     """
+    schema = get_schema("customers")
+    report = report if report is not None else TransformReport(schema.name)
     try:
-        print("🔍 Incoming DataFrame shape:", df.shape)
-
-        # Normalize columns to uppercase and strip whitespace
-        df.columns = df.columns.str.strip().str.upper()
+        logger.debug("🔍 Incoming DataFrame shape: %s", df.shape)
+        report.rows_in += len(df)
+        changes_before = report.total_changes
 
-        # Column alias map (to guarantee CUSTOMER_ID is found)
-        column_aliases = {
-            "CUST_ID": "CUSTOMER_ID",
-            "ID": "CUSTOMER_ID",
-            "CUSTOMERID": "CUSTOMER_ID"
-        }
-        df = df.rename(columns={col: column_aliases[col] for col in df.columns if col in column_aliases})
+        # Normalize column names and aliases from the schema registry
+        df = normalize_columns(df, schema)
 
-        if "CUSTOMER_ID" not in df.columns:
-            raise ValueError("❌ CUSTOMER_ID column missing after normalization.")
-
-        print("✅ Columns normalized:", df.columns.tolist())
-
-        # Track changes for "no transformation" message
-        original_df = df.copy()
+        logger.debug("✅ Columns normalized: %s", lazy(lambda: df.columns.tolist()))
 
         # Deduplicate CUSTOMER_ID entries
-        df = df.drop_duplicates(subset="CUSTOMER_ID")
-        print("After dedup:", df.shape)
+        df = drop_duplicate_keys(df, schema, report, seen_keys)
+        logger.debug("After dedup: %s", df.shape)
 
         # Standardize names to title case
-        df["FIRST_NAME"] = df["FIRST_NAME"].str.strip().str.title()
-        df["LAST_NAME"] = df["LAST_NAME"].str.strip().str.title()
-        print("After name cleanup:", df.shape)
+        df = rewrite_column(df, "FIRST_NAME", clean_title(df["FIRST_NAME"]), report)
+        df = rewrite_column(df, "LAST_NAME", clean_title(df["LAST_NAME"]), report)
+        logger.debug("After name cleanup: %s", df.shape)
 
         # Clean gender column and map to 'M', 'F', 'O'
-        df["GENDER"] = df["GENDER"].str.upper().str.strip().map({
-            "MALE": "M", "M": "M",
-            "FEMALE": "F", "F": "F"
-        }).fillna("O")
-        print("After gender cleanup:", df.shape)
+        df = rewrite_column(df, "GENDER", clean_gender(df["GENDER"]), report)
+        logger.debug("After gender cleanup: %s", df.shape)
 
         # Normalize email
-        df["EMAIL"] = df["EMAIL"].str.strip().str.lower()
+        df = rewrite_column(df, "EMAIL", clean_email(df["EMAIL"]), report)
 
         # Clean address fields
-        df["ADDRESS"] = df["ADDRESS"].str.strip().str.title()
-        df["CITY"] = df["CITY"].str.strip().str.title()
-        df["STATE"] = df["STATE"].str.strip().str.upper()
-        df["ZIP_CODE"] = df["ZIP_CODE"].astype(str).str.zfill(5).str[:5]
-        print("After address cleanup:", df.shape)
+        df = rewrite_column(df, "ADDRESS", clean_title(df["ADDRESS"]), report)
+        df = rewrite_column(df, "CITY", clean_title(df["CITY"]), report)
+        df = rewrite_column(df, "STATE", clean_upper(df["STATE"]), report)
+        df = rewrite_column(df, "ZIP_CODE", clean_zip(df["ZIP_CODE"]), report)
+        logger.debug("After address cleanup: %s", df.shape)
 
         # Standardize phone numbers
-        df["PHONE"] = df["PHONE"].astype(str).str.replace(r'\D', '', regex=True)
-        df["PHONE"] = df["PHONE"].apply(
-            lambda x: f"{x[:3]}-{x[3:6]}-{x[6:10]}" if len(x) == 10 else "000-000-0000"
-        )
-        print("After phone cleanup:", df.shape)
+        df = rewrite_column(df, "PHONE", format_phone(df["PHONE"]), report)
+        logger.debug("After phone cleanup: %s", df.shape)
 
         # Handle missing values
-        df = df.fillna({
+        df = fill_missing(df, {
             "EMAIL": "unknown@example.com",
             "PHONE": "000-000-0000",
             "ADDRESS": "Unknown",
             "CITY": "Unknown",
             "STATE": "XX",
             "ZIP_CODE": "00000"
-        })
-        print("After filling nulls:", df.shape)
+        }, report)
+        logger.debug("After filling nulls: %s", df.shape)
 
-        # Check if transformations changed the data
-        if df.equals(original_df):
-            print("ℹ️ No transformations were required.")
+        # Compact dtypes (categoricals for GENDER / CITY / STATE)
+        df = apply_schema_dtypes(df, schema)
+
+        # Counters were updated step by step; no copy of the input is needed
+        report.rows_out += len(df)
+        if report.total_changes == changes_before:
+            logger.info("ℹ️ No transformations were required.")
+
+        # Content hash used by the loaders to skip no-op updates
+        df = add_row_hash(df, schema)
 
         return df
 
     except Exception as e:
-        print(f"❌ Error transforming customer DataFrame: {e}")
-        return pd.DataFrame()
+        logger.error("❌ Error transforming customer DataFrame: %s", e)
+        raise
+
+def transform_customer_arrow(table, report: TransformReport | None = None, seen_keys: SeenKeys | None = None):
+    """
+    Arrow engine version of transform_customer: the same steps with pyarrow.compute
+    (see transform/arrow_utils.py), on a pyarrow Table.
+
+    Returns:
+        pa.Table: The transformed table.
+    """
+    schema = get_schema("customers")
+    report = report if report is not None else TransformReport(schema.name)
+    try:
+        logger.debug("🔍 Incoming table shape: %s", table.shape)
+        report.rows_in += table.num_rows
+        changes_before = report.total_changes
+
+        table = arrow_utils.normalize_columns(table, schema)
+
+        table = arrow_utils.drop_duplicate_keys(table, schema, report, seen_keys)
+
+        table = arrow_utils.rewrite_column(table, "FIRST_NAME", arrow_cleaning.clean_title(table.column("FIRST_NAME")), report)
+        table = arrow_utils.rewrite_column(table, "LAST_NAME", arrow_cleaning.clean_title(table.column("LAST_NAME")), report)
+        table = arrow_utils.rewrite_column(table, "GENDER", arrow_cleaning.clean_gender(table.column("GENDER")), report)
+        table = arrow_utils.rewrite_column(table, "EMAIL", arrow_cleaning.clean_email(table.column("EMAIL")), report)
+        table = arrow_utils.rewrite_column(table, "ADDRESS", arrow_cleaning.clean_title(table.column("ADDRESS")), report)
+        table = arrow_utils.rewrite_column(table, "CITY", arrow_cleaning.clean_title(table.column("CITY")), report)
+        table = arrow_utils.rewrite_column(table, "STATE", arrow_cleaning.clean_upper(table.column("STATE")), report)
+        table = arrow_utils.rewrite_column(table, "ZIP_CODE", arrow_cleaning.clean_zip(table.column("ZIP_CODE")), report)
+        table = arrow_utils.rewrite_column(table, "PHONE", arrow_cleaning.format_phone(table.column("PHONE")), report)
+
+        table = arrow_utils.fill_missing(table, {
+            "EMAIL": "unknown@example.com",
+            "PHONE": "000-000-0000",
+            "ADDRESS": "Unknown",
+            "CITY": "Unknown",
+            "STATE": "XX",
+            "ZIP_CODE": "00000"
+        }, report)
+        table = arrow_utils.apply_schema_dtypes(table, schema)
+
+        report.rows_out += table.num_rows
+        if report.total_changes == changes_before:
+            logger.info("ℹ️ No transformations were required.")
+
+        return arrow_utils.add_row_hash(table, schema)
+
+    except Exception as e:
+        logger.error("❌ Error transforming customer table: %s", e)
+        raise
+
+def transform_customer_polars(table, report: TransformReport | None = None, seen_keys: SeenKeys | None = None):
+    """
+    Polars engine version of transform_customer: the same steps as one lazy Polars
+    plan (see transform/polars_utils.py), on a pyarrow Table.
+
+    Returns:
+        pa.Table: The transformed table.
+    """
+    schema = get_schema("customers")
+    report = report if report is not None else TransformReport(schema.name)
+    try:
+        logger.debug("🔍 Incoming table shape: %s", table.shape)
+        report.rows_in += table.num_rows
+        changes_before = report.total_changes
+
+        plan = polars_utils.LazyTransform(table, schema, report)
+        plan.normalize_columns()
+        plan.drop_duplicate_keys(seen_keys)
+        plan.rewrite_columns({
+            "FIRST_NAME": polars_cleaning.clean_title(pl.col("FIRST_NAME")),
+            "LAST_NAME": polars_cleaning.clean_title(pl.col("LAST_NAME")),
+            "GENDER": polars_cleaning.clean_gender(pl.col("GENDER")),
+            "EMAIL": polars_cleaning.clean_email(pl.col("EMAIL")),
+            "ADDRESS": polars_cleaning.clean_title(pl.col("ADDRESS")),
+            "CITY": polars_cleaning.clean_title(pl.col("CITY")),
+            "STATE": polars_cleaning.clean_upper(pl.col("STATE")),
+            "ZIP_CODE": polars_cleaning.clean_zip(pl.col("ZIP_CODE")),
+            "PHONE": polars_cleaning.format_phone(pl.col("PHONE")),
+        })
+        plan.fill_missing({
+            "EMAIL": "unknown@example.com",
+            "PHONE": "000-000-0000",
+            "ADDRESS": "Unknown",
+            "CITY": "Unknown",
+            "STATE": "XX",
+            "ZIP_CODE": "00000"
+        })
+        plan.apply_schema_dtypes()
+        table = plan.collect()
+
+        report.rows_out += table.num_rows
+        if report.total_changes == changes_before:
+            logger.info("ℹ️ No transformations were required.")
+
+        return table
+
+    except Exception as e:
+        logger.error("❌ Error transforming customer table with Polars: %s", e)
+        raise
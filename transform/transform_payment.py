@@ -1,66 +1,142 @@
-import pandas as pd
+from config.schemas import get_schema
+from transform import arrow_utils, polars_utils
+from transform.seen_keys import SeenKeys
+from transform.transform_utils import (
+    TransformReport, add_row_hash, apply_schema_dtypes, coerce_numeric,
+    drop_duplicate_keys, fill_missing, normalize_columns, parse_date_columns
+)
+from utils.logger import get_logger, lazy
 
-def transform_payment(df):
+logger = get_logger("payments")
+
+def transform_payment(df, report: TransformReport | None = None, seen_keys: SeenKeys | None = None):
     """
-    Transforms the payments DataFrame by performing necessary data cleaning and processing.
+    Transforms the payment DataFrame by performing necessary data cleaning and processing.
     
     Args:
         df (pd.DataFrame): The DataFrame containing payment data.
+        report (TransformReport | None): Change counters to update (e.g. shared
+            across chunks); a fresh report is used when omitted.
+        seen_keys (SeenKeys | None): Keys kept from earlier chunks of the same
+            source, so duplicates are also dropped across chunks.
         
     Returns:
         pd.DataFrame: A transformed DataFrame with cleaned and processed payment data.
     """
+    schema = get_schema("payments")
+    report = report if report is not None else TransformReport(schema.name)
     try:
-        print("🔍 Incoming DataFrame shape:", df.shape)
-
-        # Normalize column names to lowercase and strip whitespace
-        df.columns = df.columns.str.strip().str.upper()
+        logger.debug("🔍 Incoming DataFrame shape: %s", df.shape)
+        report.rows_in += len(df)
+        changes_before = report.total_changes
 
-        # Column alias map (to guarantee PAYMENT_ID is found)
-        column_aliases = {
-            "PAY_ID": "PAYMENT_ID",
-            "ID": "PAYMENT_ID",
-            "PAYMENTID": "PAYMENT_ID"
-        }
-        df = df.rename(columns={col: column_aliases[col] for col in df.columns if col in column_aliases})
+        # Normalize column names and aliases from the schema registry
+        df = normalize_columns(df, schema)
 
-        if "PAYMENT_ID" not in df.columns:
-            raise ValueError("❌ PAYMENT_ID column missing after normalization.")
-        
-        print("✅ Columns normalized:", df.columns.tolist())
-        
-        # Track changes for "no transformation" message
-        original_df = df.copy()
+        logger.debug("✅ Columns normalized: %s", lazy(lambda: df.columns.tolist()))
 
         # Deduplicate by PAYMENT_ID
-        df = df.drop_duplicates(subset="payment_id").copy()
-        print("After dedup:", df.shape)
-        
+        df = drop_duplicate_keys(df, schema, report, seen_keys)
+        logger.debug("After dedup: %s", df.shape)
+
         # Ensure numeric types
-        numeric_cols = df.select_dtypes(include=['int64', 'float64']).columns
-        if len(numeric_cols) > 0:
-            df[numeric_cols] = df[numeric_cols].astype(float)
-        print("After numeric conversion:", df.shape)
+        if "PAYMENT_AMOUNT" in df.columns:
+            df = coerce_numeric(df, "PAYMENT_AMOUNT", report)
+        logger.debug("After numeric conversion: %s", df.shape)
 
-        # Fill missing premium_amount
-        if "payment_amount" in df.columns:
-            df["payment_amount"] = df["payment_amount"].fillna(0)
-        print("After filling missing payment_amount:", df.shape)
+        # Fill missing PAYMENT_AMOUNT
+        df = fill_missing(df, {"PAYMENT_AMOUNT": 0}, report)
+        logger.debug("After filling missing payment_amount: %s", df.shape)
 
         # Convert dates safely
-        date_col = ["payment_date"]
-        for col in date_col:
-            if col in df.columns:
-                df.loc[:, col] = pd.to_datetime(df[col], errors="coerce")
-        print("After date conversion:", df.shape)
+        df = parse_date_columns(df, schema, report)
+        logger.debug("After date conversion: %s", df.shape)
+
+        # Compact dtypes (categoricals for PAYMENT_METHOD / STATUS)
+        df = apply_schema_dtypes(df, schema)
 
         # Final shape check
-        print("✅ Final DataFrame shape:", df.shape)
-        if df.equals(original_df):
-            print("⚠️ No transformations were applied to the DataFrame.")
+        logger.debug("✅ Final DataFrame shape: %s", df.shape)
+
+        # Counters were updated step by step; no copy of the input is needed
+        report.rows_out += len(df)
+        if report.total_changes == changes_before:
+            logger.warning("⚠️ No transformations were applied to the DataFrame.")
+
+        # Content hash used by the loaders to skip no-op updates
+        df = add_row_hash(df, schema)
 
         return df
 
     except Exception as e:
-        print(f"❌ Error transforming payments DataFrame: {e}")
-        return pd.DataFrame()
+        logger.error("❌ Error transforming payments DataFrame: %s", e)
+        raise
+
+def transform_payment_arrow(table, report: TransformReport | None = None, seen_keys: SeenKeys | None = None):
+    """
+    Arrow engine version of transform_payment: the same steps with pyarrow.compute
+    (see transform/arrow_utils.py), on a pyarrow Table.
+
+    Returns:
+        pa.Table: The transformed table.
+    """
+    schema = get_schema("payments")
+    report = report if report is not None else TransformReport(schema.name)
+    try:
+        logger.debug("🔍 Incoming table shape: %s", table.shape)
+        report.rows_in += table.num_rows
+        changes_before = report.total_changes
+
+        table = arrow_utils.normalize_columns(table, schema)
+
+        table = arrow_utils.drop_duplicate_keys(table, schema, report, seen_keys)
+        if "PAYMENT_AMOUNT" in table.column_names:
+            table = arrow_utils.coerce_numeric(table, "PAYMENT_AMOUNT", report)
+        table = arrow_utils.fill_missing(table, {"PAYMENT_AMOUNT": 0}, report)
+        table = arrow_utils.parse_date_columns(table, schema, report)
+        table = arrow_utils.apply_schema_dtypes(table, schema)
+
+        report.rows_out += table.num_rows
+        if report.total_changes == changes_before:
+            logger.warning("⚠️ No transformations were applied to the table.")
+
+        return arrow_utils.add_row_hash(table, schema)
+
+    except Exception as e:
+        logger.error("❌ Error transforming payments table: %s", e)
+        raise
+
+def transform_payment_polars(table, report: TransformReport | None = None, seen_keys: SeenKeys | None = None):
+    """
+    Polars engine version of transform_payment: the same steps as one lazy Polars
+    plan (see transform/polars_utils.py), on a pyarrow Table.
+
+    Returns:
+        pa.Table: The transformed table.
+    """
+    schema = get_schema("payments")
+    report = report if report is not None else TransformReport(schema.name)
+    try:
+        logger.debug("🔍 Incoming table shape: %s", table.shape)
+        report.rows_in += table.num_rows
+        changes_before = report.total_changes
+
+        plan = polars_utils.LazyTransform(table, schema, report)
+        plan.normalize_columns()
+        plan.drop_duplicate_keys(seen_keys)
+        if "PAYMENT_AMOUNT" in plan.columns:
+            plan.coerce_numeric("PAYMENT_AMOUNT")
+        plan.fill_missing({"PAYMENT_AMOUNT": 0})
+        plan.parse_date_columns()
+        plan.apply_schema_dtypes()
+        table = plan.collect()
+
+        report.rows_out += table.num_rows
+        if report.total_changes == changes_before:
+            logger.warning("⚠️ No transformations were applied to the table.")
+
+        return table
+
+    except Exception as e:
+        logger.error("❌ Error transforming payments table with Polars: %s", e)
+        raise
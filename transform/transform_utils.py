@@ -0,0 +1,307 @@
+import threading
+import warnings
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import polars as pl
+from pandas.tseries.api import guess_datetime_format
+
+from config.schemas import ROW_HASH_COLUMN, EntitySchema
+from transform.row_hash import row_hash_values
+from transform.seen_keys import SeenKeys
+
+# Distinct values of a date column sampled to check or infer its format
+DATE_SAMPLE_SIZE = 1000
+
+# (entity, column) -> format resolved from the first sample, reused for every
+# later chunk and run in the process
+_date_formats: dict[tuple[str, str], str | None] = {}
+_date_formats_lock = threading.Lock()
+
+@dataclass
+class TransformReport:
+    """
+    Change counters collected step by step while an entity is transformed.
+
+    The counters are updated in place by the helpers below, so there is no
+    need to keep a copy of the input frame around to find out what changed.
+    In chunked runs one report accumulates the counts of every chunk.
+
+    Args:
+        entity (str): Entity name in the schema registry.
+        rows_in (int): Rows received by the transform.
+        rows_out (int): Rows returned by the transform.
+        duplicates_dropped (int): Rows removed by key deduplication.
+        cells_filled (dict[str, int]): Column -> missing values filled with a default.
+        values_rewritten (dict[str, int]): Column -> values changed by cleaning.
+        values_coerced_to_null (dict[str, int]): Column -> unparseable values turned into NaN/NaT.
+    """
+    entity: str
+    rows_in: int = 0
+    rows_out: int = 0
+    duplicates_dropped: int = 0
+    cells_filled: dict[str, int] = field(default_factory=dict)
+    values_rewritten: dict[str, int] = field(default_factory=dict)
+    values_coerced_to_null: dict[str, int] = field(default_factory=dict)
+
+    @staticmethod
+    def _add(counter: dict[str, int], column: str, count: int):
+        if count:
+            counter[column] = counter.get(column, 0) + int(count)
+
+    @property
+    def total_changes(self) -> int:
+        return self.duplicates_dropped + sum(
+            sum(counter.values())
+            for counter in (self.cells_filled, self.values_rewritten, self.values_coerced_to_null)
+        )
+
+    def summary(self) -> str:
+        """
+        One-line human-readable summary of the counters.
+        """
+        parts = [f"{self.rows_in} rows in", f"{self.rows_out} rows out", f"{self.duplicates_dropped} duplicates dropped"]
+        for label, counter in (
+            ("filled", self.cells_filled),
+            ("rewritten", self.values_rewritten),
+            ("coerced to null", self.values_coerced_to_null),
+        ):
+            if counter:
+                parts.append(f"{label}: " + ", ".join(f"{col}={n}" for col, n in counter.items()))
+        return f"{self.entity}: " + "; ".join(parts)
+
+def drop_duplicate_keys(
+    df: pd.DataFrame, schema: EntitySchema, report: TransformReport, seen_keys: SeenKeys | None = None
+) -> pd.DataFrame:
+    """
+    Keep the first row per entity key and count the dropped duplicates.
+    With `seen_keys` (chunked transforms), keys already kept from earlier
+    chunks are dropped as well.
+    """
+    rows = len(df)
+    if seen_keys is None:
+        df = df.drop_duplicates(subset=schema.key)
+    else:
+        df = df[seen_keys.filter_new(df[schema.key])]
+    report.duplicates_dropped += rows - len(df)
+    return df
+
+def fill_missing(df: pd.DataFrame, defaults: dict[str, Any], report: TransformReport) -> pd.DataFrame:
+    """
+    Fill missing values of the given columns with their defaults, in place,
+    counting the filled cells. Columns absent from the frame are ignored.
+    """
+    for column, value in defaults.items():
+        if column not in df.columns:
+            continue
+        series = df[column]
+        missing = int(series.isna().sum())
+        if missing:
+            if isinstance(series.dtype, pd.CategoricalDtype) and value not in series.cat.categories:
+                series = series.cat.add_categories([value])
+            df[column] = series.fillna(value)
+            report._add(report.cells_filled, column, missing)
+    return df
+
+def rewrite_column(df: pd.DataFrame, column: str, cleaned: pd.Series, report: TransformReport) -> pd.DataFrame:
+    """
+    Replace a column with its cleaned version, in place, counting the values
+    that actually changed (missing values count as equal to each other).
+    """
+    old = df[column].to_numpy(dtype="object", na_value=None)
+    new = cleaned.to_numpy(dtype="object", na_value=None)
+    report._add(report.values_rewritten, column, (old != new).sum())
+    df[column] = cleaned
+    return df
+
+def coerce_numeric(df: pd.DataFrame, column: str, report: TransformReport) -> pd.DataFrame:
+    """
+    Convert a column to numbers, in place; unparseable values become NaN and are counted.
+    """
+    missing_before = int(df[column].isna().sum())
+    df[column] = pd.to_numeric(df[column], errors="coerce")
+    report._add(report.values_coerced_to_null, column, int(df[column].isna().sum()) - missing_before)
+    return df
+
+def parse_date_columns(df: pd.DataFrame, schema: EntitySchema, report: TransformReport) -> pd.DataFrame:
+    """
+    Parse every registered date column present in the frame, in place;
+    unparseable values become NaT and are counted.
+    """
+    for column in schema.date_columns:
+        if column in df.columns:
+            missing_before = int(df[column].isna().sum())
+            df[column] = parse_dates(df[column], schema.column(column).date_format, (schema.name, column))
+            report._add(report.values_coerced_to_null, column, int(df[column].isna().sum()) - missing_before)
+    return df
+
+def normalize_columns(df: pd.DataFrame, schema: EntitySchema) -> pd.DataFrame:
+    """
+    Upper-case and strip column names, apply the schema aliases and make sure
+    the entity key column is present.
+
+    Args:
+        df (pd.DataFrame): Incoming DataFrame.
+        schema (EntitySchema): Registered schema of the entity.
+
+    Returns:
+        pd.DataFrame: DataFrame with normalized column names.
+    """
+    df.columns = df.columns.str.strip().str.upper()
+    df = df.rename(columns={col: schema.aliases[col] for col in df.columns if col in schema.aliases})
+
+    if schema.key not in df.columns:
+        raise ValueError(f"❌ {schema.key} column missing after normalization.")
+
+    return df
+
+def _parse_rate(values: pd.Index, date_format: str) -> float:
+    return float(pd.to_datetime(values, format=date_format, errors="coerce").notna().mean())
+
+def infer_date_format(values: pd.Index) -> str | None:
+    """
+    Most common format guessed for a sample of date strings (None if no
+    value looks like a date).
+    """
+    with warnings.catch_warnings():
+        # Day-first guesses warn; the majority vote settles them for the whole column
+        warnings.simplefilter("ignore", UserWarning)
+        guesses = Counter(guess_datetime_format(v) for v in values[:DATE_SAMPLE_SIZE])
+    guesses.pop(None, None)
+    return guesses.most_common(1)[0][0] if guesses else None
+
+def resolve_date_format(values: pd.Index, date_format: str | None, cache_key: tuple[str, str] | None = None) -> str | None:
+    """
+    Format to parse a date column with: the declared one if it fits a sample
+    of the values, otherwise the format inferred from that sample when it
+    fits better. With a `cache_key` ((entity, column)) the decision is made
+    once and reused for the following chunks, until forget_date_formats.
+    """
+    if cache_key is not None:
+        with _date_formats_lock:
+            if cache_key in _date_formats:
+                return _date_formats[cache_key]
+
+    sample = values[:DATE_SAMPLE_SIZE]
+    if not len(sample):
+        return date_format
+
+    resolved = date_format
+    declared_rate = _parse_rate(sample, date_format) if date_format else 0.0
+    if declared_rate < 1.0:
+        inferred = infer_date_format(sample)
+        if inferred and inferred != date_format and _parse_rate(sample, inferred) > declared_rate:
+            resolved = inferred
+
+    if cache_key is not None:
+        with _date_formats_lock:
+            _date_formats.setdefault(cache_key, resolved)
+    return resolved
+
+def forget_date_formats(entity: str):
+    """
+    Drop the date formats resolved for an entity, so its next chunk resolves
+    them from its own values. The pipeline calls this whenever an entity
+    moves on to another source file (or another run), since each file may
+    write its dates differently.
+    """
+    with _date_formats_lock:
+        for key in [key for key in _date_formats if key[0] == entity]:
+            del _date_formats[key]
+
+def parse_mixed_dates(values: pd.Index, after_format: bool = False) -> pd.DatetimeIndex:
+    """
+    Parse date strings of any format, value by value (slow); unparseable
+    values become NaT. With `after_format` (values that did not match the
+    column's format) values with different UTC offsets are accepted too and
+    converted to naive UTC.
+    """
+    if not after_format:
+        return pd.DatetimeIndex(pd.to_datetime(values, format="mixed", errors="coerce"))
+    # utc=True so values with different offsets parse; naive ones are unchanged
+    return pd.to_datetime(values, format="mixed", errors="coerce", utc=True).tz_convert(None)
+
+def parse_dates(series: pd.Series, date_format: str | None, cache_key: tuple[str, str] | None = None) -> pd.Series:
+    """
+    Parse a date column; unparseable values become NaT.
+
+    Each distinct value is parsed once, with an explicit format (the declared
+    one or one inferred from a sample, see resolve_date_format). Only values
+    that do not match it go through pandas' slow per-value inference.
+
+    Args:
+        series (pd.Series): Date strings.
+        date_format (str | None): Declared strptime format.
+        cache_key (tuple[str, str] | None): (entity, column) the resolved format is cached under.
+
+    Returns:
+        pd.Series: datetime64 values aligned with `series`.
+    """
+    codes, uniques = pd.factorize(series)
+    if not len(uniques):
+        return pd.to_datetime(series, format=date_format, errors="coerce")
+    uniques = pd.Index(np.asarray(uniques, dtype=object)).astype("str")
+    date_format = resolve_date_format(uniques, date_format, cache_key)
+
+    if date_format:
+        parsed = pd.to_datetime(uniques, format=date_format, errors="coerce")
+    else:
+        parsed = parse_mixed_dates(uniques)
+    failed = np.flatnonzero(parsed.isna())
+    if date_format and len(failed):
+        fallback = parse_mixed_dates(uniques[failed], after_format=True)
+        parsed = parsed.to_numpy(copy=True)
+        parsed[failed] = fallback.as_unit(np.datetime_data(parsed.dtype)[0]).to_numpy()
+        parsed = pd.DatetimeIndex(parsed)
+
+    # factorize codes missing values as -1
+    return pd.Series(parsed.take(codes, allow_fill=True, fill_value=pd.NaT), index=series.index, name=series.name)
+
+def apply_schema_dtypes(df: pd.DataFrame, schema: EntitySchema) -> pd.DataFrame:
+    """
+    Cast the entity's columns to their compact registered dtypes: categoricals
+    for low-cardinality text, float64 amounts and parsed dates.
+
+    Args:
+        df (pd.DataFrame): Transformed DataFrame.
+        schema (EntitySchema): Registered schema of the entity.
+
+    Returns:
+        pd.DataFrame: The same DataFrame with columns cast in place.
+    """
+    for spec in schema.columns:
+        if spec.name not in df.columns:
+            continue
+        col = df[spec.name]
+        if spec.dtype == "category" and not isinstance(col.dtype, pd.CategoricalDtype):
+            df[spec.name] = col.astype("category")
+        elif spec.dtype == "float64" and col.dtype != "float64":
+            df[spec.name] = pd.to_numeric(col, errors="coerce").astype("float64")
+        elif spec.dtype == "datetime" and not pd.api.types.is_datetime64_any_dtype(col):
+            df[spec.name] = parse_dates(col, spec.date_format)
+    return df
+
+def add_row_hash(df: pd.DataFrame, schema: EntitySchema) -> pd.DataFrame:
+    """
+    Add a deterministic content hash of the registered columns as ROW_HASH.
+
+    The hash only depends on the column values (not on whether text is held
+    as str, object or category, on column order in the frame or on the
+    index), so re-delivered identical rows always get the same ROW_HASH and
+    the loaders can skip updating them. Missing registry columns hash as
+    NULL, like they are staged. Every engine computes it with
+    transform/row_hash.py.
+
+    Args:
+        df (pd.DataFrame): Transformed DataFrame.
+        schema (EntitySchema): Registered schema of the entity.
+
+    Returns:
+        pd.DataFrame: The same DataFrame with a signed 64-bit ROW_HASH column.
+    """
+    columns = pl.from_pandas(df[[c for c in schema.column_names if c in df.columns]])
+    df[ROW_HASH_COLUMN] = row_hash_values(columns, schema)
+    return df
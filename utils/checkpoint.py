@@ -0,0 +1,205 @@
+"""
+Stage checkpoints of a pipeline run, so a failed run can be resumed
+(main.py --resume) without extracting and transforming its sources again.
+
+The output of the extract ("raw") and transform ("transformed") stages of
+each entity is written as zstd-compressed Arrow IPC files, one per chunk,
+under <CHECKPOINT_DIR>/<run_id>/<entity>/. A JSON manifest is written once
+the last part is complete, with the signature of what produced the parts:
+the read plans and fingerprints of the source files, the engine, the chunk
+size and the entity schema. A checkpoint is only used when its manifest
+exists and its signature matches the resuming run's, so a source file that
+changed since the failed run is read again.
+
+Transform code is not part of the signature: after fixing a transform, run
+without --resume.
+"""
+import hashlib
+import json
+import os
+import shutil
+from dataclasses import asdict, is_dataclass
+from typing import Iterable, Iterator
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from config.config import config
+from config.schemas import get_schema
+from extract.state_store import ReadPlan
+from utils.logger import get_logger
+
+CHECKPOINT_VERSION = 1
+
+
+def _signature(entity: str, plans: list[ReadPlan], engine: str, chunksize: int) -> dict:
+    sources = []
+    for plan in plans:
+        state = plan.processed(0)
+        sources.append({
+            **asdict(plan),
+            "mtime_ns": os.stat(plan.path).st_mtime_ns,
+            "head_hash": state.head_hash,
+            "anchor_hash": state.anchor_hash,
+        })
+    return {
+        "version": CHECKPOINT_VERSION,
+        "engine": engine,
+        "chunksize": chunksize,
+        "schema": hashlib.sha256(repr(get_schema(entity)).encode()).hexdigest(),
+        "sources": sources,
+    }
+
+
+class RunCheckpoints:
+    """
+    Checkpoint directory of one pipeline run.
+
+    The object itself only holds paths, so it can be passed to worker
+    processes.
+
+    Args:
+        run_id (str): Run the checkpoints belong to (the failed run when resuming).
+        directory (str | None): Root directory of every run's checkpoints;
+            defaults to the configured one.
+    """
+
+    def __init__(self, run_id: str, directory: str | None = None):
+        self.run_id = run_id
+        self.directory = directory or config["checkpoint"]["dir"]
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, self.run_id)
+
+    @classmethod
+    def latest(cls, directory: str | None = None) -> "RunCheckpoints | None":
+        """
+        Checkpoints of the most recent run that left some (run IDs sort by
+        start time), or None.
+        """
+        directory = directory or config["checkpoint"]["dir"]
+        runs = sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+        return cls(runs[-1], directory) if runs else None
+
+    def exists(self) -> bool:
+        return os.path.isdir(self.path)
+
+    def entity(self, name: str, plans: list[ReadPlan], engine: str, chunksize: int) -> "EntityCheckpoint":
+        """
+        Checkpoints of one entity, valid for the given read plans, engine and
+        chunk size.
+        """
+        return EntityCheckpoint(name, os.path.join(self.path, name), _signature(name, plans, engine, chunksize), engine)
+
+    def remove_obsolete(self):
+        """
+        Delete the checkpoints of this run and every earlier one. Once a load
+        has committed, the extract state has moved past all of them.
+        """
+        if not os.path.isdir(self.directory):
+            return
+        for run_id in os.listdir(self.directory):
+            if run_id <= self.run_id:
+                shutil.rmtree(os.path.join(self.directory, run_id), ignore_errors=True)
+
+
+class EntityCheckpoint:
+    """
+    Checkpointed stage outputs of one entity in one run.
+
+    Args:
+        entity (str): Entity name.
+        directory (str): Directory of the entity's part files and manifests.
+        signature (dict): Inputs the checkpoints must have been written for.
+        engine (str): Pipeline engine; the pandas engine reads parts back as DataFrames.
+    """
+
+    def __init__(self, entity: str, directory: str, signature: dict, engine: str):
+        self.entity = entity
+        self.directory = directory
+        self.signature = signature
+        self.engine = engine
+
+    def _part_path(self, stage: str, part: int) -> str:
+        return os.path.join(self.directory, f"{stage}-{part:05d}.arrow")
+
+    def _manifest_path(self, stage: str) -> str:
+        return os.path.join(self.directory, f"{stage}.json")
+
+    def manifest(self, stage: str) -> dict | None:
+        """
+        Manifest of a stage's checkpoint, or None unless it is complete and
+        was written for the same inputs.
+        """
+        try:
+            with open(self._manifest_path(stage), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get("signature") != self.signature:
+            return None
+        if not all(os.path.exists(self._part_path(stage, part)) for part in range(manifest["parts"])):
+            return None
+        return manifest
+
+    def read(self, stage: str, manifest: dict) -> Iterator[pd.DataFrame | pa.Table]:
+        """
+        Yield the checkpointed parts of a stage, memory-mapped.
+        """
+        for part in range(manifest["parts"]):
+            table = feather.read_table(self._part_path(stage, part), memory_map=True)
+            yield table.to_pandas() if self.engine == "pandas" else table
+
+    def _clear(self, stage: str):
+        for path in (self._manifest_path(stage), *(
+            os.path.join(self.directory, f) for f in os.listdir(self.directory) if f.startswith(f"{stage}-")
+        )):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def write(self, stage: str, parts: Iterable[pd.DataFrame | pa.Table], **info) -> Iterator[pd.DataFrame | pa.Table]:
+        """
+        Pass the parts of a stage through, writing each one as it goes, then
+        the manifest. `info` (e.g. the rows read or the transform report) is
+        serialized with the manifest, after the last part, so counters updated
+        along the way are complete.
+
+        A stage that raises never gets a manifest, so its partial output is
+        never resumed from. A checkpoint that cannot be written is logged and
+        abandoned; the run itself goes on.
+        """
+        log = get_logger(self.entity)
+        count = 0
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self._clear(stage)
+        except OSError as e:
+            log.warning("Could not write the %s checkpoint of %s: %s", stage, self.entity, e)
+            count = None
+        for data in parts:
+            if count is not None:
+                try:
+                    table = data if isinstance(data, pa.Table) else pa.Table.from_pandas(data, preserve_index=False)
+                    feather.write_feather(table, self._part_path(stage, count), compression="zstd")
+                    count += 1
+                except (OSError, pa.ArrowException) as e:
+                    log.warning("Could not write the %s checkpoint of %s: %s", stage, self.entity, e)
+                    count = None
+            yield data
+        if count is None:
+            return
+
+        manifest = {
+            "signature": self.signature,
+            "parts": count,
+            **{key: asdict(value) if is_dataclass(value) else value for key, value in info.items()},
+        }
+        tmp_path = f"{self._manifest_path(stage)}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_path, self._manifest_path(stage))
+        except OSError as e:
+            log.warning("Could not write the %s checkpoint of %s: %s", stage, self.entity, e)
@@ -1,12 +1,203 @@
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import threading
+from functools import lru_cache
 
-logging.basicConfig(
-    # Configure the logging system
-    level=logging.INFO,
-    # Set the logging level to INFO to capture all messages at this level and above     
-    format="%(asctime)s [%(levelname)s] %(message)s"
-)
+from config.config import config
+
+# Parent of every pipeline logger; entity loggers are its children (insurance_etl.<entity>)
+LOGGER_NAME = "insurance_etl"
+
+# Run id of the current pipeline run, inherited by worker processes through the environment
+RUN_ID_ENV = "ETL_RUN_ID"
+
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(context)s%(message)s"
+
+
+class lazy:
+    """
+    Defer an expensive log argument until the record is actually formatted.
+
+    Logging only formats arguments of records whose level is enabled, so
+        logger.debug("Columns: %s", lazy(lambda: df.columns.tolist()))
+    costs nothing when DEBUG is off.
+    """
+
+    __slots__ = ("func",)
+
+    def __init__(self, func):
+        self.func = func
+
+    def __str__(self) -> str:
+        return str(self.func())
+
+    __repr__ = __str__
+
+
+class _ContextFilter(logging.Filter):
+    """
+    Stamp every record with the run id and (for entity loggers) the entity.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "run_id", None):
+            record.run_id = os.environ.get(RUN_ID_ENV, "")
+        if not hasattr(record, "entity"):
+            record.entity = ""
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    """
+    Human-readable lines: time, level, [run entity] and the message.
+    """
+
+    def __init__(self):
+        super().__init__(TEXT_FORMAT)
+
+    def format(self, record: logging.LogRecord) -> str:
+        parts = [p for p in (getattr(record, "run_id", ""), getattr(record, "entity", "")) if p]
+        record.context = f"[{' '.join(parts)}] " if parts else ""
+        return super().format(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line, for log shippers.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "run_id": getattr(record, "run_id", "") or None,
+            "entity": getattr(record, "entity", "") or None,
+            "message": record.getMessage(),
+        }
+        # Records from the queue carry the traceback as text only (see _QueueHandler)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue records with their message merged and their traceback rendered to
+    `exc_text`, which the console formatters print (the base class would
+    append the traceback to the message and drop it).
+    """
+
+    _formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self._formatter.formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+_listener: logging.handlers.QueueListener | None = None
+_queue_handler: _QueueHandler | None = None
+_setup_lock = threading.Lock()
+
+
+def _start_listener():
+    """
+    Route root-logger records through a queue to a console handler running on
+    a listener thread, so threads that log never do console I/O themselves.
+    """
+    global _listener, _queue_handler
+    settings = config["logging"]
+    console = logging.StreamHandler()
+    console.setFormatter(JsonFormatter() if settings["format"] == "json" else TextFormatter())
+
+    log_queue = queue.SimpleQueue()
+    handler = _QueueHandler(log_queue)
+    handler.addFilter(_ContextFilter())
+
+    root = logging.getLogger()
+    if _queue_handler is not None:
+        root.removeHandler(_queue_handler)
+    root.addHandler(handler)
+    root.setLevel(settings["level"].upper())
+
+    _queue_handler = handler
+    _listener = logging.handlers.QueueListener(log_queue, console, respect_handler_level=True)
+    _listener.start()
+
+
+def setup_logging():
+    """
+    Install the queue-based logging configuration once per process. Called
+    by the entry points (main.main, extraction worker processes); importing
+    the pipeline modules leaves logging alone.
+    """
+    with _setup_lock:
+        if _listener is None:
+            _start_listener()
+
+
+def shutdown_logging():
+    """
+    Stop the listener thread after it has written every queued record.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def _restart_after_fork():
+    # The listener thread does not survive fork(): without a new one, records
+    # logged in a forked worker process would sit in the queue forever
+    global _listener
+    if _listener is not None:
+        _listener = None
+        _start_listener()
+
+
+def set_run_id(run_id: str):
+    """
+    Attach `run_id` to every record logged from now on, in this process and
+    in worker processes started afterwards.
+    """
+    os.environ[RUN_ID_ENV] = run_id
+
+
+@lru_cache(maxsize=None)
+def get_logger(entity: str | None = None) -> logging.Logger | logging.LoggerAdapter:
+    """
+    Pipeline logger, or the child logger of one entity whose records carry
+    the entity name (and, like all records, the run id).
+
+    Args:
+        entity (str | None): Entity name in the schema registry.
+
+    Returns:
+        logging.Logger | logging.LoggerAdapter: Logger to use.
+    """
+    if entity is None:
+        return logging.getLogger(LOGGER_NAME)
+    return logging.LoggerAdapter(logging.getLogger(f"{LOGGER_NAME}.{entity}"), {"entity": entity})
+
+
+atexit.register(shutdown_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_after_fork)
 
 # Create a logger object
 # This logger will be used to log messages throughout the application
-logger = logging.getLogger()
\ No newline at end of file
+logger = get_logger()
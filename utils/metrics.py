@@ -0,0 +1,296 @@
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Stages recorded per entity, in pipeline order
+STAGES = ("extract", "transform", "validate", "stage", "load")
+
+# Seconds between two samples of the process RSS while a stage is tracked
+RSS_SAMPLE_SECONDS = 0.02
+
+
+def peak_rss_bytes() -> int:
+    """
+    Peak resident set size of the current process so far (0 where unsupported).
+    """
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def current_rss_bytes() -> int:
+    """
+    Resident set size of the current process now; the peak so far where the
+    current value cannot be read (no /proc).
+    """
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+
+def process_cpu_seconds() -> float:
+    """
+    CPU time of every thread of this process (including Arrow, Polars and
+    DuckDB worker threads) plus that of its child processes that have exited
+    (spawned extract workers, once they are joined).
+    """
+    seconds = time.process_time()
+    if resource is not None:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        seconds += children.ru_utime + children.ru_stime
+    return seconds
+
+
+class PeakRss:
+    """
+    Peak RSS of this process while a `with` block runs.
+
+    A shared background thread samples the RSS every RSS_SAMPLE_SECONDS
+    while any block is open. When the process reaches a new all-time peak
+    (ru_maxrss) during the block, that exact peak is used too, so short
+    spikes between samples are only missed below earlier peaks.
+
+    Attributes:
+        bytes (int): Highest RSS observed so far.
+    """
+
+    _open: set["PeakRss"] = set()
+    _lock = threading.Lock()
+    _sampler: threading.Thread | None = None
+
+    def __enter__(self) -> "PeakRss":
+        self._start_peak = peak_rss_bytes()
+        self.bytes = current_rss_bytes()
+        cls = type(self)
+        with cls._lock:
+            cls._open.add(self)
+            if cls._sampler is None:
+                cls._sampler = threading.Thread(target=cls._sample, name="rss-sampler", daemon=True)
+                cls._sampler.start()
+        return self
+
+    def __exit__(self, *exc):
+        with type(self)._lock:
+            type(self)._open.discard(self)
+        self.bytes = max(self.bytes, current_rss_bytes())
+        end_peak = peak_rss_bytes()
+        if end_peak > self._start_peak:
+            self.bytes = max(self.bytes, end_peak)
+
+    @classmethod
+    def _sample(cls):
+        while True:
+            time.sleep(RSS_SAMPLE_SECONDS)
+            rss = current_rss_bytes()
+            with cls._lock:
+                if not cls._open:
+                    cls._sampler = None
+                    return
+                for block in cls._open:
+                    block.bytes = max(block.bytes, rss)
+
+
+def new_run_id() -> str:
+    """
+    Sortable, unique identifier of one pipeline run, e.g. 20260101T020000Z-1a2b3c.
+    """
+    return f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-{uuid.uuid4().hex[:6]}"
+
+
+@dataclass
+class StageMetrics:
+    """
+    Measurements of one stage of one entity.
+
+    Args:
+        entity (str): Entity name in the schema registry.
+        stage (str): One of STAGES.
+        wall_seconds (float): Elapsed time spent in the stage.
+        cpu_seconds (float): CPU time of the process during the stage, see process_cpu_seconds.
+        rows_in (int): Rows handed to the stage.
+        rows_out (int): Rows produced by the stage.
+        bytes (int): Bytes staged (stage) or loaded (load).
+        peak_rss_bytes (int): Peak RSS of the process during the stage, see PeakRss.
+        inserted (int): Rows inserted by the MERGE (load only).
+        updated (int): Rows updated by the MERGE (load only).
+        unchanged (int): Matched rows whose update was skipped (load only).
+    """
+    entity: str
+    stage: str
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    rows_in: int = 0
+    rows_out: int = 0
+    bytes: int = 0
+    peak_rss_bytes: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_out / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    @contextmanager
+    def track(self):
+        """
+        Add the wall and CPU time of the `with` body to this stage and raise
+        its peak RSS to the one reached during the body. Can be entered
+        repeatedly, e.g. once per chunk.
+
+        CPU time and RSS are those of the whole process, so while DAG tasks
+        run in parallel threads (PIPELINE_MAX_WORKERS) they include the work
+        of the stages running at the same time.
+        """
+        wall_start, cpu_start = time.perf_counter(), process_cpu_seconds()
+        rss = PeakRss()
+        try:
+            with rss:
+                yield self
+        finally:
+            self.wall_seconds += time.perf_counter() - wall_start
+            self.cpu_seconds += process_cpu_seconds() - cpu_start
+            self.peak_rss_bytes = max(self.peak_rss_bytes, rss.bytes)
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "rows_per_second": round(self.rows_per_second, 1)}
+
+
+@dataclass
+class RunReport:
+    """
+    Metrics of one pipeline run, written as JSON and as a Prometheus
+    textfile-collector file.
+
+    Args:
+        run_id (str): Identifier of the run (see new_run_id).
+        started_at (str): ISO-8601 UTC start time.
+        finished_at (str | None): ISO-8601 UTC end time.
+        status (str): "running", "success" or "failed".
+        wall_seconds (float): Duration of the whole run.
+        peak_rss_bytes (int): Peak RSS of the main process.
+        stages (list[StageMetrics]): Per entity and stage measurements.
+        integrity (list[dict]): Reference check reports (see transform/integrity.py).
+    """
+    run_id: str = field(default_factory=new_run_id)
+    started_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat(timespec="seconds"))
+    finished_at: str | None = None
+    status: str = "running"
+    wall_seconds: float = 0.0
+    peak_rss_bytes: int = 0
+    stages: list[StageMetrics] = field(default_factory=list)
+    integrity: list[dict] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._wall_start = time.perf_counter()
+
+    def finish(self, success: bool):
+        """
+        Record the end of the run.
+        """
+        self.finished_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.status = "success" if success else "failed"
+        self.wall_seconds = time.perf_counter() - self._wall_start
+        self.peak_rss_bytes = peak_rss_bytes()
+
+    def to_dict(self) -> dict:
+        return {
+            "run_id": self.run_id,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "status": self.status,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "peak_rss_bytes": self.peak_rss_bytes,
+            "stages": [s.to_dict() for s in self.stages],
+            "integrity": self.integrity,
+        }
+
+    def write_json(self, report_dir: str) -> str:
+        """
+        Write the report to <report_dir>/run_<run_id>.json and return its path.
+        """
+        os.makedirs(report_dir, exist_ok=True)
+        path = os.path.join(report_dir, f"run_{self.run_id}.json")
+        _atomic_write(path, json.dumps(self.to_dict(), indent=2))
+        return path
+
+    def to_prometheus(self) -> str:
+        """
+        Render the report in the Prometheus text exposition format.
+        """
+        finished = datetime.fromisoformat(self.finished_at).timestamp() if self.finished_at else time.time()
+        lines = []
+
+        def metric(name: str, help_text: str, kind: str, samples: list[tuple[dict, float]]):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                rendered = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{name}{{{rendered}}} {value}" if rendered else f"{name} {value}")
+
+        metric("etl_run_success", "1 if the last run succeeded, 0 otherwise.", "gauge",
+               [({}, int(self.status == "success"))])
+        metric("etl_run_last_finished_timestamp_seconds", "Unix time the last run finished.", "gauge",
+               [({}, round(finished, 3))])
+        metric("etl_run_duration_seconds", "Wall time of the last run.", "gauge",
+               [({}, round(self.wall_seconds, 3))])
+        metric("etl_run_peak_rss_bytes", "Peak RSS of the pipeline process during the last run.", "gauge",
+               [({}, self.peak_rss_bytes)])
+
+        per_stage = [
+            ("etl_stage_wall_seconds", "Wall time per entity and stage.", "wall_seconds"),
+            ("etl_stage_cpu_seconds", "CPU time per entity and stage.", "cpu_seconds"),
+            ("etl_stage_rows_in", "Rows handed to each entity stage.", "rows_in"),
+            ("etl_stage_rows_out", "Rows produced by each entity stage.", "rows_out"),
+            ("etl_stage_rows_per_second", "Output rows per wall-clock second per entity and stage.", "rows_per_second"),
+            ("etl_stage_bytes", "Bytes staged or loaded per entity and stage.", "bytes"),
+            ("etl_stage_peak_rss_bytes", "Peak process RSS during each entity stage.", "peak_rss_bytes"),
+        ]
+        for name, help_text, attr in per_stage:
+            metric(name, help_text, "gauge", [
+                ({"entity": s.entity, "stage": s.stage}, round(getattr(s, attr), 3))
+                for s in self.stages
+            ])
+
+        metric("etl_merge_rows", "Rows per MERGE outcome per entity in the last run.", "gauge", [
+            ({"entity": s.entity, "action": action}, getattr(s, action))
+            for s in self.stages if s.stage == "load"
+            for action in ("inserted", "updated", "unchanged")
+        ])
+        metric("etl_orphan_rows", "Rows per entity and reference column whose key had no match in the last run.", "gauge", [
+            ({"entity": report["entity"], "column": column}, count)
+            for report in self.integrity
+            for column, count in report["orphans"].items()
+        ])
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> str:
+        """
+        Write the textfile-collector file atomically, so node_exporter never
+        reads a half-written file.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        _atomic_write(path, self.to_prometheus())
+        return path
+
+
+def _atomic_write(path: str, content: str):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
@@ -1,15 +1,215 @@
+import atexit
+import queue
+import threading
+import time
+
 import requests
 from config.config import config
+from utils.logger import get_logger
+
+logger = get_logger()
+
+
+class SlackNotifier:
+    """
+    Deliver Slack webhook messages from a background thread so callers never
+    wait on the network.
+
+    Messages go into a bounded queue (the oldest is dropped when it is full).
+    The worker coalesces messages that arrive within `coalesce_seconds` of each
+    other into one digest post, and retries failed posts (timeouts, connection
+    errors, HTTP 429 and 5xx) with exponential backoff.
+
+    Args:
+        webhook_url (str | None): Incoming webhook URL; without one messages are discarded.
+        timeout (float): Seconds to wait for the webhook to connect and to answer.
+        max_retries (int): Retries per post after the first attempt.
+        backoff (float): Initial retry delay in seconds, doubled on every retry.
+        queue_size (int): Maximum number of undelivered messages kept.
+        coalesce_seconds (float): Quiet period after a message before the digest is sent.
+        max_batch (int): Maximum number of messages per digest.
+    """
+
+    def __init__(
+        self,
+        webhook_url: str | None,
+        timeout: float = 5.0,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        queue_size: int = 100,
+        coalesce_seconds: float = 2.0,
+        max_batch: int = 20,
+    ):
+        self.webhook_url = webhook_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.coalesce_seconds = coalesce_seconds
+        self.max_batch = max(1, max_batch)
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.queue_size = max(1, queue_size)
+        # One slot more than queue_size for the stop marker of close()
+        self._queue: queue.Queue = queue.Queue(maxsize=self.queue_size + 1)
+        self._lock = threading.Lock()
+        self._closing = threading.Event()
+        self._deadline: float | None = None
+        self._stop = object()
+        self._thread = threading.Thread(target=self._run, name="slack-notifier", daemon=True)
+        self._thread.start()
+
+    def notify(self, message: str):
+        """
+        Queue a message for delivery and return immediately.
+        """
+        if self.webhook_url and not self._closing.is_set():
+            self._put(message)
+
+    def close(self, timeout: float | None = 10.0):
+        """
+        Deliver what is still queued, waiting at most `timeout` seconds, then
+        stop the worker. Messages not delivered by then are given up.
+        """
+        if self._closing.is_set():
+            return
+        self._deadline = None if timeout is None else time.monotonic() + timeout
+        self._closing.set()
+        self._put(self._stop)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning("⚠️ Slack notifier did not finish within %ss; pending messages dropped.", timeout)
+
+    def _put(self, item):
+        # Never block the caller: make room by dropping the oldest message.
+        # The stop marker has a slot of its own, so closing drops nothing.
+        with self._lock:
+            limit = self.queue_size + 1 if item is self._stop else self.queue_size
+            while self._queue.qsize() >= limit:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    break
+            self._queue.put_nowait(item)
+
+    def _next_batch(self) -> tuple[list[str], bool]:
+        """
+        Block for one message, then gather the burst that follows it.
+        Returns the messages and whether the notifier is stopping.
+        """
+        first = self._queue.get()
+        if first is self._stop:
+            return [], True
+        batch = [first]
+        while len(batch) < self.max_batch:
+            try:
+                # While closing, take what is queued without waiting for more
+                wait = 0 if self._closing.is_set() else self.coalesce_seconds
+                item = self._queue.get(timeout=wait) if wait else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is self._stop:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if batch:
+                self._deliver(batch)
+
+    def _digest(self, batch: list[str]) -> str:
+        with self._lock:
+            dropped, self.dropped = self.dropped, 0
+        if len(batch) == 1 and not dropped:
+            return batch[0]
+        text = "\n".join(f"• {message}" for message in batch)
+        if dropped:
+            text += f"\n_({dropped} earlier notification(s) dropped)_"
+        return text
+
+    def _deliver(self, batch: list[str]):
+        payload = {"text": self._digest(batch)}
+        delay = self.backoff
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                response = requests.post(self.webhook_url, json=payload, timeout=self.timeout)
+                if response.status_code < 400:
+                    self.sent += len(batch)
+                    return
+                if response.status_code != 429 and response.status_code < 500:
+                    logger.warning("Failed to send Slack message: HTTP %s %s", response.status_code, response.text[:200])
+                    break
+                retry_after = response.headers.get("Retry-After")
+                error = f"HTTP {response.status_code}"
+            except requests.RequestException as e:
+                error = str(e)
+
+            try:
+                wait = float(retry_after) if retry_after else delay
+            except ValueError:
+                wait = delay
+            # Past the shutdown deadline nobody waits for the retry anymore
+            out_of_time = self._deadline is not None and time.monotonic() + wait > self._deadline
+            if attempt == self.max_retries or out_of_time:
+                logger.warning("Failed to send Slack message after %d attempt(s): %s", attempt + 1, error)
+                break
+            time.sleep(wait)
+            delay *= 2
+        self.failed += len(batch)
+
+
+_notifier: SlackNotifier | None = None
+_notifier_lock = threading.Lock()
+
+
+def get_notifier() -> SlackNotifier:
+    """
+    Return the process-wide notifier, creating it from the Slack settings on first use.
+    """
+    global _notifier
+    with _notifier_lock:
+        if _notifier is None:
+            settings = config["slack"]
+            _notifier = SlackNotifier(
+                config["slack_webhook"],
+                timeout=settings["timeout"],
+                max_retries=settings["max_retries"],
+                queue_size=settings["queue_size"],
+                coalesce_seconds=settings["coalesce_seconds"],
+            )
+        return _notifier
+
+
+def close_notifier(timeout: float | None = None):
+    """
+    Flush and stop the shared notifier (call once at the end of a run).
+
+    Args:
+        timeout (float | None): Maximum seconds to wait; defaults to the configured shutdown timeout.
+    """
+    global _notifier
+    with _notifier_lock:
+        notifier, _notifier = _notifier, None
+    if notifier is not None:
+        notifier.close(config["slack"]["shutdown_timeout"] if timeout is None else timeout)
+
+
+atexit.register(close_notifier)
+
 
 def send_slack_notification(message: str):
     """
     Send a notification message to a Slack channel using a webhook URL.
-    
+
+    The message is queued and delivered by a background thread (see
+    SlackNotifier); this call never blocks on the network.
+
     Args:
         message (str): The message to send to the Slack channel.
     """
-    payload = {"text": message}
-    try:
-        requests.post(config["slack_webhook"], json=payload)
-    except Exception as e:
-        print(f"Failed to send Slack message: {e}")
+    get_notifier().notify(message)
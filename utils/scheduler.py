@@ -0,0 +1,140 @@
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Callable
+
+from utils.logger import logger
+
+
+class DAGExecutionError(Exception):
+    """
+    Raised when one or more tasks in a DAG run failed or were skipped.
+
+    Attributes:
+        failed (dict[str, BaseException]): Exceptions raised by failed tasks.
+        skipped (list[str]): Tasks not run because an upstream task failed.
+        results (dict[str, Any]): Return values of tasks that completed.
+    """
+
+    def __init__(self, failed: dict, skipped: list, results: dict):
+        self.failed = failed
+        self.skipped = skipped
+        self.results = results
+        summary = ", ".join(f"{name}: {exc}" for name, exc in failed.items())
+        super().__init__(f"{len(failed)} task(s) failed ({summary}); skipped: {skipped or 'none'}")
+
+
+def _validate_dag(tasks: dict, dependencies: dict) -> None:
+    """
+    Check that every dependency refers to a known task and that there are no cycles.
+    """
+    for name, upstream in dependencies.items():
+        if name not in tasks:
+            raise ValueError(f"❌ Dependencies declared for unknown task '{name}'.")
+        unknown = [dep for dep in upstream if dep not in tasks]
+        if unknown:
+            raise ValueError(f"❌ Task '{name}' depends on unknown task(s): {unknown}")
+
+    # Kahn's algorithm: if we cannot order every task, there is a cycle
+    remaining = {name: set(dependencies.get(name, [])) for name in tasks}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"❌ Dependency cycle detected between tasks: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+def run_dag(
+    tasks: dict[str, Callable[..., Any]],
+    dependencies: dict[str, list[str]] | None = None,
+    max_workers: int = 4,
+    executor: str = "thread",
+    on_complete: Callable[[str, Any], None] | None = None,
+) -> dict[str, Any]:
+    """
+    Run a set of named tasks concurrently, starting each one as soon as all of
+    its declared upstream tasks have finished.
+
+    A failing task does not stop independent tasks; anything downstream of it is
+    skipped. Once every runnable task has finished, a DAGExecutionError is raised
+    if anything failed.
+
+    Args:
+        tasks (dict[str, Callable]): Task name -> callable. Tasks without dependencies
+            are called with no arguments; tasks with dependencies are called with one
+            argument, a dict of upstream task name -> result. With the "process"
+            executor the callables must be picklable (e.g. functools.partial of a
+            module-level function).
+        dependencies (dict[str, list[str]]): Task name -> names of tasks it waits for.
+        max_workers (int): Maximum number of tasks running at once.
+        executor (str): "thread" (default, best for I/O-bound Snowflake round-trips)
+            or "process".
+        on_complete (Callable): Optional callback invoked as on_complete(name, result)
+            in the scheduling thread whenever a task finishes successfully.
+
+    Returns:
+        dict[str, Any]: Task name -> return value of the task.
+    """
+    dependencies = {name: list(deps) for name, deps in (dependencies or {}).items()}
+    _validate_dag(tasks, dependencies)
+
+    if executor == "thread":
+        pool_cls = ThreadPoolExecutor
+    elif executor == "process":
+        pool_cls = ProcessPoolExecutor
+    else:
+        raise ValueError(f"❌ Unknown executor '{executor}' (expected 'thread' or 'process').")
+
+    pending = {name: set(dependencies.get(name, [])) for name in tasks}
+    results: dict[str, Any] = {}
+    failed: dict[str, BaseException] = {}
+    skipped: list[str] = []
+
+    pool_args = {"mp_context": multiprocessing.get_context("spawn")} if pool_cls is ProcessPoolExecutor else {}
+    with pool_cls(max_workers=max(1, max_workers), **pool_args) as pool:
+        running = {}
+
+        def submit_ready():
+            for name in [n for n, deps in pending.items() if not deps]:
+                del pending[name]
+                logger.info(f"▶️ Starting task '{name}'")
+                upstream = dependencies.get(name)
+                if upstream:
+                    future = pool.submit(tasks[name], {dep: results[dep] for dep in upstream})
+                else:
+                    future = pool.submit(tasks[name])
+                running[future] = name
+
+        def skip_downstream(name):
+            for downstream in [n for n, deps in pending.items() if name in deps]:
+                del pending[downstream]
+                skipped.append(downstream)
+                logger.warning(f"⏭️ Skipping task '{downstream}' because '{name}' did not complete.")
+                skip_downstream(downstream)
+
+        submit_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    failed[name] = e
+                    logger.error(f"❌ Task '{name}' failed: {e}")
+                    skip_downstream(name)
+                    continue
+
+                logger.info(f"✅ Task '{name}' completed ({len(results)}/{len(tasks)} done)")
+                if on_complete is not None:
+                    on_complete(name, results[name])
+                for deps in pending.values():
+                    deps.discard(name)
+            submit_ready()
+
+    if failed:
+        raise DAGExecutionError(failed, skipped, results)
+
+    return results